@@ -0,0 +1,89 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+"""
+Compares connection count and latency of concurrent `Wit.message` calls
+against a local stub, for the default transport (one connection per call),
+a pooled requests.Session and Http2Transport.
+
+    python benchmarks/bench_http2.py --requests 2000 --concurrency 64
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from stub_server import StubServer  # noqa: E402
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+def run(name, make_transport, args):
+    from wit import wit as witmod
+
+    server = StubServer(latency=args.latency)
+    witmod.WIT_API_HOST = server.start()
+    transport = make_transport()
+    client = witmod.Wit("token", transport=transport)
+    latencies = []
+
+    def call(i):
+        start = time.time()
+        client.message("hello %d" % i)
+        latencies.append(time.time() - start)
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(call, range(args.requests)))
+    elapsed = time.time() - start
+    if transport is not None:
+        transport.close()
+    server.stop()
+    print(
+        "%-16s connections=%-5d p50=%.1fms p99=%.1fms throughput=%.0f req/s"
+        % (
+            name,
+            server.connections,
+            percentile(latencies, 0.5) * 1000,
+            percentile(latencies, 0.99) * 1000,
+            args.requests / elapsed,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    from wit.transport import Http2Transport
+
+    def session():
+        s = requests.Session()
+        s.mount("http://", HTTPAdapter(pool_maxsize=args.concurrency))
+        return s
+
+    run("default", lambda: None, args)
+    run("session", session, args)
+    run(
+        "http2",
+        lambda: Http2Transport(max_connections=2, prior_knowledge=True),
+        args,
+    )
+
+
+if __name__ == "__main__":
+    main()
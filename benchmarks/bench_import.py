@@ -0,0 +1,62 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+"""
+Cold-start cost of `from wit import Wit`: wall time and peak RSS of a fresh
+interpreter, against one that also imports the optional dependencies the
+package used to load eagerly (prompt_toolkit, numpy, httpx, asyncio).
+
+    python benchmarks/bench_import.py --runs 20
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SNIPPET = """
+import resource, sys, time
+sys.path.insert(0, %r)
+start = time.perf_counter()
+%s
+from wit import Wit
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0)
+"""
+
+EAGER = """
+import asyncio
+for name in ("prompt_toolkit", "numpy", "httpx"):
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+"""
+
+
+def measure(prelude, runs):
+    times, rss = [], []
+    for _ in range(runs):
+        out = subprocess.check_output([sys.executable, "-c", SNIPPET % (ROOT, prelude)])
+        seconds, mb = map(float, out.split())
+        times.append(seconds)
+        rss.append(mb)
+    times.sort()
+    rss.sort()
+    return times[len(times) // 2], rss[len(rss) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    for name, prelude in (("lazy", ""), ("eager", EAGER)):
+        seconds, mb = measure(prelude, args.runs)
+        print("%-6s import %6.1f ms   peak RSS %6.1f MB" % (name, seconds * 1000, mb))
+
+
+if __name__ == "__main__":
+    main()
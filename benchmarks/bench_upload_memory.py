@@ -0,0 +1,122 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+"""
+Peak resident memory of `Wit.speech` uploads of a large file to a local
+server, for each kind of input. Every mode runs in a fresh process; "extra"
+is the peak above the memory used by the input itself (the shared buffer the
+"bytesio", "memoryview" and "numpy" modes start from), i.e. what wrapping and
+uploading it costs.
+
+    python benchmarks/bench_upload_memory.py --megabytes 100
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MODES = ["bytesio", "file", "path", "bytes", "memoryview", "numpy"]
+
+
+class DiscardHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        remaining = int(self.headers["Content-Length"])
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, 1 << 20)))
+        body = b'{"text": "", "intents": [], "entities": {}, "traits": {}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def peak_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def child(mode, path, url):
+    sys.path.insert(0, ROOT)
+    from wit import wit as witmod
+
+    witmod.WIT_API_HOST = url
+    client = witmod.Wit("token")
+    f = None
+    before = peak_mb()
+    if mode == "file":
+        data = f = open(path, "rb")
+    elif mode == "path":
+        data = path
+    elif mode == "bytes":
+        with open(path, "rb") as f:
+            data = f.read()
+    else:
+        # a shared buffer the pipeline already holds
+        buf = bytearray(os.path.getsize(path))
+        with open(path, "rb") as f:
+            f.readinto(buf)
+        if mode == "bytesio":
+            # what callers had to do before buffers were accepted
+            data = io.BytesIO(buf)
+        elif mode == "memoryview":
+            data = memoryview(buf)
+        else:
+            import numpy as np
+
+            data = np.frombuffer(buf, dtype="<i2")
+    ready = peak_mb()
+    if mode in ("bytesio", "memoryview", "numpy"):
+        ready = before + os.path.getsize(path) / 1048576.0
+    client.speech(data, {"Content-Type": "audio/raw"})
+    if f is not None:
+        f.close()
+    print("%.1f %.1f" % (ready, peak_mb()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--megabytes", type=int, default=100)
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DiscardHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%d" % server.server_port
+    fd, path = tempfile.mkstemp()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for _ in range(args.megabytes):
+                f.write(os.urandom(1 << 20))
+        print("%d MB upload" % args.megabytes)
+        for mode in MODES:
+            out = subprocess.check_output(
+                [sys.executable, __file__, "--child", mode, path, url]
+            )
+            ready, peak = map(float, out.split())
+            print(
+                "%-10s peak RSS %7.1f MB   extra %7.1f MB" % (mode, peak, peak - ready)
+            )
+    finally:
+        os.unlink(path)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+"""
+Measures how many upload bytes VoiceActivityDetector removes from synthetic
+phone-style recordings (silence with line noise around bursts of voiced and
+unvoiced sound) and how fast it runs, in whole-file and streaming modes.
+
+    python benchmarks/bench_vad.py --recordings 50 --rate 8000
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from wit.audio import encode_pcm16  # noqa: E402
+from wit.vad import VoiceActivityDetector  # noqa: E402
+
+
+def recording(rng, rate):
+    lead, tail = rng.uniform(0.5, 4.0, size=2)
+    parts = [rng.standard_normal(int(lead * rate)) * 0.002]
+    for _ in range(rng.randint(1, 4)):
+        seconds = rng.uniform(0.3, 1.5)
+        t = np.arange(int(seconds * rate)) / float(rate)
+        envelope = np.sin(np.pi * t / seconds) ** 0.5
+        voiced = 0.3 * np.sin(2 * np.pi * rng.uniform(100, 250) * t)
+        hiss = 0.02 * rng.standard_normal(len(t))
+        parts.append(envelope * (voiced + hiss))
+        parts.append(rng.standard_normal(int(rng.uniform(0.1, 0.6) * rate)) * 0.002)
+    parts.append(rng.standard_normal(int(tail * rate)) * 0.002)
+    return np.concatenate(parts).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recordings", type=int, default=50)
+    parser.add_argument("--rate", type=int, default=8000)
+    parser.add_argument("--chunk", type=int, default=3200, help="stream chunk bytes")
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    pcm = [encode_pcm16(recording(rng, args.rate)) for _ in range(args.recordings)]
+    total = sum(map(len, pcm))
+    print("input: %d recordings, %.1f KB" % (len(pcm), total / 1024.0))
+
+    vad = VoiceActivityDetector()
+    start = time.perf_counter()
+    for body in pcm:
+        samples = np.frombuffer(body, dtype="<i2").astype(np.float32) / 32768.0
+        vad.trim(samples, args.rate)
+    whole = time.perf_counter() - start
+
+    streamed = VoiceActivityDetector()
+    start = time.perf_counter()
+    for body in pcm:
+        chunks = (body[i : i + args.chunk] for i in range(0, len(body), args.chunk))
+        for _ in streamed.stream(chunks, args.rate):
+            pass
+    stream = time.perf_counter() - start
+
+    audio_seconds = total / 2.0 / args.rate
+    for name, detector, elapsed in (
+        ("whole-file", vad, whole),
+        ("streaming", streamed, stream),
+    ):
+        print(
+            "%-10s removed %.1f KB (%.0f%% of upload), %.0fx realtime"
+            % (
+                name,
+                detector.bytes_removed / 1024.0,
+                100.0 * detector.bytes_removed / total,
+                audio_seconds / elapsed,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
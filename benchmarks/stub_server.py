@@ -0,0 +1,130 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+"""
+Local stand-in for api.wit.ai used by the benchmarks. Speaks HTTP/1.1 with
+keep-alive and cleartext HTTP/2 (prior knowledge) on the same port, answers
+every request after `latency` seconds with a small /message style JSON body,
+and counts the connections it accepted.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import asyncio
+import json
+import threading
+
+from h2.config import H2Configuration
+from h2.connection import H2Connection
+from h2.events import DataReceived, RequestReceived, StreamEnded
+
+H2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+
+
+class StubServer:
+    def __init__(self, latency=0.01, body=None):
+        self.latency = latency
+        self.body = json.dumps(
+            body or {"text": "hi", "intents": [], "entities": {}, "traits": {}}
+        ).encode("utf-8")
+        self.connections = 0
+        self.requests = 0
+        self.bytes_received = 0
+        self.port = None
+        self._loop = None
+        self._server = None
+        self._ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+        return "http://127.0.0.1:%d" % self.port
+
+    def stop(self):
+        # the loop runs in a daemon thread; stop accepting and let it idle
+        self._loop.call_soon_threadsafe(self._server.close)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, "127.0.0.1", 0)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            head = await reader.readexactly(len(H2_PREFACE))
+        except asyncio.IncompleteReadError:
+            writer.close()
+            return
+        if head == H2_PREFACE:
+            await self._serve_h2(head, reader, writer)
+        else:
+            await self._serve_h1(head, reader, writer)
+
+    async def _serve_h1(self, buf, reader, writer):
+        while True:
+            while b"\r\n\r\n" not in buf:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    writer.close()
+                    return
+                buf += chunk
+            head, buf = buf.split(b"\r\n\r\n", 1)
+            length = 0
+            for line in head.split(b"\r\n")[1:]:
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value)
+            while len(buf) < length:
+                buf += await reader.read(65536)
+            self.bytes_received += len(head) + length
+            buf = buf[length:]
+            self.requests += 1
+            await asyncio.sleep(self.latency)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: %d\r\n\r\n" % len(self.body) + self.body
+            )
+            await writer.drain()
+
+    async def _serve_h2(self, preface, reader, writer):
+        conn = H2Connection(H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        pending = [conn.receive_data(preface)]
+        while True:
+            for events in pending:
+                for event in events:
+                    if isinstance(event, RequestReceived):
+                        self.requests += 1
+                    elif isinstance(event, DataReceived):
+                        conn.acknowledge_received_data(
+                            event.flow_controlled_length, event.stream_id
+                        )
+                    if isinstance(event, StreamEnded):
+                        asyncio.ensure_future(
+                            self._respond_h2(conn, writer, event.stream_id)
+                        )
+            writer.write(conn.data_to_send())
+            data = await reader.read(65536)
+            if not data:
+                writer.close()
+                return
+            self.bytes_received += len(data)
+            pending = [conn.receive_data(data)]
+
+    async def _respond_h2(self, conn, writer, stream_id):
+        await asyncio.sleep(self.latency)
+        conn.send_headers(
+            stream_id,
+            [
+                (":status", "200"),
+                ("content-type", "application/json"),
+                ("content-length", str(len(self.body))),
+            ],
+        )
+        conn.send_data(stream_id, self.body, end_stream=True)
+        writer.write(conn.data_to_send())
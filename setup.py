@@ -13,7 +13,7 @@ try:
 except ImportError:
     from distutils.command.build_py import build_py
 
-install_requires = ["prompt_toolkit"]
+install_requires = []
 if sys.version_info < (2, 6):
     warnings.warn(
         "Python 2.5 is no longer officially supported by Wit. "
@@ -40,6 +40,13 @@ setup(
     author_email="help@wit.ai",
     cmdclass={"build_py": build_py},
     install_requires=install_requires,
+    extras_require={
+        "audio": ["numpy"],
+        "evaluation": ["numpy"],
+        "http2": ["httpx", "h2"],
+        "interactive": ["prompt_toolkit"],
+    },
     packages=["wit"],
+    entry_points={"console_scripts": ["wit = wit.cli:main"]},
     url="http://github.com/wit-ai/pywit",
 )
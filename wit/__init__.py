@@ -2,10 +2,46 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import importlib
 import logging
 import sys
 
-from .wit import Wit
+from .breaker import CircuitBreaker
+from .coalescing import KeywordBatcher
+from .concurrency import AdaptiveLimiter
+from .ensure import AppState
+from .graph import AppGraph
+from .hedging import Hedger
+from .local_index import UtteranceIndex
+from .matcher import KeywordMatcher
+from .pool import WitPool
+from .ratelimit import RateLimiter
+from .scheduler import RequestScheduler
+from .singleflight import AsyncSingleFlight, SingleFlight
+from .speech_cache import DiskSpeechCache, SpeechCache
+from .upload import BufferReader, MappedFile
+from .wit import CircuitOpenError, Wit, WitError
+
+# exported on first use, as they import asyncio, httpx, numpy or sqlite3
+LAZY_EXPORTS = {
+    "AsyncWit": ".async_client",
+    "Http2Transport": ".transport",
+    "Outbox": ".outbox",
+    "ResponseCache": ".evaluation",
+    "VoiceActivityDetector": ".vad",
+}
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def __getattr__(name):
+    module = LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
 
 # Set default logging for the module. Client applications can use a custom
 # logging config to override defaults specified here
@@ -0,0 +1,7 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
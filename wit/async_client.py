@@ -0,0 +1,175 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import asyncio
+import logging
+from urllib.parse import quote
+
+from . import wit as _wit
+from .transport import (
+    body_content,
+    http_client_kwargs,
+    HTTP2_AVAILABLE,
+    httpx,
+    HttpxResponse,
+)
+
+
+class AsyncWit:
+    """
+    asyncio client for the read and speech endpoints, multiplexing concurrent
+    calls over a few HTTP/2 connections (HTTP/1.1 when the server or the
+    installed packages do not support HTTP/2). Requires httpx
+    (`pip install wit[http2]`).
+
+        async with AsyncWit(access_token) as client:
+            responses = await asyncio.gather(*[client.message(t) for t in texts])
+    """
+
+    def __init__(
+        self,
+        # pyre-fixme[2]: Parameter must be annotated.
+        access_token,
+        # pyre-fixme[2]: Parameter must be annotated.
+        logger=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        max_connections=4,
+        # pyre-fixme[2]: Parameter must be annotated.
+        max_concurrent_streams=100,
+        # pyre-fixme[2]: Parameter must be annotated.
+        timeout=30.0,
+        # pyre-fixme[2]: Parameter must be annotated.
+        http2=True,
+        # pyre-fixme[2]: Parameter must be annotated.
+        prior_knowledge=False,
+        # pyre-fixme[2]: Parameter must be annotated.
+        single_flight=None,
+    ) -> None:
+        """
+        :param single_flight: optional AsyncSingleFlight sharing one request
+            between identical concurrent `message` or `detect_language` calls
+        """
+        if httpx is None:
+            raise ImportError("AsyncWit requires httpx: pip install wit[http2]")
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.access_token = access_token
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.logger = logger or logging.getLogger(_wit.__name__)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.http2 = bool(http2 and HTTP2_AVAILABLE)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.single_flight = single_flight
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._streams = asyncio.Semaphore(max_connections * max_concurrent_streams)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._client = httpx.AsyncClient(
+            **http_client_kwargs(self.http2, max_connections, timeout, prior_knowledge)
+        )
+
+    # pyre-fixme[3]: Return type must be annotated.
+    async def __aenter__(self):
+        return self
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def req(self, meth, path, params, headers=None, json=None, data=None):
+        full_url = _wit.WIT_API_HOST + path
+        self.logger.debug("%s %s %s", meth, full_url, params)
+        if hasattr(data, "read"):
+            # httpx.AsyncClient only streams async iterables
+            data = data.read()
+        async with self._streams:
+            rsp = await self._client.request(
+                meth,
+                full_url,
+                headers=_wit.request_headers(self.access_token, headers or {}),
+                params=params,
+                json=json,
+                content=body_content(data),
+            )
+        return _wit.parse_response(self.logger, meth, full_url, HttpxResponse(rsp))
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def _coalesced(self, path, params, headers):
+        if self.single_flight is None:
+            return await self.req("GET", path, params, headers=headers)
+        key = _wit.single_flight_key(self.access_token, path, params, headers)
+        return await self.single_flight.do(
+            key, lambda: self.req("GET", path, params, headers=headers)
+        )
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def message(self, msg, context=None, n=None, verbose=None, tag=None):
+        params = _wit.message_params(msg, context, n, verbose, tag)
+        return await self._coalesced("/message", params, None)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def detect_language(self, msg, n=None, headers=None, verbose=None):
+        params = {}
+        if msg:
+            params["q"] = msg
+        if verbose:
+            params["verbose"] = True
+        if n is not None:
+            params["n"] = n
+        return await self._coalesced("/language", params, headers)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def speech(self, audio_file, headers=None, verbose=None):
+        params = {"verbose": True} if verbose else {}
+        return await self.req(
+            "POST", "/speech", params, headers=headers, data=audio_file
+        )
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def _info(self, kind, name, headers, verbose):
+        params = {"verbose": True} if verbose else {}
+        endpoint = "/" + kind
+        if name is not None:
+            endpoint += "/" + quote(name, safe="")
+        return await self.req("GET", endpoint, params, headers=headers)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def intent_list(self, headers=None, verbose=None):
+        return await self._info("intents", None, headers, verbose)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def intent_info(self, intent_name, headers=None, verbose=None):
+        return await self._info("intents", intent_name, headers, verbose)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def entity_list(self, headers=None, verbose=None):
+        return await self._info("entities", None, headers, verbose)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def entity_info(self, entity_name, headers=None, verbose=None):
+        return await self._info("entities", entity_name, headers, verbose)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def trait_list(self, headers=None, verbose=None):
+        return await self._info("traits", None, headers, verbose)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def trait_info(self, trait_name, headers=None, verbose=None):
+        return await self._info("traits", trait_name, headers, verbose)
@@ -0,0 +1,269 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import struct
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TARGET_RATE = 16000
+RAW_CONTENT_TYPE = "audio/raw;encoding={};bits={};rate={};endian={}"
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("audio preprocessing requires numpy: pip install wit[audio]")
+
+
+# pyre-fixme[2]: Parameter must be annotated.
+def is_wav(data) -> bool:
+    return len(data) >= 12 and data[:4] == b"RIFF" and data[8:12] == b"WAVE"
+
+
+# pyre-fixme[2]: Parameter must be annotated.
+def is_stream(data) -> bool:
+    """
+    True for iterables of audio chunks, as opposed to bytes or file objects.
+    """
+    return (
+        not hasattr(data, "read")
+        and not isinstance(data, (bytes, bytearray, memoryview, str))
+        and hasattr(data, "__iter__")
+    )
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def parse_content_type(content_type):
+    """
+    Splits a Content-Type such as
+    "audio/raw;encoding=signed-integer;bits=16;rate=8000;endian=little" into
+    its media type and a dict of parameters.
+    """
+    parts = [p.strip() for p in (content_type or "").split(";")]
+    params = {}
+    for part in parts[1:]:
+        key, _, value = part.partition("=")
+        if key:
+            params[key.strip().lower()] = value.strip()
+    return parts[0].lower(), params
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _pcm_to_float(data, bits, encoding, endian, channels):
+    """
+    Converts interleaved PCM bytes into a float32 array of shape
+    (frames, channels) in [-1, 1].
+    """
+    order = "<" if endian == "little" else ">"
+    width = bits // 8
+    usable = len(data) - len(data) % (width * channels)
+    data = memoryview(data)[:usable]
+    if encoding == "floating-point":
+        samples = np.frombuffer(data, dtype=order + "f%d" % width).astype(np.float32)
+    elif bits == 8:
+        if encoding == "signed-integer":
+            samples = np.frombuffer(data, dtype=np.int8).astype(np.float32)
+        else:
+            samples = np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0
+        samples /= 128.0
+    elif bits == 24:
+        b = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        if endian != "little":
+            b = b[:, ::-1]
+        ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / float(1 << 23)
+    else:
+        dtype = order + ("i%d" if encoding != "unsigned-integer" else "u%d") % width
+        samples = np.frombuffer(data, dtype=dtype).astype(np.float32)
+        if encoding == "unsigned-integer":
+            samples -= float(1 << (bits - 1))
+        samples /= float(1 << (bits - 1))
+    return samples.reshape(-1, channels)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def decode_wav(data):
+    """
+    Decodes a PCM or IEEE float WAV file.
+
+    :return: (samples, rate) with float32 samples of shape (frames, channels)
+    """
+    _require_numpy()
+    if not is_wav(data):
+        raise ValueError("not a RIFF/WAVE file")
+    pos = 12
+    fmt = None
+    while pos + 8 <= len(data):
+        chunk_id = data[pos : pos + 4]
+        (size,) = struct.unpack("<I", data[pos + 4 : pos + 8])
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", data[body : body + 16])
+            if fmt[0] == WAVE_FORMAT_EXTENSIBLE and size >= 40:
+                (sub,) = struct.unpack("<H", data[body + 24 : body + 26])
+                fmt = (sub,) + fmt[1:]
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            tag, channels, rate, _, _, bits = fmt
+            if tag == WAVE_FORMAT_IEEE_FLOAT:
+                encoding = "floating-point"
+            elif tag == WAVE_FORMAT_PCM:
+                encoding = "unsigned-integer" if bits == 8 else "signed-integer"
+            else:
+                raise ValueError("unsupported WAV format tag %d" % tag)
+            pcm = data[body : body + size]
+            return _pcm_to_float(pcm, bits, encoding, "little", channels), rate
+        pos = body + size + (size & 1)
+    raise ValueError("WAV file has no data chunk")
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def decode_raw(data, content_type, channels=1):
+    """
+    Decodes raw PCM described by an "audio/raw;..." Content-Type.
+
+    :return: (samples, rate) with float32 samples of shape (frames, channels)
+    """
+    _require_numpy()
+    _, params = parse_content_type(content_type)
+    bits = int(params.get("bits", 16))
+    rate = int(params.get("rate", TARGET_RATE))
+    encoding = params.get("encoding", "signed-integer")
+    endian = params.get("endian", "little")
+    return _pcm_to_float(data, bits, encoding, endian, channels), rate
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def downmix(samples):
+    """
+    Averages the channels of a (frames, channels) array into a mono array.
+    """
+    if samples.ndim == 1:
+        return samples
+    if samples.shape[1] == 1:
+        return samples[:, 0]
+    return samples.mean(axis=1, dtype=np.float32)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _lowpass_kernel(cutoff, taps=63):
+    # Hann-windowed sinc; `cutoff` is relative to the input sample rate
+    n = np.arange(taps) - (taps - 1) / 2.0
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hanning(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def resample(samples, src_rate, dst_rate=TARGET_RATE):
+    """
+    Resamples mono float samples. Downsampling low-pass filters at the new
+    Nyquist frequency first, then both directions interpolate linearly.
+    """
+    _require_numpy()
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    if dst_rate < src_rate:
+        # keep the pass band slightly under the new Nyquist frequency
+        kernel = _lowpass_kernel(0.45 * dst_rate / src_rate)
+        samples = np.convolve(samples, kernel, mode="same")
+    frames = int(round(len(samples) * dst_rate / float(src_rate)))
+    positions = np.arange(frames, dtype=np.float64) * (src_rate / float(dst_rate))
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def encode_pcm16(samples):
+    """
+    Encodes float samples in [-1, 1] as little-endian signed 16-bit PCM.
+    """
+    ints = np.clip(np.rint(samples * 32767.0), -32768, 32767).astype("<i2")
+    return ints.tobytes()
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def raw_content_type(rate=TARGET_RATE):
+    return RAW_CONTENT_TYPE.format("signed-integer", 16, rate, "little")
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def decode(data, content_type=None):
+    """
+    Decodes WAV (detected from its header) or raw PCM (from its
+    Content-Type) into mono float samples.
+
+    :return: (samples, rate), or None for formats that cannot be decoded
+        locally, such as mp3 or ogg
+    """
+    media_type, _ = parse_content_type(content_type)
+    if is_wav(data):
+        samples, rate = decode_wav(data)
+    elif media_type == "audio/raw":
+        samples, rate = decode_raw(data, content_type)
+    else:
+        return None
+    return downmix(samples), rate
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def preprocess(data, content_type=None, rate=TARGET_RATE, vad=None):
+    """
+    Downmixes WAV or raw PCM audio to mono, downsamples it to `rate` (audio
+    at or below `rate`, or any audio when None, keeps its rate), trims leading and trailing silence when a
+    `VoiceActivityDetector` is given and encodes it as 16-bit PCM.
+
+    :return: (body, content_type) ready for the /speech API; other formats
+        are returned unchanged
+    """
+    decoded = decode(data, content_type)
+    if decoded is None:
+        return data, content_type
+    samples, src_rate = decoded
+    # upsampling would only make the upload larger
+    rate = min(rate, src_rate) if rate else src_rate
+    samples = resample(samples, src_rate, rate)
+    if vad is not None:
+        samples = vad.trim(samples, rate)
+    return encode_pcm16(samples), raw_content_type(rate)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def stream_rate(content_type):
+    """
+    Sample rate of a chunked upload that can be trimmed as it streams, which
+    requires 16-bit little-endian signed mono PCM.
+    """
+    media_type, params = parse_content_type(content_type)
+    if (
+        media_type != "audio/raw"
+        or params.get("bits", "16") != "16"
+        or params.get("encoding", "signed-integer") != "signed-integer"
+        or params.get("endian", "little") != "little"
+    ):
+        raise ValueError(
+            "streamed audio can only be trimmed as 16-bit signed little-endian "
+            "audio/raw, got %r" % content_type
+        )
+    return int(params.get("rate", TARGET_RATE))
@@ -0,0 +1,247 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import os
+import time
+from concurrent.futures import (
+    as_completed,
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    wait,
+)
+
+from .upload import open_body
+
+# content types by file extension, for headerless formats
+EXTENSION_CONTENT_TYPES = {
+    ".wav": "audio/wav",
+    ".mp3": "audio/mpeg3",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".ulaw": "audio/ulaw",
+    ".raw": "audio/raw",
+    ".pcm": "audio/raw",
+}
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def sniff_content_type(header):
+    """
+    Detects the Content-Type of an audio file from its first bytes.
+
+    :return: the content type, or None for formats without a header
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "audio/wav"
+    if header[:4] == b"OggS":
+        return "audio/ogg"
+    if header[:3] == b"ID3" or (
+        len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0
+    ):
+        return "audio/mpeg3"
+    return None
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def content_type_of(path):
+    with open(path, "rb") as f:
+        header = f.read(12)
+    content_type = sniff_content_type(header)
+    if content_type is None:
+        ext = os.path.splitext(path)[1].lower()
+        content_type = EXTENSION_CONTENT_TYPES.get(ext)
+    return content_type
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def expand_paths(paths_or_iterable):
+    """
+    Yields file paths, walking directories in sorted order.
+    """
+    if isinstance(paths_or_iterable, (str, os.PathLike)):
+        paths_or_iterable = [paths_or_iterable]
+    for path in paths_or_iterable:
+        path = os.fspath(path)
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                yield os.path.join(root, name)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def read_manifest(output):
+    """
+    Paths already transcribed in a JSONL manifest. Failed entries and a line
+    cut short by a crash are ignored, so those files are sent again.
+    """
+    done = set()
+    if output is None or not os.path.exists(output):
+        return done
+    with open(output, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "response" in record:
+                done.add(record["path"])
+    return done
+
+
+# pyre-fixme[2]: Parameter must be annotated.
+def _end_last_line(output) -> None:
+    # a previous run may have stopped in the middle of a line
+    if not os.path.exists(output):
+        return
+    with open(output, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _transcribe(client, path, headers, verbose):
+    start = time.time()
+    record = {"path": path}
+    try:
+        content_type = content_type_of(path)
+        record["content_type"] = content_type
+        request_headers = dict(headers or {})
+        if content_type is not None:
+            request_headers.setdefault("Content-Type", content_type)
+        record["response"] = client.speech(path, request_headers, verbose)
+    except Exception as e:
+        record["error"] = str(e)
+        record["status_code"] = getattr(e, "status_code", None)
+    record["seconds"] = round(time.time() - start, 3)
+    return record
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def iter_speech_batch(
+    client, paths_or_iterable, concurrency=4, output=None, headers=None, verbose=None
+):
+    """
+    Transcribes audio files with at most `concurrency` uploads in flight and
+    yields one record per file, in completion order: `{"path",
+    "content_type", "response", "seconds"}`, or `"error"` and `"status_code"`
+    instead of `"response"` when the call failed.
+
+    Paths are read lazily, so generators and large directories are fine.
+    When `output` is set, each record is appended to that JSONL manifest as
+    soon as it is known, and files it already lists as transcribed are
+    skipped: running the same batch again resumes it.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    done = read_manifest(output)
+    manifest = None
+    if output is not None:
+        _end_last_line(output)
+        manifest = open(output, "a", encoding="utf-8")
+    paths = (p for p in expand_paths(paths_or_iterable) if p not in done)
+    pending = set()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for path in paths:
+                pending.add(
+                    executor.submit(_transcribe, client, path, headers, verbose)
+                )
+                if len(pending) < concurrency:
+                    continue
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield _written(manifest, future.result())
+            for future in as_completed(pending):
+                yield _written(manifest, future.result())
+    finally:
+        if manifest is not None:
+            manifest.close()
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _written(manifest, record):
+    if manifest is not None:
+        manifest.write(json.dumps(record) + "\n")
+        manifest.flush()
+    return record
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def transcribe_long(
+    client,
+    audio_file,
+    headers=None,
+    max_segment_seconds=20.0,
+    concurrency=4,
+    vad=None,
+    verbose=None,
+):
+    """
+    Splits a long WAV or raw PCM recording at pauses and transcribes the
+    segments concurrently. See `Wit.speech_long`.
+    """
+    # numpy is only loaded by the audio features
+    from . import audio
+    from .vad import VoiceActivityDetector
+
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    headers = dict(headers or {})
+    content_type = None
+    for key in list(headers):
+        if key.lower() == "content-type":
+            content_type = headers.pop(key)
+    body = open_body(audio_file)
+    try:
+        decoded = audio.decode(body.read(), content_type)
+    finally:
+        if body is not audio_file:
+            body.close()
+    if decoded is None:
+        raise ValueError("long audio must be WAV or raw PCM, got %r" % content_type)
+    samples, rate = decoded
+    vad = vad or VoiceActivityDetector()
+    segments = vad.split(samples, rate, max_segment_seconds)
+    headers["Content-Type"] = audio.raw_content_type(rate)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def transcribe(bounds):
+        start, end = bounds
+        record = {"start": start / float(rate), "end": end / float(rate)}
+        try:
+            record["response"] = client.speech(
+                audio.encode_pcm16(samples[start:end]), headers, verbose
+            )
+        except Exception as e:
+            record["error"] = str(e)
+            record["status_code"] = getattr(e, "status_code", None)
+        return record
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        timeline = list(executor.map(transcribe, segments))
+    text = " ".join(r["response"].get("text", "") for r in timeline if "response" in r)
+    return {
+        "text": " ".join(text.split()),
+        "duration": len(samples) / float(rate),
+        "segments": timeline,
+    }
@@ -0,0 +1,196 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class _Circuit:
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, window_size) -> None:
+        self.state = CLOSED
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.outcomes = deque(maxlen=window_size)
+        self.opened_at = 0.0
+        self.probes = 0
+        self.successes = 0
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker. Each endpoint ("/message", "/speech", ...)
+    has its own circuit, which opens when the share of failed or slow calls
+    over the last `window_size` calls reaches its threshold. An open circuit
+    rejects calls for `reset_timeout` seconds, then lets `half_open_calls`
+    probes through: if they all succeed the circuit closes, otherwise it
+    opens again.
+
+    Listeners added with `add_listener` are called with
+    `(endpoint, old_state, new_state)` on every transition.
+    """
+
+    def __init__(
+        self,
+        # pyre-fixme[2]: Parameter must be annotated.
+        failure_rate=0.5,
+        # pyre-fixme[2]: Parameter must be annotated.
+        slow_call_seconds=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        slow_call_rate=0.8,
+        # pyre-fixme[2]: Parameter must be annotated.
+        window_size=20,
+        # pyre-fixme[2]: Parameter must be annotated.
+        min_calls=10,
+        # pyre-fixme[2]: Parameter must be annotated.
+        reset_timeout=30.0,
+        # pyre-fixme[2]: Parameter must be annotated.
+        half_open_calls=1,
+        # pyre-fixme[2]: Parameter must be annotated.
+        clock=time.monotonic,
+    ) -> None:
+        """
+        :param failure_rate: share of failed calls that opens the circuit
+        :param slow_call_seconds: calls slower than this count as slow
+        :param slow_call_rate: share of slow calls that opens the circuit
+        :param window_size: number of recent calls considered per endpoint
+        :param min_calls: calls required in the window before tripping
+        :param reset_timeout: seconds an open circuit waits before probing
+        :param half_open_calls: successful probes needed to close again
+        """
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.failure_rate = failure_rate
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.slow_call_seconds = slow_call_seconds
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.slow_call_rate = slow_call_rate
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.window_size = window_size
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.min_calls = min_calls
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.reset_timeout = reset_timeout
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.half_open_calls = half_open_calls
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._clock = clock
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._circuits = {}
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._listeners = []
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def add_listener(self, listener) -> None:
+        self._listeners.append(listener)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def remove_listener(self, listener) -> None:
+        # a new list, as a notification may be iterating over the old one
+        self._listeners = [fn for fn in self._listeners if fn != listener]
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def state(self, endpoint):
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            return circuit.state if circuit else CLOSED
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _circuit(self, endpoint):
+        circuit = self._circuits.get(endpoint)
+        if circuit is None:
+            circuit = self._circuits[endpoint] = _Circuit(self.window_size)
+        return circuit
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def allow(self, endpoint) -> bool:
+        """
+        Whether a call to `endpoint` may go out now. Callers that get True
+        must report the outcome with `record`.
+        """
+        transition = None
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == OPEN:
+                if self._clock() - circuit.opened_at < self.reset_timeout:
+                    return False
+                transition = self._set_state(endpoint, circuit, HALF_OPEN)
+            if circuit.state == HALF_OPEN:
+                if circuit.probes >= self.half_open_calls:
+                    allowed = False
+                else:
+                    circuit.probes += 1
+                    allowed = True
+            else:
+                allowed = True
+        self._notify(transition)
+        return allowed
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def record(self, endpoint, ok, latency) -> None:
+        """
+        Records the outcome of a call allowed by `allow`.
+
+        :param ok: False if the call failed in a way that indicates an
+            unhealthy service (network error, 429 or 5xx)
+        :param latency: call duration in seconds
+        """
+        slow = self.slow_call_seconds is not None and latency > self.slow_call_seconds
+        transition = None
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == HALF_OPEN:
+                if not ok or slow:
+                    transition = self._set_state(endpoint, circuit, OPEN)
+                else:
+                    circuit.successes += 1
+                    if circuit.successes >= self.half_open_calls:
+                        transition = self._set_state(endpoint, circuit, CLOSED)
+            elif circuit.state == CLOSED:
+                circuit.outcomes.append((ok, slow))
+                if self._should_trip(circuit.outcomes):
+                    transition = self._set_state(endpoint, circuit, OPEN)
+        self._notify(transition)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _should_trip(self, outcomes) -> bool:
+        total = len(outcomes)
+        if total < self.min_calls:
+            return False
+        failures = sum(1 for ok, _ in outcomes if not ok)
+        if failures >= self.failure_rate * total:
+            return True
+        if self.slow_call_seconds is None:
+            return False
+        slow = sum(1 for _, s in outcomes if s)
+        return slow >= self.slow_call_rate * total
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _set_state(self, endpoint, circuit, state):
+        old = circuit.state
+        circuit.state = state
+        circuit.probes = 0
+        circuit.successes = 0
+        if state == OPEN:
+            circuit.opened_at = self._clock()
+        if state == CLOSED:
+            circuit.outcomes.clear()
+        return (endpoint, old, state)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _notify(self, transition) -> None:
+        if transition is None:
+            return
+        for listener in self._listeners:
+            listener(*transition)
@@ -0,0 +1,434 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+"""
+The `wit` command line tool.
+
+    wit message < texts.txt > results.jsonl
+    wit message utterances.jsonl -o results.jsonl --concurrency 32 --rate 20
+    wit train utterances.jsonl
+    wit export -o app.zip
+    wit speech calls/ -o calls.jsonl
+    wit train utterances.jsonl --concurrency 16 --adaptive
+    wit evaluate test_set.jsonl --tag v42 --cache eval.db > report.json
+    wit compare test_set.jsonl --baseline v42 --candidate v43 --cache eval.db
+
+The access token is read from --token or the WIT_ACCESS_TOKEN variable.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import requests
+
+from .batch import iter_speech_batch
+from .concurrency import AdaptiveLimiter
+from .ratelimit import RateLimiter
+from .singleflight import SingleFlight
+from .wit import Wit
+
+# utterances per /utterances call
+TRAIN_BATCH_SIZE = 200
+
+
+class Progress:
+    """
+    Counts completed items and prints throughput to stderr every `interval`
+    seconds, and once more at the end.
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, enabled, interval=2.0, stream=None) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.enabled = enabled
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.interval = interval
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.stream = stream or sys.stderr
+        self.done = 0
+        self.errors = 0
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.start = time.time()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._last = self.start
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+        # callables returning extra text, e.g. cache statistics
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.extras = []
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def add(self, ok=True, count=1) -> None:
+        with self._lock:
+            self.done += count
+            if not ok:
+                self.errors += count
+            now = time.time()
+            if not self.enabled or now - self._last < self.interval:
+                return
+            self._last = now
+        self.report()
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def summary(self):
+        elapsed = max(time.time() - self.start, 1e-9)
+        text = "%d done, %d errors, %.1fs, %.1f/s" % (
+            self.done,
+            self.errors,
+            elapsed,
+            self.done / elapsed,
+        )
+        for extra in self.extras:
+            text += ", " + extra()
+        return text
+
+    def report(self) -> None:
+        print(self.summary(), file=self.stream)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def ordered_map(fn, items, concurrency):
+    """
+    Like `Executor.map`, but reads `items` lazily: at most `2 * concurrency`
+    items are pending at once, so inputs of any size stream through.
+    Results are yielded in input order.
+    """
+    window = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for item in items:
+            window.append(executor.submit(fn, item))
+            if len(window) >= 2 * concurrency:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def read_records(f):
+    """
+    Reads plain text lines or JSON objects with a "text" field, one per line.
+    """
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            yield json.loads(line)
+        else:
+            yield {"text": line}
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+@contextlib.contextmanager
+def _open(path, mode):
+    # "-" is stdin or stdout, which are left open
+    if path == "-":
+        yield sys.stdin if mode == "r" else sys.stdout
+        return
+    with open(path, mode, encoding="utf-8") as f:
+        yield f
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _limited(fn, rate):
+    if not rate:
+        return fn
+    limiter = RateLimiter(rate)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def call(*args):
+        limiter.acquire()
+        return fn(*args)
+
+    return call
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _progress(args):
+    progress = Progress(args.progress)
+    limiter = getattr(args, "limiter", None)
+    if limiter is not None:
+        progress.extras.append(lambda: "concurrency limit %d" % limiter.limit)
+    return progress
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _error_fields(e):
+    return {"error": str(e), "status_code": getattr(e, "status_code", None)}
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def cmd_message(client, args):
+    send = _limited(
+        lambda text, context: client.message(
+            text, json.loads(context) if context else None
+        ),
+        args.rate,
+    )
+    if args.cache:
+        send = functools.lru_cache(maxsize=args.cache)(send)
+    progress = _progress(args)
+    if args.cache:
+        progress.extras.append(lambda: "cache hits %d" % send.cache_info().hits)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def process(record):
+        context = record.get("context")
+        try:
+            resp = send(record["text"], json.dumps(context) if context else None)
+            result = dict(record, response=resp)
+        except Exception as e:
+            result = dict(record, **_error_fields(e))
+        progress.add("response" in result)
+        return result
+
+    with _open(args.input, "r") as inp, _open(args.output, "w") as out:
+        for result in ordered_map(process, read_records(inp), args.concurrency):
+            out.write(json.dumps(result) + "\n")
+    if args.progress:
+        progress.report()
+    return 1 if progress.errors else 0
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def cmd_train(client, args):
+    send = _limited(client.train, args.rate)
+    progress = _progress(args)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def process(batch):
+        try:
+            result = {"utterances": len(batch), "response": send(batch)}
+        except Exception as e:
+            result = dict({"utterances": len(batch)}, **_error_fields(e))
+        progress.add("response" in result, len(batch))
+        return result
+
+    with _open(args.input, "r") as inp:
+        records = (json.loads(line) for line in inp if line.strip())
+        batches = _batches(records, args.batch_size)
+        for result in ordered_map(process, batches, args.concurrency):
+            if "error" in result:
+                print(json.dumps(result), file=sys.stderr)
+    progress.report()
+    return 1 if progress.errors else 0
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def cmd_export(client, args):
+    resp = client.export()
+    if args.output is None:
+        print(json.dumps(resp))
+        return 0
+    with requests.get(resp["uri"], stream=True) as rsp:
+        rsp.raise_for_status()
+        with open(args.output, "wb") as f:
+            for chunk in rsp.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+    return 0
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def cmd_speech(client, args):
+    progress = _progress(args)
+    limited = SimpleNamespace(speech=_limited(client.speech, args.rate))
+    records = iter_speech_batch(
+        limited, args.paths, concurrency=args.concurrency, output=args.output
+    )
+    for record in records:
+        progress.add("response" in record)
+        if args.output is None:
+            print(json.dumps(record))
+    if args.progress:
+        progress.report()
+    return 1 if progress.errors else 0
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def cmd_evaluate(client, args):
+    # numpy is only loaded by the evaluation features
+    from .evaluation import evaluate, ResponseCache
+
+    if args.rate:
+        client.rate_limiter = RateLimiter(args.rate)
+    cache = ResponseCache(args.cache) if args.cache else None
+    with _open(args.input, "r") as inp:
+        report = evaluate(
+            client, inp, tag=args.tag, cache=cache, concurrency=args.concurrency
+        )
+    print(json.dumps(report, indent=2))
+    if args.progress:
+        print(
+            "%d scored, %d errors, %d cached"
+            % (report["count"], report["errors"], report["cached"]),
+            file=sys.stderr,
+        )
+    return 1 if report["errors"] else 0
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def cmd_compare(client, args):
+    from .evaluation import compare, ResponseCache
+
+    if args.rate:
+        client.rate_limiter = RateLimiter(args.rate)
+    cache = ResponseCache(args.cache) if args.cache else None
+    with _open(args.input, "r") as inp:
+        report = compare(
+            client,
+            inp,
+            args.baseline,
+            args.candidate,
+            cache=cache,
+            concurrency=args.concurrency,
+        )
+    print(json.dumps(report, indent=2))
+    errors = report["baseline"]["errors"] + report["candidate"]["errors"]
+    if args.progress:
+        print(
+            "%d disagreements, %d fixed, %d regressed, %d errors"
+            % (report["disagreements"], report["fixed"], report["regressed"], errors),
+            file=sys.stderr,
+        )
+    return 1 if errors else 0
+
+
+# pyre-fixme[3]: Return type must be annotated.
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="wit", description="Command line client for the Wit.ai API"
+    )
+    parser.add_argument("--token", help="access token, defaults to $WIT_ACCESS_TOKEN")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def command(name, fn, help, concurrency=None):
+        sub = commands.add_parser(name, help=help)
+        sub.set_defaults(func=fn)
+        if concurrency is None:
+            return sub
+        sub.add_argument(
+            "--concurrency",
+            type=int,
+            default=concurrency,
+            help="requests in flight (default %d)" % concurrency,
+        )
+        sub.add_argument("--rate", type=float, help="maximum requests per second")
+        sub.add_argument(
+            "--adaptive",
+            action="store_true",
+            help="adapt the requests in flight to latency and 429s, "
+            "up to --concurrency",
+        )
+        sub.add_argument(
+            "--progress", action="store_true", help="print throughput to stderr"
+        )
+        return sub
+
+    message = command(
+        "message",
+        cmd_message,
+        "send texts (one per line, or JSON objects with a text field)",
+        16,
+    )
+    message.add_argument("input", nargs="?", default="-")
+    message.add_argument("-o", "--output", default="-", help="JSONL results")
+    message.add_argument(
+        "--cache",
+        type=int,
+        default=100000,
+        help="responses kept for repeated texts, 0 to disable (default 100000)",
+    )
+
+    train = command("train", cmd_train, "train utterances from a JSONL file", 4)
+    train.add_argument("input", nargs="?", default="-")
+    train.add_argument("--batch-size", type=int, default=TRAIN_BATCH_SIZE)
+
+    export = command("export", cmd_export, "export the app")
+    export.add_argument("-o", "--output", help="download the ZIP file here")
+
+    speech = command("speech", cmd_speech, "transcribe audio files", 4)
+    speech.add_argument("paths", nargs="+", help="audio files or directories")
+    speech.add_argument(
+        "-o", "--output", help="resumable JSONL manifest (default: stdout)"
+    )
+
+    evaluation = command("evaluate", cmd_evaluate, "score a labeled JSONL dataset", 8)
+    evaluation.add_argument("input", nargs="?", default="-")
+    evaluation.add_argument("--tag", help="app version to evaluate")
+    evaluation.add_argument("--cache", help="SQLite file caching responses per --tag")
+
+    comparison = command(
+        "compare", cmd_compare, "compare two app versions on a labeled dataset", 8
+    )
+    comparison.add_argument("input", nargs="?", default="-")
+    comparison.add_argument("--baseline", required=True, help="reference app version")
+    comparison.add_argument("--candidate", required=True, help="app version to test")
+    comparison.add_argument("--cache", help="SQLite file caching responses per version")
+    return parser
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    token = args.token or os.environ.get("WIT_ACCESS_TOKEN")
+    if not token:
+        parser.error("an access token is required: --token or $WIT_ACCESS_TOKEN")
+    if getattr(args, "concurrency", 1) < 1:
+        parser.error("--concurrency must be at least 1")
+    limiter = None
+    if getattr(args, "adaptive", False):
+        limiter = AdaptiveLimiter(
+            initial=min(4, args.concurrency), max_limit=args.concurrency
+        )
+    args.limiter = limiter
+    client = Wit(token, single_flight=SingleFlight(), concurrency_limiter=limiter)
+    return args.func(client, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import logging
+import threading
+from collections import OrderedDict
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def role_names(roles):
+    # entity_info returns roles as names or as {"id", "name"} objects
+    return [r["name"] if isinstance(r, dict) else r for r in roles or []]
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def merge_keywords(keywords, additions):
+    """
+    Adds `additions` ({keyword: [synonyms]}) to a list of
+    `{"keyword", "synonyms"}` objects, skipping synonyms already present.
+    """
+    # dicts as ordered sets of synonyms
+    merged = OrderedDict()
+    for item in keywords or []:
+        merged[item["keyword"]] = dict.fromkeys(item.get("synonyms") or [])
+    for keyword, synonyms in additions.items():
+        merged.setdefault(keyword, {}).update(dict.fromkeys(synonyms))
+    return [{"keyword": k, "synonyms": list(s)} for k, s in merged.items()]
+
+
+# failed flushes are retried after up to 2**6 times max_delay
+MAX_BACKOFF_DOUBLINGS = 6
+
+
+class KeywordBatcher:
+    """
+    Buffers `add_keyword_value` and `create_synonym` calls per entity and
+    applies them with one `entity_info` and one `update_entity` call per
+    entity carrying the full keyword list. Buffered calls are flushed when
+    `max_pending` of them are waiting, `max_delay` seconds after the oldest
+    one, on `flush()` and when leaving a `with` block. Calls whose update
+    failed are flushed again after `max_delay`, doubling on each failure.
+
+    A synonym of a keyword that does not exist yet creates the keyword.
+    Entities updated by someone else between the two calls lose those
+    changes, so one batcher should own an app's keyword writes.
+    """
+
+    def __init__(
+        self,
+        # pyre-fixme[2]: Parameter must be annotated.
+        client,
+        # pyre-fixme[2]: Parameter must be annotated.
+        max_pending=1000,
+        # pyre-fixme[2]: Parameter must be annotated.
+        max_delay=5.0,
+        # pyre-fixme[2]: Parameter must be annotated.
+        logger=None,
+    ) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.client = client
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.max_pending = max_pending
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.max_delay = max_delay
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.logger = logger or logging.getLogger(__name__)
+        # entity -> keyword -> synonyms to add, as an ordered set
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._pending = OrderedDict()
+        self._count = 0
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+        # serializes the read-modify-write of each flush
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._flushing = threading.Lock()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._timer = None
+        # consecutive failed flushes, backing off the retries
+        self._failures = 0
+        # buffered calls and the requests that applied them
+        self.calls = 0
+        self.requests = 0
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def add_keyword_value(self, entity_name, data) -> None:
+        """
+        :param data: `{"keyword": ..., "synonyms": [...]}`
+        """
+        synonyms = list(data.get("synonyms") or [])
+        self._add(entity_name, data["keyword"], synonyms)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def create_synonym(self, entity_name, keyword_name, synonym) -> None:
+        self._add(entity_name, keyword_name, [synonym])
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _add(self, entity_name, keyword, synonyms) -> None:
+        with self._lock:
+            keywords = self._pending.setdefault(entity_name, OrderedDict())
+            keywords.setdefault(keyword, {}).update(dict.fromkeys(synonyms))
+            self._count += 1
+            self.calls += 1
+            full = self._count >= self.max_pending
+            if not full:
+                self._schedule()
+        if full:
+            self.flush()
+
+    def _schedule(self) -> None:
+        # called with the lock held
+        if self._timer is not None or self.max_delay is None:
+            return
+        delay = self.max_delay * 2 ** min(self._failures, MAX_BACKOFF_DOUBLINGS)
+        self._timer = threading.Timer(delay, self._flush_due)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_due(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            self.logger.exception("keyword batch flush failed")
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._count
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def flush(self):
+        """
+        Applies the buffered calls. Calls of entities whose update failed
+        are buffered again and the first error is raised.
+
+        :return: the `update_entity` responses, by entity name
+        """
+        with self._flushing:
+            with self._lock:
+                pending, self._pending = self._pending, OrderedDict()
+                self._count = 0
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            responses = {}
+            error = None
+            for entity_name, additions in pending.items():
+                try:
+                    responses[entity_name] = self._apply(entity_name, additions)
+                except Exception as e:
+                    self.logger.warning("updating %s failed: %s", entity_name, e)
+                    self._restore(entity_name, additions)
+                    error = error or e
+            with self._lock:
+                if error is None:
+                    self._failures = 0
+                else:
+                    # retry the restored calls, later each time
+                    self._failures += 1
+                    self._schedule()
+            if error is not None:
+                raise error
+            return responses
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _restore(self, entity_name, additions) -> None:
+        with self._lock:
+            keywords = self._pending.setdefault(entity_name, OrderedDict())
+            for keyword, synonyms in additions.items():
+                keywords.setdefault(keyword, {}).update(synonyms)
+                self._count += 1
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _apply(self, entity_name, additions):
+        info = self.client.entity_info(entity_name)
+        self.requests += 2
+        return self.client.update_entity(
+            entity_name,
+            entity_name,
+            role_names(info.get("roles")),
+            lookups=info.get("lookups"),
+            keywords=merge_keywords(info.get("keywords"), additions),
+        )
+
+    def close(self) -> None:
+        self.flush()
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def __enter__(self):
+        return self
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __exit__(self, *args) -> None:
+        self.close()
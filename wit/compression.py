@@ -0,0 +1,65 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import gzip
+import json
+
+try:
+    import brotli  # noqa: F401
+
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+DEFAULT_THRESHOLD = 1024
+# compressed bodies must be at most this share of the original to be sent
+MAX_RATIO = 0.9
+
+# (method, endpoint) pairs whose request bodies may be gzip-encoded
+COMPRESSIBLE = {
+    ("POST", "/utterances"),
+    ("DELETE", "/utterances"),
+    ("PUT", "/entities"),
+    ("POST", "/import"),
+}
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def compress_body(kwargs, threshold=DEFAULT_THRESHOLD, level=6):
+    """
+    Gzip-encodes the `json` or `data` body in `kwargs` (the keyword arguments
+    of `req`) when it is at least `threshold` bytes and compresses well.
+    Returns the keyword arguments to use and `(raw_bytes, wire_bytes)`,
+    or None when the body was left untouched.
+    """
+    headers = dict(kwargs.get("headers") or {})
+    if "json" in kwargs:
+        raw = json.dumps(kwargs["json"]).encode("utf-8")
+        headers.setdefault("Content-Type", "application/json")
+    else:
+        data = kwargs.get("data")
+        if hasattr(data, "read"):
+            data = data.read()
+            # a file can only be read once: send the bytes from now on
+            kwargs = dict(kwargs, data=data)
+        if not isinstance(data, bytes):
+            return kwargs, None
+        raw = data
+    if len(raw) < threshold:
+        return kwargs, None
+    body = gzip.compress(raw, compresslevel=level)
+    if len(body) > MAX_RATIO * len(raw):
+        return kwargs, None
+    headers["Content-Encoding"] = "gzip"
+    kwargs = dict(kwargs, data=body, headers=headers)
+    kwargs.pop("json", None)
+    return kwargs, (len(raw), len(body))
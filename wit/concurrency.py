@@ -0,0 +1,180 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import contextlib
+import threading
+import time
+from collections import deque
+
+from .wit import is_unhealthy_error
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit adjusted with AIMD, like TCP congestion control. Each
+    healthy response raises the limit by `1 / limit`, so about one more
+    request per round of `limit` requests. A 429, a 5xx, a network error or a
+    latency above `latency_tolerance` times the baseline (the fastest of the
+    last `window` responses) multiplies it by `backoff`, at most once per
+    round trip.
+
+    Listeners added with `add_listener` are called with
+    `(old_limit, new_limit)` whenever the integer limit changes.
+    """
+
+    def __init__(
+        self,
+        # pyre-fixme[2]: Parameter must be annotated.
+        initial=4,
+        # pyre-fixme[2]: Parameter must be annotated.
+        min_limit=1,
+        # pyre-fixme[2]: Parameter must be annotated.
+        max_limit=64,
+        # pyre-fixme[2]: Parameter must be annotated.
+        backoff=0.5,
+        # pyre-fixme[2]: Parameter must be annotated.
+        latency_tolerance=2.0,
+        # pyre-fixme[2]: Parameter must be annotated.
+        window=100,
+        # pyre-fixme[2]: Parameter must be annotated.
+        min_samples=10,
+        # pyre-fixme[2]: Parameter must be annotated.
+        clock=time.monotonic,
+    ) -> None:
+        """
+        :param initial: starting limit
+        :param backoff: factor applied to the limit on overload, below 1
+        :param latency_tolerance: latencies above this multiple of the
+            baseline count as overload
+        :param window: number of recent latencies the baseline is taken from
+        :param min_samples: latencies needed before latency is considered
+        """
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("need 1 <= min_limit <= initial <= max_limit")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.min_limit = min_limit
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.max_limit = max_limit
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.backoff = backoff
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.latency_tolerance = latency_tolerance
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.min_samples = min_samples
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._clock = clock
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._limit = float(initial)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._latencies = deque(maxlen=window)
+        # requests started before the last decrease don't decrease it again
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._decreased_at = clock()
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._listeners = []
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._cond = threading.Condition()
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def add_listener(self, listener) -> None:
+        self._listeners.append(listener)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def remove_listener(self, listener) -> None:
+        # a new list, as a notification may be iterating over the old one
+        self._listeners = [fn for fn in self._listeners if fn != listener]
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def baseline(self):
+        """
+        The fastest recent latency in seconds, or None without enough data.
+        """
+        with self._cond:
+            if len(self._latencies) < self.min_samples:
+                return None
+            return min(self._latencies)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def acquire(self):
+        """
+        Blocks until a request may start.
+
+        :return: a start time to pass to `release`
+        """
+        with self._cond:
+            while self.in_flight >= int(self._limit):
+                self._cond.wait()
+            self.in_flight += 1
+            return self._clock()
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def release(self, start, overloaded=False) -> None:
+        """
+        Ends a request started at `start`.
+
+        :param overloaded: the request failed with a 429, a 5xx or a
+            network error
+        """
+        now = self._clock()
+        latency = now - start
+        with self._cond:
+            self.in_flight -= 1
+            old = int(self._limit)
+            if not overloaded:
+                baseline = (
+                    min(self._latencies)
+                    if len(self._latencies) >= self.min_samples
+                    else None
+                )
+                self._latencies.append(latency)
+                overloaded = (
+                    baseline is not None and latency > self.latency_tolerance * baseline
+                )
+            if not overloaded:
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            elif start >= self._decreased_at:
+                self._limit = max(self.min_limit, self._limit * self.backoff)
+                self._decreased_at = now
+            new = int(self._limit)
+            if new > old:
+                self.increases += 1
+            elif new < old:
+                self.decreases += 1
+            self._cond.notify_all()
+        if new != old:
+            for listener in self._listeners:
+                listener(old, new)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    @contextlib.contextmanager
+    def slot(self):
+        start = self.acquire()
+        overloaded = False
+        try:
+            yield
+        except Exception as e:
+            overloaded = is_unhealthy_error(e)
+            raise
+        finally:
+            self.release(start, overloaded)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "baseline_seconds": self.baseline(),
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
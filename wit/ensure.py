@@ -0,0 +1,198 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+
+from .coalescing import role_names
+from .graph import build_app_graph
+from .wit import WitError
+
+
+class AppState:
+    """
+    Idempotent `ensure_*` operations checked against an AppGraph snapshot of
+    the app, fetched on first use: only what is missing is created, so
+    running the same deploy twice makes no write calls the second time.
+
+    A create call failing because the snapshot is stale (the item was made
+    elsewhere since) falls back to fetching the item. `writes` counts the
+    write calls made and `skipped` the ensure calls answered locally.
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, client, graph=None, concurrency=8) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.client = client
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.concurrency = concurrency
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._graph = graph
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.RLock()
+        self.writes = 0
+        self.skipped = 0
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def graph(self):
+        """
+        The snapshot, fetched if needed. An incomplete snapshot would turn
+        items it missed into create calls, so one with failed calls is
+        dropped and raises a WitError; the next call fetches it again.
+        """
+        with self._lock:
+            if self._graph is None:
+                self._graph = build_app_graph(self.client, concurrency=self.concurrency)
+            graph = self._graph
+            if graph.errors:
+                self._graph = None
+                first = graph.errors[0]
+                raise WitError(
+                    "incomplete app snapshot, %d calls failed, first %s %s: %s"
+                    % (
+                        len(graph.errors),
+                        first.kind,
+                        first.name or "list",
+                        first.error,
+                    ),
+                    getattr(first.error, "status_code", None),
+                )
+            return graph
+
+    def refresh(self) -> None:
+        """
+        Drops the snapshot; the next ensure call fetches a new one.
+        """
+        with self._lock:
+            self._graph = None
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _create(self, kind, name, create, info):
+        # returns the detail object of `name`, creating it if needed
+        graph = self.graph()
+        existing = graph.get(kind, name)
+        if existing is not None:
+            return existing
+        self.writes += 1
+        try:
+            created = create()
+        except WitError as e:
+            try:
+                created = info(name)
+            except Exception:
+                raise e
+        graph.add(kind, created)
+        return created
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def ensure_intent(self, name):
+        with self._lock:
+            writes = self.writes
+            intent = self._create(
+                "intents",
+                name,
+                lambda: self.client.create_intent(name),
+                self.client.intent_info,
+            )
+            self._count(writes)
+            return intent
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def ensure_entity(self, name, roles=None, lookups=None):
+        """
+        Creates the entity, or adds the roles it is missing.
+        """
+        roles = list(roles or [name])
+        with self._lock:
+            writes = self.writes
+            entity = self._create(
+                "entities",
+                name,
+                lambda: self.client.create_entity(name, roles, lookups),
+                self.client.entity_info,
+            )
+            known = role_names(entity.get("roles"))
+            missing = [r for r in roles if r not in known]
+            if missing:
+                self.writes += 1
+                self.client.update_entity(
+                    name,
+                    name,
+                    known + missing,
+                    lookups=entity.get("lookups"),
+                    keywords=entity.get("keywords"),
+                )
+                entity = dict(entity, roles=known + missing)
+                self.graph().add("entities", entity)
+            self._count(writes)
+            return entity
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def ensure_trait(self, name, values):
+        """
+        Creates the trait, or adds the values it is missing.
+        """
+        with self._lock:
+            writes = self.writes
+            trait = self._create(
+                "traits",
+                name,
+                lambda: self.client.create_trait(name, values),
+                self.client.trait_info,
+            )
+            known = [v["value"] for v in trait.get("values") or []]
+            added = []
+            for value in values:
+                if value not in known:
+                    self.writes += 1
+                    self.client.create_trait_value(name, value)
+                    added.append({"value": value})
+            if added:
+                trait = dict(trait, values=list(trait.get("values") or []) + added)
+                self.graph().add("traits", trait)
+            self._count(writes)
+            return trait
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def ensure_keyword(self, entity_name, keyword, synonyms=None):
+        """
+        Adds the keyword to a keywords entity, or the synonyms it is
+        missing. The entity must exist, see `ensure_entity`.
+        """
+        synonyms = list(synonyms or [keyword])
+        with self._lock:
+            writes = self.writes
+            entity = self.graph().get("entities", entity_name)
+            if entity is None:
+                raise ValueError("unknown entity " + repr(entity_name))
+            keywords = list(entity.get("keywords") or [])
+            current = next((k for k in keywords if k["keyword"] == keyword), None)
+            if current is None:
+                self.writes += 1
+                self.client.add_keyword_value(
+                    entity_name, {"keyword": keyword, "synonyms": synonyms}
+                )
+                keywords.append({"keyword": keyword, "synonyms": synonyms})
+            else:
+                known = list(current.get("synonyms") or [])
+                for synonym in synonyms:
+                    if synonym not in known:
+                        self.writes += 1
+                        self.client.create_synonym(entity_name, keyword, synonym)
+                        known.append(synonym)
+                keywords[keywords.index(current)] = dict(current, synonyms=known)
+            if self.writes != writes:
+                self.graph().add("entities", dict(entity, keywords=keywords))
+            self._count(writes)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _count(self, writes) -> None:
+        if self.writes == writes:
+            self.skipped += 1
@@ -0,0 +1,625 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .local_index import _label
+from .wit import WIT_API_VERSION
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# predicted or labeled intent of utterances without one
+NO_INTENT = "(none)"
+
+# utterances read, sent and scored at a time
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("evaluation requires numpy: pip install wit[evaluation]")
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def read_dataset(dataset):
+    """
+    Reads labeled utterances in the `Wit.train` format, with an optional
+    "context", from a JSONL path or file, or passes an iterable of dicts
+    through.
+    """
+    if isinstance(dataset, (str, os.PathLike)):
+        with open(dataset, encoding="utf-8") as f:
+            yield from read_dataset(f)
+        return
+    for line in dataset:
+        if isinstance(line, dict):
+            yield line
+        elif line.strip():
+            yield json.loads(line)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def message_key(text, context=None):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([text, context, WIT_API_VERSION], sort_keys=True).encode())
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite store of /message responses and their latency, per app version,
+    so evaluation runs only send the utterances they have not seen yet.
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, path=":memory:") -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (version TEXT NOT NULL,"
+            " key TEXT NOT NULL, response TEXT NOT NULL, seconds REAL NOT NULL,"
+            " PRIMARY KEY (version, key))"
+        )
+        self._db.commit()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def get_many(self, version, keys):
+        """
+        :return: {key: (response, seconds)} for the keys that are cached
+        """
+        found = {}
+        keys = list(set(keys))
+        with self._lock:
+            # stays below SQLite's limit on query parameters
+            for i in range(0, len(keys), 500):
+                part = keys[i : i + 500]
+                rows = self._db.execute(
+                    "SELECT key, response, seconds FROM responses WHERE version = ?"
+                    " AND key IN (%s)" % ",".join("?" * len(part)),
+                    [version] + part,
+                )
+                for key, response, seconds in rows:
+                    found[key] = (json.loads(response), seconds)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def put_many(self, version, items) -> None:
+        """
+        :param items: (key, response, seconds) tuples
+        """
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                [(version, k, json.dumps(r), s) for k, r, s in items],
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def fetch_responses(client, chunk, executor, tag=None, version=None, cache=None):
+    """
+    Sends the utterances of `chunk` to `client.message`, answering from
+    `cache` under `version` (defaulting to `tag`) where possible.
+
+    :return: a list of (response or None, seconds, error or None, cached)
+    """
+    version = version if version is not None else tag
+    if version is None:
+        cache = None
+    # tagged calls always reach the API; otherwise the client's local index
+    # or circuit breaker fallback may answer, which is not worth keeping
+    store = tag is not None or (
+        getattr(client, "local_index", None) is None
+        and getattr(client, "fallback", None) is None
+    )
+    keys = [message_key(u["text"], u.get("context")) for u in chunk]
+    cached = cache.get_many(version, keys) if cache is not None else {}
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def send(utterance):
+        start = time.time()
+        try:
+            resp = client.message(utterance["text"], utterance.get("context"), tag=tag)
+            return resp, time.time() - start, None, False
+        except Exception as e:
+            return None, time.time() - start, str(e), False
+
+    # identical utterances in a chunk are sent once
+    missing = {}
+    for key, utterance in zip(keys, chunk):
+        if key not in cached and key not in missing:
+            missing[key] = executor.submit(send, utterance)
+    fetched = {key: future.result() for key, future in missing.items()}
+    if cache is not None and store:
+        cache.put_many(
+            version,
+            [(k, r[0], r[1]) for k, r in fetched.items() if r[2] is None],
+        )
+    results = []
+    for key in keys:
+        if key in cached:
+            resp, seconds = cached[key]
+            results.append((resp, seconds, None, True))
+        else:
+            results.append(fetched[key])
+    return results
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def predicted_intent(resp):
+    intents = resp.get("intents") or []
+    if not intents:
+        return NO_INTENT, 0.0
+    return intents[0]["name"], float(intents[0].get("confidence", 0.0))
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def predicted_spans(resp):
+    spans = []
+    for values in (resp.get("entities") or {}).values():
+        for e in values:
+            name = e["name"]
+            spans.append((name, e.get("role") or name, e["start"], e["end"]))
+    return spans
+
+
+class _Vocabulary:
+    """
+    Names numbered in order of appearance.
+    """
+
+    def __init__(self) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.index = {}
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def ids(self, names):
+        index = self.index
+        return np.array(
+            [index.setdefault(n, len(index)) for n in names], dtype=np.int64
+        )
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def names(self):
+        return list(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _grow(counts, size):
+    # pads a vector or square matrix of counts with zeros up to `size`
+    pad = size - counts.shape[0]
+    if pad <= 0:
+        return counts
+    return np.pad(counts, [(0, pad)] * counts.ndim)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _ratio(num, den):
+    return np.divide(
+        num, den, out=np.zeros(np.shape(num), dtype=np.float64), where=den > 0
+    )
+
+
+class Metrics:
+    """
+    Streaming accumulator of intent, entity, calibration and latency
+    metrics. Each `update` scores a chunk of utterances with array
+    operations; memory grows with the number of intents and entities, plus
+    one float per utterance for latency percentiles.
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, bins=10) -> None:
+        _require_numpy()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.bins = bins
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.intents = _Vocabulary()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.entities = _Vocabulary()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._spans = _Vocabulary()
+        # rows: labeled intent, columns: predicted intent
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.confusion = np.zeros((0, 0), dtype=np.int64)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._bin_count = np.zeros(bins, dtype=np.int64)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._bin_confidence = np.zeros(bins)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._bin_correct = np.zeros(bins)
+        # per entity: labeled spans, predicted spans, matching spans
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._entity_counts = np.zeros((3, 0), dtype=np.int64)
+        self.exact_entities = 0
+        self.count = 0
+        self.errors = 0
+        self.cached = 0
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._seconds = []
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def update(self, utterances, results) -> None:
+        """
+        :param utterances: labeled utterances
+        :param results: their `fetch_responses` results
+        """
+        ok = [(u, r) for u, r in zip(utterances, results) if r[0] is not None]
+        self.errors += len(results) - len(ok)
+        if not ok:
+            return
+        n = len(ok)
+        self.count += n
+        labels = [_label(u) for u, _ in ok]
+        predicted = [predicted_intent(r[0]) for _, r in ok]
+        self.cached += sum(1 for _, r in ok if r[3])
+        # cached responses keep the latency measured when they were fetched
+        self._seconds.append(np.array([r[1] for _, r in ok]))
+
+        gold = self.intents.ids([label[0] or NO_INTENT for label in labels])
+        pred = self.intents.ids([p[0] for p in predicted])
+        self.confusion = _grow(self.confusion, len(self.intents))
+        np.add.at(self.confusion, (gold, pred), 1)
+
+        confidence = np.clip(np.array([p[1] for p in predicted]), 0.0, 1.0)
+        correct = (gold == pred).astype(np.float64)
+        bin_ids = np.minimum((confidence * self.bins).astype(np.int64), self.bins - 1)
+        self._bin_count += np.bincount(bin_ids, minlength=self.bins)
+        self._bin_confidence += np.bincount(
+            bin_ids, weights=confidence, minlength=self.bins
+        )
+        self._bin_correct += np.bincount(bin_ids, weights=correct, minlength=self.bins)
+
+        # spans as (utterance, span id) pairs packed into one integer
+        gold_spans = [
+            (i, (e[0], e[1], e[3], e[4]))
+            for i, label in enumerate(labels)
+            for e in label[1]
+        ]
+        pred_spans = [
+            (i, span) for i, (_, r) in enumerate(ok) for span in predicted_spans(r[0])
+        ]
+        gold_utt = np.array([i for i, _ in gold_spans], dtype=np.int64)
+        pred_utt = np.array([i for i, _ in pred_spans], dtype=np.int64)
+        gold_keys = gold_utt << 32 | self._spans.ids([s for _, s in gold_spans])
+        pred_keys = pred_utt << 32 | self._spans.ids([s for _, s in pred_spans])
+        matched = np.isin(gold_keys, pred_keys)
+        gold_entity = self.entities.ids([s[0] for _, s in gold_spans])
+        pred_entity = self.entities.ids([s[0] for _, s in pred_spans])
+        size = len(self.entities)
+        self._entity_counts = np.pad(
+            self._entity_counts, [(0, 0), (0, size - self._entity_counts.shape[1])]
+        )
+        self._entity_counts += np.stack(
+            [
+                np.bincount(gold_entity, minlength=size),
+                np.bincount(pred_entity, minlength=size),
+                np.bincount(gold_entity[matched], minlength=size),
+            ]
+        )
+        gold_count = np.bincount(gold_utt, minlength=n)
+        pred_count = np.bincount(pred_utt, minlength=n)
+        match_count = np.bincount(gold_utt[matched], minlength=n)
+        self.exact_entities += int(
+            np.sum((match_count == gold_count) & (pred_count == gold_count))
+        )
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def intent_scores(self):
+        """
+        :return: precision, recall, F1 and support arrays, in the order of
+            `intents.names()`
+        """
+        tp = np.diag(self.confusion).astype(np.float64)
+        support = self.confusion.sum(axis=1)
+        precision = _ratio(tp, self.confusion.sum(axis=0))
+        recall = _ratio(tp, support)
+        f1 = _ratio(2 * precision * recall, precision + recall)
+        return precision, recall, f1, support
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def report(self):
+        """
+        :return: a JSON-serializable summary
+        """
+        precision, recall, f1, support = self.intent_scores()
+        names = self.intents.names()
+        labeled = support > 0
+        gold, pred, tp = self._entity_counts
+        entity_precision = _ratio(tp, pred)
+        entity_recall = _ratio(tp, gold)
+        total_tp, total_pred, total_gold = tp.sum(), pred.sum(), gold.sum()
+        micro_p = total_tp / total_pred if total_pred else 0.0
+        micro_r = total_tp / total_gold if total_gold else 0.0
+        bin_accuracy = _ratio(self._bin_correct, self._bin_count)
+        bin_confidence = _ratio(self._bin_confidence, self._bin_count)
+        seconds = np.concatenate(self._seconds) if self._seconds else np.zeros(0)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "cached": self.cached,
+            "accuracy": float(np.trace(self.confusion) / max(self.count, 1)),
+            "macro_f1": float(f1[labeled].mean()) if labeled.any() else 0.0,
+            "intents": {
+                name: {
+                    "precision": float(precision[i]),
+                    "recall": float(recall[i]),
+                    "f1": float(f1[i]),
+                    "support": int(support[i]),
+                }
+                for i, name in enumerate(names)
+            },
+            "confusion": {"labels": names, "matrix": self.confusion.tolist()},
+            "entities": {
+                "precision": float(micro_p),
+                "recall": float(micro_r),
+                "f1": float(
+                    2 * micro_p * micro_r / (micro_p + micro_r)
+                    if micro_p + micro_r
+                    else 0.0
+                ),
+                "exact_match": self.exact_entities / max(self.count, 1),
+                "by_entity": {
+                    name: {
+                        "precision": float(entity_precision[i]),
+                        "recall": float(entity_recall[i]),
+                        "support": int(gold[i]),
+                    }
+                    for i, name in enumerate(self.entities.names())
+                },
+            },
+            "calibration": {
+                "bins": [
+                    {
+                        "confidence": float(bin_confidence[b]),
+                        "accuracy": float(bin_accuracy[b]),
+                        "count": int(self._bin_count[b]),
+                    }
+                    for b in range(self.bins)
+                ],
+                "ece": float(
+                    np.sum(self._bin_count * np.abs(bin_accuracy - bin_confidence))
+                    / max(self.count, 1)
+                ),
+            },
+            "latency": {
+                "requests": int(seconds.size),
+                "mean": float(seconds.mean()) if seconds.size else None,
+                "p50": float(np.percentile(seconds, 50)) if seconds.size else None,
+                "p90": float(np.percentile(seconds, 90)) if seconds.size else None,
+                "p99": float(np.percentile(seconds, 99)) if seconds.size else None,
+            },
+        }
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def chunks(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# pyre-fixme[3]: Return type must be annotated.
+def evaluate(
+    # pyre-fixme[2]: Parameter must be annotated.
+    client,
+    # pyre-fixme[2]: Parameter must be annotated.
+    dataset,
+    # pyre-fixme[2]: Parameter must be annotated.
+    tag=None,
+    # pyre-fixme[2]: Parameter must be annotated.
+    version=None,
+    # pyre-fixme[2]: Parameter must be annotated.
+    cache=None,
+    # pyre-fixme[2]: Parameter must be annotated.
+    concurrency=8,
+    # pyre-fixme[2]: Parameter must be annotated.
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    # pyre-fixme[2]: Parameter must be annotated.
+    bins=10,
+):
+    """
+    Sends a labeled dataset through `client.message` and scores the
+    predictions: per-intent precision, recall and F1, the confusion matrix,
+    entity span precision and recall, the share of utterances with exactly
+    the labeled spans, a confidence calibration curve with its expected
+    calibration error, and request latency.
+
+    :param dataset: JSONL path or file, or an iterable of utterances in the
+        `Wit.train` format, read `chunk_size` at a time
+    :param tag: app version to query, see `Wit.message`
+    :param version: name of the responses in `cache`; defaults to `tag`.
+        Without either, responses are not cached, as the current model
+        changes with training
+    :param cache: optional ResponseCache
+    :return: the `Metrics.report()` summary
+    """
+    _require_numpy()
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    metrics = Metrics(bins)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for chunk in chunks(read_dataset(dataset), chunk_size):
+            results = fetch_responses(client, chunk, executor, tag, version, cache)
+            metrics.update(chunk, results)
+    return metrics.report()
+
+
+# an app version to compare: `tag` of the app of `client` (by default the
+# client given to `compare`), cached as `version`
+# pyre-fixme[5]: Global expression must be annotated.
+Target = namedtuple("Target", ["tag", "client", "version"], defaults=[None, None])
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _deltas(baseline, candidate):
+    # candidate minus baseline for each score of `baseline` and `candidate`
+    return {
+        k: candidate[k] - baseline[k]
+        for k in baseline
+        if candidate[k] is not None and baseline[k] is not None
+    }
+
+
+# pyre-fixme[3]: Return type must be annotated.
+def compare(
+    # pyre-fixme[2]: Parameter must be annotated.
+    client,
+    # pyre-fixme[2]: Parameter must be annotated.
+    dataset,
+    # pyre-fixme[2]: Parameter must be annotated.
+    baseline,
+    # pyre-fixme[2]: Parameter must be annotated.
+    candidate,
+    # pyre-fixme[2]: Parameter must be annotated.
+    cache=None,
+    # pyre-fixme[2]: Parameter must be annotated.
+    concurrency=8,
+    # pyre-fixme[2]: Parameter must be annotated.
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    # pyre-fixme[2]: Parameter must be annotated.
+    max_examples=100,
+):
+    """
+    Replays a labeled dataset against two app versions concurrently and
+    reports where they disagree.
+
+    :param baseline: a tag of the app of `client`, or a `Target` to query
+        another app or name the responses in `cache`. Versions of different
+        apps need distinct cache names
+    :param candidate: same, for the version under test
+    :param cache: optional ResponseCache; a baseline shared by many
+        comparisons is fetched once
+    :return: the `evaluate` reports of both versions under "baseline" and
+        "candidate", the number of utterances whose predicted intent
+        differs ("disagreements"), of which "fixed" (now right) and
+        "regressed" (now wrong), up to `max_examples` of them under
+        "examples", and candidate minus baseline scores per intent, for
+        accuracy, macro F1, entity F1 and latency
+    """
+    _require_numpy()
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    targets = [
+        (
+            t._replace(client=t.client or client)
+            if isinstance(t, Target)
+            else Target(t, client)
+        )
+        for t in (baseline, candidate)
+    ]
+    metrics = [Metrics(), Metrics()]
+    counts = {"disagreements": 0, "fixed": 0, "regressed": 0}
+    examples = []
+    # requests of both versions share the `concurrency` workers
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        with ThreadPoolExecutor(max_workers=2) as sides:
+            for chunk in chunks(read_dataset(dataset), chunk_size):
+                futures = [
+                    sides.submit(
+                        fetch_responses,
+                        t.client,
+                        chunk,
+                        executor,
+                        t.tag,
+                        t.version,
+                        cache,
+                    )
+                    for t in targets
+                ]
+                results = [f.result() for f in futures]
+                for m, r in zip(metrics, results):
+                    m.update(chunk, r)
+                _disagreements(chunk, results, counts, examples, max_examples)
+    base, cand = [m.report() for m in metrics]
+    intents = {}
+    for name in list(dict.fromkeys(list(base["intents"]) + list(cand["intents"]))):
+        empty = {"precision": 0.0, "recall": 0.0, "f1": 0.0, "support": 0}
+        b = base["intents"].get(name, empty)
+        c = cand["intents"].get(name, empty)
+        intents[name] = dict(_deltas(b, c), support=max(b["support"], c["support"]))
+    return dict(
+        counts,
+        baseline=base,
+        candidate=cand,
+        examples=examples,
+        # largest regressions first
+        intents=dict(sorted(intents.items(), key=lambda item: item[1]["f1"])),
+        accuracy=cand["accuracy"] - base["accuracy"],
+        macro_f1=cand["macro_f1"] - base["macro_f1"],
+        entity_f1=cand["entities"]["f1"] - base["entities"]["f1"],
+        latency=_deltas(base["latency"], cand["latency"]),
+    )
+
+
+# pyre-fixme[2]: Parameter must be annotated.
+def _disagreements(chunk, results, counts, examples, max_examples) -> None:
+    base, cand = [
+        np.array(
+            [predicted_intent(r[0]) if r[0] is not None else (None, 0.0) for r in side],
+            dtype=object,
+        )
+        for side in results
+    ]
+    gold = np.array([_label(u)[0] or NO_INTENT for u in chunk], dtype=object)
+    answered = np.array(
+        [a[0] is not None and b[0] is not None for a, b in zip(*results)]
+    )
+    differ = answered & (base[:, 0] != cand[:, 0])
+    fixed = differ & (cand[:, 0] == gold)
+    regressed = differ & (base[:, 0] == gold)
+    counts["disagreements"] += int(differ.sum())
+    counts["fixed"] += int(fixed.sum())
+    counts["regressed"] += int(regressed.sum())
+    for i in np.flatnonzero(differ)[: max(0, max_examples - len(examples))]:
+        examples.append(
+            {
+                "text": chunk[i]["text"],
+                "expected": gold[i],
+                "baseline": base[i, 0],
+                "baseline_confidence": base[i, 1],
+                "candidate": cand[i, 0],
+                "candidate_confidence": cand[i, 1],
+            }
+        )
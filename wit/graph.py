@@ -0,0 +1,136 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# pyre-fixme[5]: Global expression must be annotated.
+FetchFailure = namedtuple("FetchFailure", ["kind", "name", "error"])
+
+# kind -> (list method, info method) on the Wit client
+GRAPH_ENDPOINTS = {
+    "intents": ("intent_list", "intent_info"),
+    "entities": ("entity_list", "entity_info"),
+    "traits": ("trait_list", "trait_info"),
+}
+
+
+class AppGraph:
+    """
+    In-memory snapshot of an app's intents, entities and traits, indexed by
+    name and by id. Items whose detail call failed are listed in `errors`.
+    """
+
+    def __init__(self) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.intents = {}
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.entities = {}
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.traits = {}
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.by_id = {}
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.errors = []
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.stats = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def get(self, kind, name, default=None):
+        """
+        Returns the detail object for `name` in `kind` ("intents", "entities"
+        or "traits"), or `default` when it is unknown.
+        """
+        return getattr(self, kind).get(name, default)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def add(self, kind, info) -> None:
+        getattr(self, kind)[info["name"]] = info
+        if info.get("id") is not None:
+            self.by_id[info["id"]] = info
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _timed(fn, *args, **kwargs):
+    start = time.time()
+    try:
+        return fn(*args, **kwargs), None, time.time() - start
+    except Exception as e:
+        return None, e, time.time() - start
+
+
+# pyre-fixme[2]: Parameter must be annotated.
+def build_app_graph(client, concurrency=8, headers=None, verbose=None) -> AppGraph:
+    """
+    Fetches every list endpoint, then every detail endpoint, with at most
+    `concurrency` requests in flight. Failed calls are recorded in
+    `AppGraph.errors` instead of aborting the whole fetch.
+
+    :param client: a Wit client
+    :param concurrency: maximum number of concurrent requests
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    graph = AppGraph()
+    latencies = []
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        lists = {
+            kind: executor.submit(
+                _timed, getattr(client, list_meth), headers=headers, verbose=verbose
+            )
+            for kind, (list_meth, _) in GRAPH_ENDPOINTS.items()
+        }
+        details = []
+        for kind, future in lists.items():
+            items, error, elapsed = future.result()
+            latencies.append(elapsed)
+            if error is not None:
+                graph.errors.append(FetchFailure(kind, None, error))
+                continue
+            info_meth = getattr(client, GRAPH_ENDPOINTS[kind][1])
+            for item in items:
+                details.append(
+                    (
+                        kind,
+                        item["name"],
+                        executor.submit(
+                            _timed,
+                            info_meth,
+                            item["name"],
+                            headers=headers,
+                            verbose=verbose,
+                        ),
+                    )
+                )
+        list_seconds = time.time() - start
+        for kind, name, future in details:
+            info, error, elapsed = future.result()
+            latencies.append(elapsed)
+            if error is not None:
+                graph.errors.append(FetchFailure(kind, name, error))
+            else:
+                graph.add(kind, info)
+    total_seconds = time.time() - start
+    latencies.sort()
+    graph.stats = {
+        "requests": len(latencies),
+        "failures": len(graph.errors),
+        "concurrency": concurrency,
+        "list_seconds": list_seconds,
+        "detail_seconds": total_seconds - list_seconds,
+        "total_seconds": total_seconds,
+        "max_request_seconds": latencies[-1] if latencies else 0.0,
+        "sum_request_seconds": sum(latencies),
+    }
+    return graph
@@ -0,0 +1,135 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class Hedger:
+    """
+    Request hedging for idempotent calls. When a call has not answered after
+    the hedge delay, a duplicate is sent and whichever answers first wins.
+    The delay is either fixed or the observed `percentile` latency, and the
+    share of hedged calls is capped by `budget`.
+
+    A duplicate that has not started yet is cancelled. One already on the
+    wire cannot be interrupted by `requests`, so its response is discarded.
+    """
+
+    def __init__(
+        self,
+        # pyre-fixme[2]: Parameter must be annotated.
+        delay=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        percentile=0.95,
+        # pyre-fixme[2]: Parameter must be annotated.
+        budget=0.05,
+        # pyre-fixme[2]: Parameter must be annotated.
+        min_samples=20,
+        # pyre-fixme[2]: Parameter must be annotated.
+        window_size=1000,
+        # pyre-fixme[2]: Parameter must be annotated.
+        max_workers=32,
+    ) -> None:
+        """
+        :param delay: fixed hedge delay in seconds; defaults to the observed
+            `percentile` latency once `min_samples` calls completed
+        :param budget: maximum share of calls that may be hedged
+        :param window_size: number of recent latencies kept
+        :param max_workers: threads used to run primary and hedged calls
+        """
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.delay = delay
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.percentile = percentile
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.budget = budget
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.min_samples = min_samples
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._latencies = deque(maxlen=window_size)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="wit-hedge"
+        )
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def hedge_delay(self):
+        """
+        Current hedge delay in seconds, or None while there are too few
+        samples to estimate it.
+        """
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(self.percentile * len(latencies)))
+        return latencies[index]
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+            }
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _timed(self, fn):
+        start = time.time()
+        result = fn()
+        with self._lock:
+            self._latencies.append(time.time() - start)
+        return result
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def call(self, fn):
+        """
+        Runs `fn()`, hedging it if it is slower than the hedge delay.
+        """
+        with self._lock:
+            self.calls += 1
+        delay = self.hedge_delay()
+        if delay is None:
+            return self._timed(fn)
+        primary = self._executor.submit(self._timed, fn)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_budget():
+            return primary.result()
+        hedge = self._executor.submit(self._timed, fn)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+        raise error
@@ -0,0 +1,197 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import hashlib
+import json
+import unicodedata
+import zipfile
+
+DEFAULT_PAGE_SIZE = 1000
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def normalize_text(text):
+    """
+    Normalization used for exact matching: NFKC, case folding and collapsed
+    whitespace.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _key(text):
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=8).digest()
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _label(utterance):
+    """
+    Compact, hashable form of an utterance's labels. Accepts both the
+    /utterances GET format and the `Wit.train` / export format.
+    """
+    intent = utterance.get("intent")
+    if isinstance(intent, dict):
+        intent = intent.get("name")
+    entities = []
+    for entity in utterance.get("entities") or []:
+        if "entity" in entity:
+            name, _, role = entity["entity"].partition(":")
+        else:
+            name, role = entity["name"], entity.get("role")
+        entities.append(
+            (name, role or name, entity["body"], entity["start"], entity["end"])
+        )
+    traits = []
+    for trait in utterance.get("traits") or []:
+        traits.append((trait.get("trait") or trait.get("name"), trait["value"]))
+    return (intent, tuple(entities), tuple(traits))
+
+
+class UtteranceIndex:
+    """
+    Local exact-match index of training utterances. Maps the normalized text
+    of each utterance to its labeled intent, entities and traits, so that
+    `Wit.message` can answer verbatim training phrases without a request.
+
+    Keys are 8-byte digests of the normalized text and identical label sets
+    are shared, which keeps the index small for hundreds of thousands of
+    utterances.
+    """
+
+    def __init__(self) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._entries = {}
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._labels = {}
+        # number of utterances already read through `refresh`
+        self.fetched = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __contains__(self, text) -> bool:
+        return _key(text) in self._entries
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def add(self, utterances) -> None:
+        """
+        Adds or replaces utterances, in /utterances or `train` format.
+        """
+        for utterance in utterances:
+            label = _label(utterance)
+            self._entries[_key(utterance["text"])] = self._labels.setdefault(
+                label, label
+            )
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def remove(self, texts) -> None:
+        for text in texts:
+            self._entries.pop(_key(text), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._labels.clear()
+        self.fetched = 0
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def refresh(self, client, page_size=DEFAULT_PAGE_SIZE, full=False) -> int:
+        """
+        Pages through `client.get_utterances`. Only pages past the utterances
+        already read are fetched, unless `full` is set.
+
+        :param client: a Wit client
+        :return: the number of utterances read
+        """
+        if full:
+            self.clear()
+        read = 0
+        while True:
+            page = client.get_utterances(page_size, offset=self.fetched)
+            self.add(page)
+            self.fetched += len(page)
+            read += len(page)
+            if len(page) < page_size:
+                return read
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def add_export(self, zip_file) -> None:
+        """
+        Adds the utterances of an app export (the ZIP file behind the URL
+        returned by `Wit.export`).
+
+        :param zip_file: path or file object of the export ZIP
+        """
+        with zipfile.ZipFile(zip_file) as archive:
+            for name in archive.namelist():
+                if "utterances" in name and name.endswith(".json"):
+                    data = json.loads(archive.read(name).decode("utf-8"))
+                    if isinstance(data, dict):
+                        data = data.get("utterances", [])
+                    self.add(data)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def lookup(self, text):
+        """
+        Returns a /message shaped response marked with `"local": True`, or
+        None when `text` is not a known utterance.
+        """
+        label = self._entries.get(_key(text)) if text else None
+        if label is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        intent, entities, traits = label
+        resp = {
+            "text": text,
+            "intents": [],
+            "entities": {},
+            "traits": {},
+            "local": True,
+        }
+        if intent:
+            resp["intents"].append({"name": intent, "confidence": 1.0})
+        folded = text.casefold()
+        for name, role, body, start, end in entities:
+            start, end = _relocate(text, folded, body, start, end)
+            resp["entities"].setdefault(name + ":" + role, []).append(
+                {
+                    "name": name,
+                    "role": role,
+                    "body": text[start:end],
+                    "start": start,
+                    "end": end,
+                    "value": body,
+                    "confidence": 1.0,
+                    "entities": [],
+                }
+            )
+        for name, value in traits:
+            resp["traits"].setdefault(name, []).append(
+                {"value": value, "confidence": 1.0}
+            )
+        return resp
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _relocate(text, folded, body, start, end):
+    """
+    Maps a trained entity span onto `text`, which may differ from the trained
+    utterance in case and whitespace.
+    """
+    if text[start:end].casefold() == body.casefold():
+        return start, end
+    pos = folded.find(body.casefold())
+    if pos >= 0 and len(folded) == len(text):
+        return pos, pos + len(body)
+    return start, end
@@ -0,0 +1,242 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import unicodedata
+from collections import deque, namedtuple
+
+# pyre-fixme[5]: Global expression must be annotated.
+KeywordMatch = namedtuple(
+    "KeywordMatch", ["entity", "value", "body", "start", "end", "synonym"]
+)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def _fold_char(ch, fold_case, fold_diacritics):
+    if fold_diacritics:
+        ch = "".join(
+            c for c in unicodedata.normalize("NFD", ch) if not unicodedata.combining(c)
+        )
+    if fold_case:
+        ch = ch.casefold()
+    return ch
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over the keywords and synonyms of keyword entities.
+    Finds every occurrence in a message in a single pass over the text, and
+    maps each one back to its entity and canonical keyword value.
+
+    Build it from `entity_info` responses (or the entity files of an export):
+
+        matcher = KeywordMatcher.from_entities([client.entity_info("category")])
+        matcher.find_all("show me red shoes")
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, fold_case=True, fold_diacritics=False, whole_words=True):
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.fold_case = fold_case
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.fold_diacritics = fold_diacritics
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.whole_words = whole_words
+        # (folded length, entity, canonical value, synonym)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._patterns = []
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._goto = [{}]
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._out = [[]]
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._fail = [0]
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._dict_link = [0]
+        self._compiled = True
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    @classmethod
+    def from_entities(cls, entities, **kwargs):
+        """
+        Compiles a matcher from an iterable of entity objects, as returned by
+        `Wit.entity_info` or found in an app export.
+        """
+        matcher = cls(**kwargs)
+        for entity in entities:
+            matcher.add_entity(entity)
+        matcher.compile()
+        return matcher
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    @classmethod
+    def from_app_graph(cls, graph, **kwargs):
+        """
+        Compiles a matcher from every keyword entity of an AppGraph.
+        """
+        return cls.from_entities(graph.entities.values(), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _fold(self, text):
+        return "".join(
+            _fold_char(ch, self.fold_case, self.fold_diacritics) for ch in text
+        )
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def add_entity(self, entity) -> None:
+        """
+        Adds the keywords and synonyms of a keyword entity.
+
+        :param entity: entity object with a `name` and a list of `keywords`
+        """
+        for keyword in entity.get("keywords") or []:
+            value = keyword["keyword"]
+            self.add(value, entity["name"], value)
+            for synonym in keyword.get("synonyms") or []:
+                if synonym != value:
+                    self.add(synonym, entity["name"], value)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def add(self, term, entity, value) -> None:
+        """
+        Adds a single term that resolves to `value` of `entity`.
+        """
+        folded = self._fold(term)
+        if not folded:
+            return
+        state = 0
+        for ch in folded:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._out.append([])
+                self._fail.append(0)
+                self._dict_link.append(0)
+            state = nxt
+        self._out[state].append(len(self._patterns))
+        self._patterns.append((len(folded), entity, value, term))
+        self._compiled = False
+
+    def compile(self) -> None:
+        """
+        Computes the failure links. Called lazily by the match methods.
+        """
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            self._dict_link[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = fail
+                self._dict_link[nxt] = (
+                    fail if self._out[fail] else self._dict_link[fail]
+                )
+                queue.append(nxt)
+        self._compiled = True
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def find_all(self, text):
+        """
+        Returns every keyword or synonym occurrence in `text` as KeywordMatch
+        tuples, ordered by end offset. Offsets refer to the original text.
+        """
+        if not self._compiled:
+            self.compile()
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        # offsets[i] is the index in `text` of the i-th folded character
+        offsets = []
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            for fch in _fold_char(ch, self.fold_case, self.fold_diacritics):
+                offsets.append(i)
+                while state and fch not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(fch, 0)
+                hit = state if out[state] else dict_link[state]
+                while hit:
+                    for pid in out[hit]:
+                        length, entity, value, synonym = self._patterns[pid]
+                        start = offsets[len(offsets) - length]
+                        matches.append((start, i + 1, entity, value, synonym))
+                    hit = dict_link[hit]
+        result = []
+        for start, end, entity, value, synonym in matches:
+            if self.whole_words and not _on_word_boundary(text, start, end):
+                continue
+            result.append(
+                KeywordMatch(entity, value, text[start:end], start, end, synonym)
+            )
+        return result
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def find_longest(self, text):
+        """
+        Like `find_all`, but keeps only leftmost-longest non-overlapping matches.
+        """
+        chosen = []
+        last_end = 0
+        for m in sorted(self.find_all(text), key=lambda m: (m.start, m.start - m.end)):
+            if m.start >= last_end:
+                chosen.append(m)
+                last_end = m.end
+        return chosen
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def contains(self, text, entity=None) -> bool:
+        """
+        Pre-filter: whether `text` mentions any known keyword (of `entity`).
+        """
+        return any(entity is None or m.entity == entity for m in self.find_all(text))
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def message(self, text):
+        """
+        Local fallback for `Wit.message`: returns a /message shaped response
+        containing only the keyword entities found in `text`.
+        """
+        entities = {}
+        for m in self.find_longest(text):
+            entities.setdefault(m.entity + ":" + m.entity, []).append(
+                {
+                    "name": m.entity,
+                    "role": m.entity,
+                    "body": m.body,
+                    "start": m.start,
+                    "end": m.end,
+                    "value": m.value,
+                    "confidence": 1.0,
+                    "entities": [],
+                    "type": "value",
+                }
+            )
+        return {"text": text, "intents": [], "entities": entities, "traits": {}}
+
+
+# pyre-fixme[2]: Parameter must be annotated.
+def _on_word_boundary(text, start, end) -> bool:
+    if start > 0 and text[start - 1].isalnum() and text[start].isalnum():
+        return False
+    if end < len(text) and text[end].isalnum() and text[end - 1].isalnum():
+        return False
+    return True
@@ -0,0 +1,356 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import functools
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from .wit import CircuitOpenError, is_unhealthy_error
+
+# Wit methods the outbox accepts
+WRITE_METHODS = frozenset(
+    [
+        "train",
+        "delete_utterances",
+        "create_intent",
+        "delete_intent",
+        "create_entity",
+        "update_entity",
+        "delete_entity",
+        "delete_role",
+        "add_keyword_value",
+        "delete_keyword",
+        "create_synonym",
+        "delete_synonym",
+        "create_trait",
+        "create_trait_value",
+        "delete_trait",
+        "delete_trait_value",
+    ]
+)
+
+# methods taking a list as first argument: consecutive calls are merged
+BATCHED_METHODS = frozenset(["train", "delete_utterances"])
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ops (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op_id TEXT NOT NULL UNIQUE,
+    method TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created REAL NOT NULL,
+    finished REAL
+)
+"""
+
+
+class Outbox:
+    """
+    Durable queue of write calls. `submit` (or the Wit method of the same
+    name, e.g. `outbox.train(...)`) journals the call to a SQLite database
+    and returns at once; `start` drains it in the background, in submission
+    order. Pending calls survive restarts and are sent when the next Outbox
+    on the same database starts.
+
+    Consecutive `train` and `delete_utterances` calls are sent as one call of
+    up to `batch_size` utterances. A 429, a 5xx or a network error is
+    retried with exponential backoff, holding back the calls queued after it;
+    any other error marks the call failed and moves on.
+
+    Each call has an operation id. Submitting an id again is a no-op, and a
+    call is marked done once, in the same transaction for all the calls of a
+    batch. A crash between the response and that commit resends the call.
+    """
+
+    def __init__(
+        self,
+        # pyre-fixme[2]: Parameter must be annotated.
+        client,
+        # pyre-fixme[2]: Parameter must be annotated.
+        path,
+        # pyre-fixme[2]: Parameter must be annotated.
+        batch_size=200,
+        # pyre-fixme[2]: Parameter must be annotated.
+        min_backoff=1.0,
+        # pyre-fixme[2]: Parameter must be annotated.
+        max_backoff=60.0,
+        # pyre-fixme[2]: Parameter must be annotated.
+        logger=None,
+    ) -> None:
+        """
+        :param client: the Wit client sending the calls
+        :param path: SQLite database file, created if needed
+        """
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.client = client
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.batch_size = batch_size
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.min_backoff = min_backoff
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.max_backoff = max_backoff
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.logger = logger or logging.getLogger(__name__)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # commits append to the write-ahead log without waiting for fsync
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+        # one drain at a time, so a call is never sent twice concurrently
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._draining = threading.Lock()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._wake = threading.Event()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._stopped = threading.Event()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._idle = threading.Condition()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._thread = None
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def submit(self, method, *args, **kwargs):
+        """
+        Journals `client.<method>(*args, **kwargs)`.
+
+        :param op_id: optional operation id, e.g. derived from the caller's
+            own request id; defaults to a random one
+        :return: the operation id
+        """
+        if method not in WRITE_METHODS:
+            raise ValueError("not a write method: " + repr(method))
+        op_id = kwargs.pop("op_id", None) or uuid.uuid4().hex
+        payload = json.dumps({"args": args, "kwargs": kwargs})
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO ops (op_id, method, payload, status, created)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (op_id, method, payload, PENDING, time.time()),
+            )
+            self._db.commit()
+        self._wake.set()
+        return op_id
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __getattr__(self, name):
+        if name not in WRITE_METHODS:
+            raise AttributeError(name)
+        return functools.partial(self.submit, name)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def status(self, op_id):
+        """
+        :return: `{"status", "attempts", "error"}` of an operation, or None
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, attempts, error FROM ops WHERE op_id = ?", (op_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "attempts": row[1], "error": row[2]}
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM ops WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def _next_batch(self):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, method, payload, attempts FROM ops WHERE status = ?"
+                " ORDER BY seq LIMIT ?",
+                (PENDING, self.batch_size),
+            ).fetchall()
+        if not rows:
+            return []
+        batch = [rows[0]]
+        method, payload = rows[0][1], json.loads(rows[0][2])
+        if method not in BATCHED_METHODS:
+            return batch
+        size = len(payload["args"][0])
+        for row in rows[1:]:
+            other = json.loads(row[2])
+            if (
+                row[1] != method
+                or other["args"][1:] != payload["args"][1:]
+                or other["kwargs"] != payload["kwargs"]
+            ):
+                break
+            size += len(other["args"][0])
+            if size > self.batch_size:
+                break
+            batch.append(row)
+        return batch
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _finish(self, rows, status, error=None) -> None:
+        with self._lock:
+            self._db.executemany(
+                "UPDATE ops SET status = ?, error = ?, attempts = attempts + 1,"
+                " finished = ? WHERE seq = ?",
+                [(status, error, time.time(), row[0]) for row in rows],
+            )
+            self._db.commit()
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _send(self, rows):
+        # returns False when the calls should be retried later
+        method = rows[0][1]
+        payloads = [json.loads(row[2]) for row in rows]
+        args = list(payloads[0]["args"])
+        if len(rows) > 1:
+            args[0] = [item for p in payloads for item in p["args"][0]]
+        try:
+            getattr(self.client, method)(*args, **payloads[0]["kwargs"])
+        except Exception as e:
+            # an open circuit is an outage too: keep the calls for later
+            if isinstance(e, CircuitOpenError) or is_unhealthy_error(e):
+                with self._lock:
+                    self._db.executemany(
+                        "UPDATE ops SET attempts = attempts + 1, error = ?"
+                        " WHERE seq = ?",
+                        [(str(e), row[0]) for row in rows],
+                    )
+                    self._db.commit()
+                self.logger.warning("outbox %s failed, will retry: %s", method, e)
+                return False
+            if len(rows) > 1:
+                # find the offending calls
+                return all(self._send([row]) for row in rows)
+            self.logger.error("outbox %s failed: %s", method, e)
+            self._finish(rows, FAILED, str(e))
+            return True
+        self._finish(rows, DONE)
+        return True
+
+    def drain(self) -> int:
+        """
+        Sends pending calls until there are none left or one needs a retry.
+
+        :return: the number of calls finished
+        """
+        finished = 0
+        with self._draining:
+            while True:
+                rows = self._next_batch()
+                if not rows or not self._send(rows):
+                    break
+                finished += len(rows)
+        if not rows:
+            with self._idle:
+                self._idle.notify_all()
+        return finished
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def _backoff(self):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT attempts FROM ops WHERE status = ? ORDER BY seq LIMIT 1",
+                (PENDING,),
+            ).fetchone()
+        if row is None:
+            return None
+        if row[0] == 0:
+            # submitted during the last drain
+            return 0.0
+        return min(self.max_backoff, self.min_backoff * 2 ** (row[0] - 1))
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.clear()
+            try:
+                self.drain()
+            except Exception:
+                self.logger.exception("outbox drain failed")
+            delay = self._backoff()
+            if delay is None:
+                self._wake.wait()
+            elif delay:
+                self._stopped.wait(delay)
+
+    def start(self) -> None:
+        """
+        Drains the outbox in a background thread, starting with the calls
+        left pending by a previous run.
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def flush(self, timeout=None) -> bool:
+        """
+        Waits until no calls are pending.
+
+        :return: False if calls were still pending after `timeout` seconds
+        """
+        if self._thread is None:
+            self.drain()
+            return self.pending() == 0
+        deadline = None if timeout is None else time.time() + timeout
+        with self._idle:
+            while self.pending():
+                self._wake.set()
+                remaining = 1.0 if deadline is None else deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(min(remaining, 1.0))
+        return True
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def purge(self, older_than) -> None:
+        """
+        Forgets finished calls older than `older_than` seconds; their
+        operation ids can then be submitted again.
+        """
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM ops WHERE status != ? AND finished < ?",
+                (PENDING, time.time() - older_than),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        """
+        Stops the background thread; pending calls stay in the database.
+        """
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._db.close()
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def __enter__(self):
+        return self
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,256 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import hashlib
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .ratelimit import RateLimiter
+from .wit import Wit
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def tenant_id(access_token):
+    """
+    Label identifying a token in metrics without revealing it.
+    """
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()[:12]
+
+
+class TenantMetrics:
+    """
+    Request counters of one tenant of a WitPool.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.seconds = 0.0
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.last_used = time.monotonic()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def record(self, ok, seconds) -> None:
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self.seconds += seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "seconds": self.seconds,
+            "idle_seconds": time.monotonic() - self.last_used,
+        }
+
+
+class MeteredTransport:
+    """
+    Sends through the pool's shared transport and records the tenant's
+    request count, errors and latency.
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, transport, metrics) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.transport = transport
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.metrics = metrics
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def request(self, meth, url, **kwargs):
+        # a client kept by the caller stays in use without going through get()
+        self.metrics.last_used = time.monotonic()
+        start = time.time()
+        try:
+            rsp = self.transport.request(meth, url, **kwargs)
+        except Exception:
+            self.metrics.record(False, time.time() - start)
+            raise
+        self.metrics.record(rsp.status_code < 400, time.time() - start)
+        return rsp
+
+
+# Wit arguments that belong to a single app or token
+PER_TENANT_KWARGS = ("rate_limiter", "local_index")
+
+
+class WitPool:
+    """
+    Wit clients for many access tokens sharing one transport, and so one
+    connection pool. Clients are created on first use, rate limited per
+    token, and evicted when the pool holds more than `max_tenants` or they
+    have been idle for `idle_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        # pyre-fixme[2]: Parameter must be annotated.
+        transport=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        max_tenants=1024,
+        # pyre-fixme[2]: Parameter must be annotated.
+        idle_timeout=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        rate=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        burst=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        max_connections=64,
+        # pyre-fixme[2]: Parameter must be annotated.
+        logger=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        **client_kwargs,
+    ) -> None:
+        """
+        :param transport: shared transport, e.g. an Http2Transport; defaults
+            to a `requests.Session` keeping up to `max_connections` open
+        :param rate: requests per second allowed per token, or None
+        :param client_kwargs: other `Wit` arguments, given as is to every
+            client: a `circuit_breaker`, `scheduler`, `concurrency_limiter`,
+            `single_flight` or `speech_cache` is shared by all tenants.
+            `rate_limiter` and `local_index` are per app and not accepted
+        """
+        if max_tenants < 1:
+            raise ValueError("max_tenants must be at least 1")
+        for name in PER_TENANT_KWARGS:
+            if name in client_kwargs:
+                raise ValueError(
+                    "%s cannot be shared by the clients of a WitPool%s"
+                    % (name, ", use rate=" if name == "rate_limiter" else "")
+                )
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._owned = transport is None
+        if transport is None:
+            transport = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=max_connections)
+            transport.mount("https://", adapter)
+            transport.mount("http://", adapter)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.transport = transport
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.max_tenants = max_tenants
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.idle_timeout = idle_timeout
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.rate = rate
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.burst = burst
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.logger = logger or logging.getLogger(__name__)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.client_kwargs = client_kwargs
+        # access token -> (client, metrics), least recently used first
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._tenants = OrderedDict()
+        # rate limiter and metrics per token, for as long as a client using
+        # them is alive: an evicted client still held by a caller shares
+        # them with the client get() builds next for the same token
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._limiters = weakref.WeakValueDictionary()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._metrics = weakref.WeakValueDictionary()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def get(self, access_token):
+        """
+        Returns the client for `access_token`, creating it if needed.
+        """
+        with self._lock:
+            tenant = self._tenants.get(access_token)
+            if tenant is None:
+                metrics = self._metrics.get(access_token)
+                if metrics is None:
+                    metrics = self._metrics[access_token] = TenantMetrics()
+                limiter = self._limiters.get(access_token)
+                if limiter is None and self.rate:
+                    limiter = RateLimiter(self.rate, self.burst)
+                    self._limiters[access_token] = limiter
+                client = Wit(
+                    access_token,
+                    logger=self.logger,
+                    transport=MeteredTransport(self.transport, metrics),
+                    rate_limiter=limiter,
+                    **self.client_kwargs,
+                )
+                tenant = self._tenants[access_token] = (client, metrics)
+            else:
+                self._tenants.move_to_end(access_token)
+            tenant[1].last_used = time.monotonic()
+            self._evict()
+        return tenant[0]
+
+    __getitem__ = get
+
+    def _evict(self) -> None:
+        # called with the lock held; the most recent tenant is never evicted
+        while len(self._tenants) > self.max_tenants:
+            _, (client, _) = self._tenants.popitem(last=False)
+            client.detach()
+            self.evictions += 1
+        if self.idle_timeout is None:
+            return
+        deadline = time.monotonic() - self.idle_timeout
+        while len(self._tenants) > 1:
+            token, (client, metrics) = next(iter(self._tenants.items()))
+            if metrics.last_used >= deadline:
+                break
+            del self._tenants[token]
+            client.detach()
+            self.evictions += 1
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __contains__(self, access_token) -> bool:
+        return access_token in self._tenants
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def stats(self) -> dict:
+        """
+        Metrics of the current tenants, keyed by `tenant_id(access_token)`.
+        """
+        with self._lock:
+            tenants = list(self._tenants.items())
+        stats = {}
+        for token, (client, metrics) in tenants:
+            entry = metrics.as_dict()
+            limiter = client.rate_limiter
+            entry["throttled_seconds"] = limiter.waited if limiter else 0.0
+            stats[tenant_id(token)] = entry
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            for client, _ in self._tenants.values():
+                client.detach()
+            self._tenants.clear()
+        if self._owned:
+            self.transport.close()
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def __enter__(self):
+        return self
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,225 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# phase timings of the request running on the current thread
+_current = threading.local()
+
+SERVER_TIMING_DURATION = re.compile(r"dur=([0-9.]+)")
+
+
+# pyre-fixme[2]: Parameter must be annotated.
+def _record(phase, seconds) -> None:
+    phases = getattr(_current, "phases", None)
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+class TimedHTTPConnection(HTTPConnection):
+    # pyre-fixme[3]: Return type must be annotated.
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super(TimedHTTPConnection, self)._new_conn()
+        _record("connect", time.perf_counter() - start)
+        return sock
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    # pyre-fixme[3]: Return type must be annotated.
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super(TimedHTTPSConnection, self)._new_conn()
+        # pyre-fixme[16]: attribute defined outside __init__
+        self._tcp_seconds = time.perf_counter() - start
+        _record("connect", self._tcp_seconds)
+        return sock
+
+    def connect(self) -> None:
+        start = time.perf_counter()
+        super(TimedHTTPSConnection, self).connect()
+        _record("tls", time.perf_counter() - start - self._tcp_seconds)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections report TCP connect and TLS handshake time.
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super(TimedAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def server_time(headers):
+    """
+    Server-reported processing time in seconds, from a Server-Timing header.
+    """
+    value = headers.get("server-timing")
+    if not value:
+        return None
+    durations = [float(d) for d in SERVER_TIMING_DURATION.findall(value)]
+    return sum(durations) / 1000.0 if durations else None
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+class TurnProfiler:
+    """
+    Transport for `Wit.interactive(profile=True)` timing each turn: TCP
+    connect, TLS handshake, time to the response headers ("server"), body
+    download and JSON parse. Requests go through a keep-alive session, or
+    through `transport` when one is given (without connect and TLS times).
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, transport=None) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._owned = transport is None
+        if transport is None:
+            transport = requests.Session()
+            adapter = TimedAdapter()
+            transport.mount("https://", adapter)
+            transport.mount("http://", adapter)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.transport = transport
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.totals = []
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def warm_up(self, url) -> None:
+        """
+        Opens a connection in the background, while the first prompt is
+        being typed.
+        """
+
+        def run() -> None:
+            try:
+                self.transport.request("HEAD", url)
+            except Exception:
+                pass
+
+        threading.Thread(target=run, daemon=True).start()
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def start_turn(self):
+        _current.phases = {}
+        _current.requests = 0
+        return time.perf_counter()
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def end_turn(self, start):
+        """
+        :return: the phase timings of the turn, in seconds
+        """
+        total = time.perf_counter() - start
+        phases = dict(_current.phases, total=total, requests=_current.requests)
+        _current.phases = None
+        self.totals.append(total)
+        return phases
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def request(self, meth, url, **kwargs):
+        before = dict(getattr(_current, "phases", None) or {})
+        if self._owned:
+            # return at the headers, so that reading the body times the download
+            kwargs.setdefault("stream", True)
+        start = time.perf_counter()
+        rsp = self.transport.request(meth, url, **kwargs)
+        headers_at = time.perf_counter()
+        rsp.content  # reads the body
+        _record("download", time.perf_counter() - headers_at)
+        phases = getattr(_current, "phases", None)
+        if phases is not None:
+            _current.requests += 1
+            opened = sum(
+                phases.get(p, 0.0) - before.get(p, 0.0) for p in ("connect", "tls")
+            )
+            _record("server", headers_at - start - opened)
+            reported = server_time(rsp.headers)
+            if reported is not None:
+                _record("server_reported", reported)
+        parse = rsp.json
+
+        # pyre-fixme[3]: Return type must be annotated.
+        # pyre-fixme[2]: Parameter must be annotated.
+        def timed_json(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return parse(*args, **kwargs)
+            finally:
+                _record("parse", time.perf_counter() - start)
+
+        rsp.json = timed_json
+        return rsp
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def format_turn(self, phases):
+        def ms(seconds):
+            return "%.1fms" % (seconds * 1000)
+
+        if phases["requests"] == 0:
+            parts = ["cache hit"]
+        else:
+            parts = []
+            if "connect" in phases:
+                parts.append("connect " + ms(phases["connect"]))
+            if "tls" in phases:
+                parts.append("tls " + ms(phases["tls"]))
+            if "connect" not in phases and "tls" not in phases:
+                parts.append("warm connection")
+            server = "server " + ms(phases.get("server", 0.0))
+            if "server_reported" in phases:
+                server += " (reported %s)" % ms(phases["server_reported"])
+            parts.append(server)
+            parts.append("download " + ms(phases.get("download", 0.0)))
+            parts.append("parse " + ms(phases.get("parse", 0.0)))
+            parts.append("cache miss")
+        parts.append("total " + ms(phases["total"]))
+        totals = self.totals
+        parts.append(
+            "p50 %s p90 %s p99 %s (n=%d)"
+            % (
+                ms(percentile(totals, 0.5)),
+                ms(percentile(totals, 0.9)),
+                ms(percentile(totals, 0.99)),
+                len(totals),
+            )
+        )
+        return " | ".join(parts)
+
+    def close(self) -> None:
+        if self._owned:
+            self.transport.close()
@@ -0,0 +1,82 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket allowing `rate` calls per second on average and
+    bursts of up to `burst` calls.
+    """
+
+    def __init__(
+        self,
+        # pyre-fixme[2]: Parameter must be annotated.
+        rate,
+        # pyre-fixme[2]: Parameter must be annotated.
+        burst=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        clock=time.monotonic,
+        # pyre-fixme[2]: Parameter must be annotated.
+        sleep=time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.rate = float(rate)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._clock = clock
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._sleep = sleep
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._tokens = self.burst
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._updated = clock()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+        # total seconds callers spent waiting in `acquire`
+        self.waited = 0.0
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def _reserve(self):
+        # takes a token, possibly going into debt; returns the wait needed
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            self.waited += wait
+            return wait
+
+    def try_acquire(self) -> bool:
+        """
+        Takes a token if one is available right now.
+        """
+        with self._lock:
+            now = self._clock()
+            tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if tokens < 1:
+                self._tokens = tokens
+                return False
+            self._tokens = tokens - 1
+            return True
+
+    def acquire(self) -> None:
+        """
+        Blocks until the call is allowed. Waiting callers are served in the
+        order they arrived.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            self._sleep(wait)
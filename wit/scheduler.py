@@ -0,0 +1,155 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import contextlib
+import heapq
+import itertools
+import threading
+import time
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+BULK = "bulk"
+
+# share of the contended slots and rate budget each class gets
+DEFAULT_WEIGHTS = {INTERACTIVE: 16, BACKGROUND: 4, BULK: 1}
+
+# calls answering a user; other calls default to BACKGROUND
+INTERACTIVE_CALLS = {("GET", "/message"), ("GET", "/language"), ("POST", "/speech")}
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def default_priority(meth, path):
+    return INTERACTIVE if (meth, path) in INTERACTIVE_CALLS else BACKGROUND
+
+
+class RequestScheduler:
+    """
+    Admits at most `slots` requests at once, optionally within the budget of
+    a shared `rate_limiter`, using weighted fair queueing between priority
+    classes: when requests are waiting, a class with weight 16 is admitted
+    16 times as often as one with weight 1, so bulk jobs mostly use capacity
+    interactive traffic leaves idle. Requests of one class are admitted in
+    arrival order.
+    """
+
+    def __init__(
+        self,
+        # pyre-fixme[2]: Parameter must be annotated.
+        slots=8,
+        # pyre-fixme[2]: Parameter must be annotated.
+        weights=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        rate_limiter=None,
+    ) -> None:
+        if slots < 1:
+            raise ValueError("slots must be at least 1")
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.slots = slots
+        # pyre-fixme[4]: Attribute must be annotated.
+        # classes left out keep their default weight, as calls without an
+        # explicit priority still fall into them
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.rate_limiter = rate_limiter
+        self.in_flight = 0
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._cond = threading.Condition()
+        # waiting requests as (finish tag, arrival, priority)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._queue = []
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._arrivals = itertools.count()
+        self._virtual_time = 0.0
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._last_finish = {}
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._local = threading.local()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._stats = {name: {"requests": 0, "waited": 0.0} for name in self.weights}
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    @contextlib.contextmanager
+    def priority(self, name):
+        """
+        Runs the requests made by this thread inside the block with priority
+        `name`, e.g. `with scheduler.priority(BULK): client.train(...)`.
+        """
+        if name not in self.weights:
+            raise ValueError("unknown priority class " + repr(name))
+        previous = getattr(self._local, "priority", None)
+        self._local.priority = name
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def priority_of(self, meth, path):
+        return getattr(self._local, "priority", None) or default_priority(meth, path)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def acquire(self, name) -> None:
+        """
+        Blocks until a request of class `name` may be sent.
+        """
+        start = time.monotonic()
+        with self._cond:
+            tag = (
+                max(self._virtual_time, self._last_finish.get(name, 0.0))
+                + 1.0 / self.weights[name]
+            )
+            self._last_finish[name] = tag
+            entry = (tag, next(self._arrivals), name)
+            heapq.heappush(self._queue, entry)
+            while True:
+                if self._queue[0] is entry and self.in_flight < self.slots:
+                    if self.rate_limiter is None or self.rate_limiter.try_acquire():
+                        break
+                    # retry when the next token is due
+                    self._cond.wait(1.0 / self.rate_limiter.rate)
+                else:
+                    self._cond.wait()
+            heapq.heappop(self._queue)
+            self.in_flight += 1
+            self._virtual_time = tag
+            stats = self._stats[name]
+            stats["requests"] += 1
+            stats["waited"] += time.monotonic() - start
+            # the next request in line may fit in a free slot too
+            self._cond.notify_all()
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    @contextlib.contextmanager
+    def slot(self, name):
+        self.acquire(name)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        """
+        Requests admitted, seconds spent waiting and requests queued, per
+        priority class.
+        """
+        with self._cond:
+            queued = {}
+            for _, _, name in self._queue:
+                queued[name] = queued.get(name, 0) + 1
+            return {
+                name: dict(stats, queued=queued.get(name, 0))
+                for name, stats in self._stats.items()
+            }
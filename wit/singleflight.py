@@ -0,0 +1,125 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import copy
+import threading
+
+
+class _Call:
+    def __init__(self) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.done = threading.Event()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.result = None
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the
+    call, later callers wait for it and get a copy of its result (or its
+    error). Keys are only shared while a call is in flight; nothing is cached.
+    """
+
+    def __init__(self) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._calls = {}
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def do(self, key, fn):
+        """
+        Runs `fn()` unless a call with the same `key` is already in flight,
+        in which case its outcome is shared.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+                call.waiters += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                shared = call.waiters > 0
+            call.done.set()
+        # followers copy the stored result, so hand the leader its own copy
+        return copy.deepcopy(call.result) if shared else call.result
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight, for coroutine functions running on
+    one event loop.
+    """
+
+    def __init__(self) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    async def do(self, key, coro_fn):
+        """
+        Awaits `coro_fn()` unless a call with the same `key` is already in
+        flight, in which case its outcome is shared.
+        """
+        # already loaded by the running event loop; not imported at module
+        # level to keep `import wit` fast
+        import asyncio
+
+        self.calls += 1
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # shield: a cancelled waiter must not cancel the shared call
+            return copy.deepcopy(await asyncio.shield(future))
+        future = asyncio.ensure_future(coro_fn())
+        self._calls[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        return copy.deepcopy(result)
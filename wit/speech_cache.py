@@ -0,0 +1,187 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from .upload import BufferReader
+
+HASH_CHUNK = 1024 * 1024
+
+
+# pyre-fixme[3]: Return type must be annotated.
+def new_hasher():
+    return hashlib.blake2b(digest_size=16)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def cache_key(digest, content_type, api_version, verbose=False, access_token=None):
+    """
+    Cache key of a /speech call: the audio digest, its Content-Type, the API
+    version and the verbose flag, which all change the response, and the
+    access token, so apps sharing a cache never see each other's responses.
+    The token only enters the hash.
+    """
+    h = new_hasher()
+    extra = [
+        content_type or "",
+        api_version,
+        "verbose" if verbose else "",
+        access_token or "",
+    ]
+    for part in [digest] + [p.encode("utf-8") for p in extra]:
+        h.update(part)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def audio_digest(data):
+    """
+    Digest of an upload body whose bytes can be read up front: buffers,
+    `BufferReader`s and seekable files (which are rewound afterwards).
+
+    :return: the digest, or None for streams, which are hashed as they are
+        sent with `HashingStream` instead
+    """
+    h = new_hasher()
+    if isinstance(data, BufferReader):
+        view = data._view[data.tell() :]
+    elif isinstance(data, (bytes, bytearray, memoryview)):
+        view = memoryview(data).cast("B")
+    elif hasattr(data, "read") and hasattr(data, "seek") and data.seekable():
+        pos = data.tell()
+        for chunk in iter(lambda: data.read(HASH_CHUNK), b""):
+            h.update(chunk)
+        data.seek(pos)
+        return h.digest()
+    else:
+        return None
+    for start in range(0, len(view), HASH_CHUNK):
+        h.update(view[start : start + HASH_CHUNK])
+    return h.digest()
+
+
+class HashingStream:
+    """
+    Iterates over the chunks of a streamed upload (a file object or an
+    iterable) while hashing them, so the digest is known once it was sent.
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, chunks) -> None:
+        if hasattr(chunks, "read"):
+            f = chunks
+            chunks = iter(lambda: f.read(64 * 1024), b"")
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._chunks = chunks
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._hasher = new_hasher()
+        self.complete = False
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def __iter__(self):
+        for chunk in self._chunks:
+            self._hasher.update(chunk)
+            yield chunk
+        self.complete = True
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def digest(self):
+        return self._hasher.digest() if self.complete else None
+
+
+class SpeechCache:
+    """
+    In-memory LRU cache of /speech responses, for `Wit(speech_cache=...)`.
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, max_entries=1024) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.max_entries = max_entries
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._entries = OrderedDict()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def get(self, key):
+        with self._lock:
+            resp = self._entries.get(key)
+            if resp is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(resp)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def put(self, key, resp) -> None:
+        resp = copy.deepcopy(resp)
+        with self._lock:
+            self._entries[key] = resp
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskSpeechCache:
+    """
+    /speech responses cached as JSON files in `directory`, shared between
+    processes and kept across restarts.
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, directory) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                resp = json.load(f)
+        except (OSError, ValueError):
+            resp = None
+        with self._lock:
+            if resp is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return resp
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def put(self, key, resp) -> None:
+        # write then rename, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(resp, f)
+        os.replace(tmp, self._path(key))
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import io
+import unittest
+import wave
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.audio import (
+    decode_raw,
+    decode_wav,
+    np,
+    parse_content_type,
+    preprocess,
+    resample,
+)
+from wit.pywit.source.wit.wit import Wit
+
+
+def make_wav(samples, rate, sampwidth=2):
+    """samples: float array of shape (frames, channels) in [-1, 1]"""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(samples.shape[1])
+        w.setsampwidth(sampwidth)
+        w.setframerate(rate)
+        w.writeframes((samples * 32767).astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+def sine(freq, rate, seconds, amplitude=0.5):
+    t = np.arange(int(rate * seconds)) / float(rate)
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class AudioTestCase(unittest.TestCase):
+    def test_parse_content_type_splits_parameters(self) -> None:
+        # Act
+        media, params = parse_content_type(
+            "audio/raw; encoding=signed-integer; bits=16; rate=8000; endian=big"
+        )
+
+        # Assert
+        self.assertEqual(media, "audio/raw")
+        self.assertEqual(params["rate"], "8000")
+        self.assertEqual(params["endian"], "big")
+
+    def test_decode_wav_returns_frames_by_channels(self) -> None:
+        # Arrange
+        left = sine(440, 8000, 0.1)
+        stereo = np.stack([left, -left], axis=1)
+
+        # Act
+        samples, rate = decode_wav(make_wav(stereo, 8000))
+
+        # Assert
+        self.assertEqual(rate, 8000)
+        self.assertEqual(samples.shape, (800, 2))
+        np.testing.assert_allclose(samples[:, 0], left, atol=1e-3)
+
+    def test_decode_raw_handles_big_endian(self) -> None:
+        # Arrange
+        data = np.array([0, 16384, -16384], dtype=">i2").tobytes()
+
+        # Act
+        samples, rate = decode_raw(
+            data, "audio/raw;encoding=signed-integer;bits=16;rate=8000;endian=big"
+        )
+
+        # Assert
+        self.assertEqual(rate, 8000)
+        np.testing.assert_allclose(samples[:, 0], [0.0, 0.5, -0.5])
+
+    def test_resample_keeps_tones_and_removes_aliasing_content(self) -> None:
+        # Arrange
+        tone = sine(440, 48000, 0.5)
+        high = sine(15000, 48000, 0.5)
+
+        # Act
+        kept = resample(tone, 48000, 16000)
+        removed = resample(high, 48000, 16000)
+
+        # Assert
+        self.assertEqual(len(kept), 8000)
+        self.assertAlmostEqual(float(np.abs(kept[100:-100]).max()), 0.5, delta=0.02)
+        self.assertLess(float(np.abs(removed[100:-100]).max()), 0.05)
+
+    def test_preprocess_downmixes_and_resamples_wav(self) -> None:
+        # Arrange
+        left = sine(300, 44100, 1.0)
+        wav = make_wav(np.stack([left, left], axis=1), 44100)
+
+        # Act
+        body, content_type = preprocess(wav, "audio/wav")
+
+        # Assert
+        self.assertEqual(
+            content_type,
+            "audio/raw;encoding=signed-integer;bits=16;rate=16000;endian=little",
+        )
+        self.assertEqual(len(body), 16000 * 2)
+        self.assertLess(len(body), len(wav) / 5)
+
+    def test_preprocess_does_not_upsample(self) -> None:
+        # Arrange
+        wav = make_wav(sine(300, 8000, 1.0)[:, None], 8000)
+
+        # Act
+        body, content_type = preprocess(wav, "audio/wav")
+
+        # Assert
+        self.assertIn("rate=8000", content_type)
+        self.assertEqual(len(body), 8000 * 2)
+        self.assertLessEqual(len(body), len(wav))
+
+    def test_preprocess_passes_through_undecodable_formats(self) -> None:
+        # Act & Assert
+        self.assertEqual(
+            preprocess(b"ID3mp3data", "audio/mpeg3"), (b"ID3mp3data", "audio/mpeg3")
+        )
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_speech_with_preprocess_sends_raw_pcm(self, mock_req: Mock) -> None:
+        # Arrange
+        mock_req.return_value = {"text": "hello"}
+        wav = make_wav(sine(300, 48000, 0.5)[:, None], 48000)
+        client = Wit(access_token="token", logger=Mock())
+
+        # Act
+        client.speech(io.BytesIO(wav), {"content-type": "audio/wav"}, preprocess=True)
+
+        # Assert
+        kwargs = mock_req.call_args.kwargs
+        self.assertEqual(len(kwargs["data"]), 8000 * 2)
+        self.assertEqual(
+            kwargs["headers"],
+            {
+                "Content-Type": "audio/raw;encoding=signed-integer;bits=16;"
+                "rate=16000;endian=little"
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.audio import encode_pcm16, np
+from wit.pywit.source.wit.batch import iter_speech_batch, sniff_content_type
+from wit.pywit.source.wit.wit import Wit, WitError
+
+WAV_HEADER = b"RIFF\x24\x00\x00\x00WAVEfmt "
+
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        self.manifest = os.path.join(self.dir, "manifest.jsonl")
+        self.audio = os.path.join(self.dir, "calls")
+        os.makedirs(os.path.join(self.audio, "b"))
+        self.paths = []
+        for name, header in [
+            ("a.wav", WAV_HEADER),
+            ("b/c.bin", b"ID3\x03\x00"),
+            ("b/d.raw", b"\x00\x01\x02"),
+        ]:
+            path = os.path.join(self.audio, name)
+            with open(path, "wb") as f:
+                f.write(header + b"\x00" * 64)
+            self.paths.append(path)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir)
+
+    def test_sniff_content_type_recognizes_headers(self) -> None:
+        # Act & Assert
+        self.assertEqual(sniff_content_type(WAV_HEADER), "audio/wav")
+        self.assertEqual(sniff_content_type(b"OggS\x00"), "audio/ogg")
+        self.assertEqual(sniff_content_type(b"\xff\xfb\x90"), "audio/mpeg3")
+        self.assertIsNone(sniff_content_type(b"\x00\x01"))
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_speech_batch_walks_directories_and_writes_manifest(
+        self, mock_req: Mock
+    ) -> None:
+        # Arrange
+        mock_req.return_value = {"text": "hello"}
+        client = Wit(access_token="token", logger=Mock())
+
+        # Act
+        records = client.speech_batch(self.audio, concurrency=2, output=self.manifest)
+
+        # Assert
+        self.assertEqual(sorted(r["path"] for r in records), self.paths)
+        with open(self.manifest) as f:
+            written = {r["path"]: r for r in map(json.loads, f)}
+        self.assertEqual(
+            [written[p]["content_type"] for p in self.paths],
+            ["audio/wav", "audio/mpeg3", "audio/raw"],
+        )
+        sent = sorted(
+            c.kwargs["headers"]["Content-Type"] for c in mock_req.call_args_list
+        )
+        self.assertEqual(sent, ["audio/mpeg3", "audio/raw", "audio/wav"])
+
+    def test_restart_skips_transcribed_files_and_retries_failures(self) -> None:
+        # Arrange: a run that failed once and crashed mid-line
+        with open(self.manifest, "w") as f:
+            f.write(json.dumps({"path": self.paths[0], "response": {}}) + "\n")
+            f.write(json.dumps({"path": self.paths[1], "error": "boom"}) + "\n")
+            f.write('{"path": "' + self.paths[2])
+        client = Mock()
+        client.speech.side_effect = [{"text": "x"}, WitError("busy", 429)]
+
+        # Act
+        records = list(iter_speech_batch(client, self.paths, output=self.manifest))
+
+        # Assert
+        self.assertEqual(
+            sorted(c.args[0] for c in client.speech.call_args_list), self.paths[1:]
+        )
+        self.assertEqual(sorted(r.get("status_code") or 0 for r in records), [0, 429])
+        with open(self.manifest) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertIn(json.loads(lines[-1])["path"], self.paths[1:])
+
+    def test_concurrency_bounds_uploads_in_flight(self) -> None:
+        # Arrange
+        lock = threading.Lock()
+        state = {"now": 0, "max": 0}
+
+        def speech(path, headers, verbose):
+            with lock:
+                state["now"] += 1
+                state["max"] = max(state["max"], state["now"])
+            time.sleep(0.01)
+            with lock:
+                state["now"] -= 1
+            return {}
+
+        client = Mock()
+        client.speech.side_effect = speech
+
+        # Act
+        records = list(iter_speech_batch(client, self.paths * 4, concurrency=3))
+
+        # Assert
+        self.assertEqual(len(records), 12)
+        self.assertEqual(state["max"], 3)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_speech_long_transcribes_segments_concurrently(self) -> None:
+        # Arrange: four 1s tones separated by 2s pauses
+        rate = 8000
+        t = np.arange(rate) / float(rate)
+        tone = 0.3 * np.sin(2 * np.pi * 200 * t)
+        pause = np.zeros(2 * rate)
+        pcm = encode_pcm16(np.concatenate([pause, tone] * 4 + [pause]))
+        client = Wit(access_token="token", logger=Mock())
+        texts = iter(["one", "two", "three", "four"])
+        lock = threading.Lock()
+
+        def fake_req(logger, token, meth, path, params, data, headers):
+            time.sleep(0.05)
+            with lock:
+                return {"text": next(texts)}
+
+        # Act
+        with patch("wit.pywit.source.wit.wit.req", side_effect=fake_req) as mock_req:
+            start = time.time()
+            result = client.speech_long(
+                pcm, {"Content-Type": "audio/raw;rate=8000"}, concurrency=4
+            )
+            elapsed = time.time() - start
+
+        # Assert
+        self.assertEqual(mock_req.call_count, 4)
+        self.assertLess(elapsed, 0.15)
+        self.assertEqual(
+            sorted(result["text"].split()), sorted(["one", "two", "three", "four"])
+        )
+        self.assertEqual(result["duration"], 14.0)
+        starts = [s["start"] for s in result["segments"]]
+        self.assertEqual(starts, sorted(starts))
+        self.assertAlmostEqual(starts[1], 4.8, delta=0.05)
+        self.assertEqual(
+            mock_req.call_args.kwargs["headers"]["Content-Type"],
+            "audio/raw;encoding=signed-integer;bits=16;rate=8000;endian=little",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
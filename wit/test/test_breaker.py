@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import unittest
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+from wit.pywit.source.wit.wit import CircuitOpenError, Wit, WitError
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.transitions = []
+        self.breaker = CircuitBreaker(
+            failure_rate=0.5,
+            window_size=4,
+            min_calls=4,
+            reset_timeout=10.0,
+            clock=self.clock,
+        )
+        self.breaker.add_listener(lambda *t: self.transitions.append(t))
+
+    def _fail(self, n: int) -> None:
+        for _ in range(n):
+            self.assertTrue(self.breaker.allow("/message"))
+            self.breaker.record("/message", False, 0.1)
+
+    def test_breaker_opens_when_failure_rate_is_reached(self) -> None:
+        # Arrange
+        self.breaker.record("/message", True, 0.1)
+
+        # Act
+        self._fail(3)
+
+        # Assert
+        self.assertEqual(self.breaker.state("/message"), OPEN)
+        self.assertFalse(self.breaker.allow("/message"))
+        self.assertTrue(self.breaker.allow("/speech"))
+        self.assertEqual(self.transitions, [("/message", CLOSED, OPEN)])
+
+    def test_breaker_waits_for_min_calls(self) -> None:
+        # Act
+        self._fail(3)
+
+        # Assert
+        self.assertEqual(self.breaker.state("/message"), CLOSED)
+
+    def test_half_open_probe_success_closes_circuit(self) -> None:
+        # Arrange
+        self._fail(4)
+        self.clock.now = 10.0
+
+        # Act
+        probe = self.breaker.allow("/message")
+        second = self.breaker.allow("/message")
+        self.breaker.record("/message", True, 0.1)
+
+        # Assert
+        self.assertTrue(probe)
+        self.assertFalse(second)
+        self.assertEqual(self.breaker.state("/message"), CLOSED)
+        self.assertEqual(
+            self.transitions,
+            [
+                ("/message", CLOSED, OPEN),
+                ("/message", OPEN, HALF_OPEN),
+                ("/message", HALF_OPEN, CLOSED),
+            ],
+        )
+
+    def test_half_open_probe_failure_reopens_circuit(self) -> None:
+        # Arrange
+        self._fail(4)
+        self.clock.now = 10.0
+
+        # Act
+        self.breaker.allow("/message")
+        self.breaker.record("/message", False, 0.1)
+
+        # Assert
+        self.assertEqual(self.breaker.state("/message"), OPEN)
+        self.assertFalse(self.breaker.allow("/message"))
+
+    def test_slow_calls_open_circuit(self) -> None:
+        # Arrange
+        breaker = CircuitBreaker(
+            slow_call_seconds=1.0, slow_call_rate=0.5, window_size=2, min_calls=2
+        )
+
+        # Act
+        breaker.record("/message", True, 2.0)
+        breaker.record("/message", True, 3.0)
+
+        # Assert
+        self.assertEqual(breaker.state("/message"), OPEN)
+
+
+class WitCircuitBreakerTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.events = []
+        self.breaker = CircuitBreaker(window_size=2, min_calls=2)
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_message_fails_fast_when_circuit_is_open(self, mock_req: Mock) -> None:
+        # Arrange
+        mock_req.side_effect = WitError("unavailable", status_code=503)
+        client = Wit(
+            access_token="token",
+            logger=Mock(),
+            circuit_breaker=self.breaker,
+            instrumentation=lambda event, data: self.events.append((event, data)),
+        )
+        for _ in range(2):
+            with self.assertRaises(WitError):
+                client.message("hi")
+
+        # Act & Assert
+        with self.assertRaises(CircuitOpenError):
+            client.message("hi")
+        self.assertEqual(mock_req.call_count, 2)
+        self.assertEqual(
+            self.events,
+            [
+                (
+                    "circuit_state",
+                    {"endpoint": "/message", "old": "closed", "new": "open"},
+                )
+            ],
+        )
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_message_uses_fallback_when_circuit_is_open(self, mock_req: Mock) -> None:
+        # Arrange
+        fallback = Mock(return_value={"text": "hi", "intents": []})
+        client = Wit(
+            access_token="token",
+            logger=Mock(),
+            circuit_breaker=self.breaker,
+            fallback=fallback,
+        )
+        self.breaker.record("/message", False, 0.1)
+        self.breaker.record("/message", False, 0.1)
+
+        # Act
+        resp = client.message("hi", context={"locale": "en_US"})
+
+        # Assert
+        self.assertEqual(resp, {"text": "hi", "intents": []})
+        fallback.assert_called_once_with("hi", {"locale": "en_US"})
+        mock_req.assert_not_called()
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_client_errors_do_not_open_circuit(self, mock_req: Mock) -> None:
+        # Arrange
+        mock_req.side_effect = WitError("bad request", status_code=400)
+        client = Wit(access_token="token", logger=Mock(), circuit_breaker=self.breaker)
+
+        # Act
+        for _ in range(3):
+            with self.assertRaises(WitError):
+                client.intent_info("greet")
+
+        # Assert
+        self.assertEqual(self.breaker.state("/intents"), CLOSED)
+        self.assertEqual(mock_req.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.cli import main, ordered_map
+from wit.pywit.source.wit.evaluation import np
+from wit.pywit.source.wit.wit import WitError
+
+
+class CliTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def write(self, name: str, lines: list) -> str:
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def read_jsonl(self, path: str) -> list:
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_ordered_map_keeps_order_and_reads_lazily(self) -> None:
+        # Arrange
+        read = []
+
+        def items():
+            for i in range(100):
+                read.append(i)
+                yield i
+
+        def slow_square(i):
+            time.sleep(0.001 * (i % 3))
+            return i * i
+
+        # Act
+        results = ordered_map(slow_square, items(), 4)
+        first = next(results)
+
+        # Assert
+        self.assertEqual(first, 0)
+        self.assertLessEqual(len(read), 9)
+        self.assertEqual(list(results), [i * i for i in range(1, 100)])
+
+    @patch("wit.pywit.source.wit.cli.Wit")
+    def test_message_writes_results_in_order_and_caches_repeats(
+        self, mock_wit: Mock
+    ) -> None:
+        # Arrange
+        client = mock_wit.return_value
+
+        def message(text, context):
+            if text == "bad":
+                raise WitError("nope", 400)
+            return {"text": text, "context": context}
+
+        client.message.side_effect = message
+        inp = self.write(
+            "in.txt",
+            ["hello", '{"text": "hi", "id": 7, "context": {"locale": "en_GB"}}']
+            + ["hello", "bad"],
+        )
+        out = os.path.join(self.dir, "out.jsonl")
+
+        # Act
+        code = main(["--token", "t", "message", inp, "-o", out, "--concurrency", "2"])
+
+        # Assert
+        results = self.read_jsonl(out)
+        self.assertEqual(code, 1)
+        self.assertEqual([r["text"] for r in results], ["hello", "hi", "hello", "bad"])
+        self.assertEqual(results[1]["id"], 7)
+        self.assertEqual(results[1]["response"]["context"], {"locale": "en_GB"})
+        self.assertEqual(results[3]["status_code"], 400)
+        self.assertEqual(client.message.call_count, 3)
+
+    @patch("wit.pywit.source.wit.cli.Wit")
+    def test_train_sends_batches(self, mock_wit: Mock) -> None:
+        # Arrange
+        client = mock_wit.return_value
+        client.train.return_value = {"sent": True}
+        inp = self.write(
+            "utterances.jsonl",
+            [json.dumps({"text": "u%d" % i, "entities": []}) for i in range(5)],
+        )
+
+        # Act
+        with patch("sys.stderr"):
+            code = main(["--token", "t", "train", inp, "--batch-size", "2"])
+
+        # Assert
+        self.assertEqual(code, 0)
+        self.assertEqual(
+            [len(c.args[0]) for c in client.train.call_args_list], [2, 2, 1]
+        )
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    @patch("wit.pywit.source.wit.cli.Wit")
+    def test_evaluate_prints_a_report(self, mock_wit: Mock) -> None:
+        # Arrange
+        client = mock_wit.return_value
+        client.message.return_value = {"intents": [{"name": "greet", "confidence": 1}]}
+        inp = self.write(
+            "test_set.jsonl",
+            [json.dumps({"text": "hi", "intent": "greet", "entities": []})],
+        )
+
+        # Act
+        with patch("builtins.print") as mock_print:
+            code = main(["--token", "t", "evaluate", inp, "--tag", "v1"])
+
+        # Assert
+        self.assertEqual(code, 0)
+        report = json.loads(mock_print.call_args.args[0])
+        self.assertEqual(report["accuracy"], 1.0)
+        self.assertEqual(client.message.call_args.kwargs["tag"], "v1")
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    @patch("wit.pywit.source.wit.cli.Wit")
+    def test_compare_prints_the_differences(self, mock_wit: Mock) -> None:
+        # Arrange
+        client = mock_wit.return_value
+        client.message.side_effect = lambda text, context, tag=None: {
+            "intents": [{"name": "greet" if tag == "v2" else "bye", "confidence": 1}]
+        }
+        inp = self.write(
+            "test_set.jsonl",
+            [json.dumps({"text": "hi", "intent": "greet", "entities": []})],
+        )
+
+        # Act
+        with patch("builtins.print") as mock_print:
+            code = main(
+                [
+                    "--token",
+                    "t",
+                    "compare",
+                    inp,
+                    "--baseline",
+                    "v1",
+                    "--candidate",
+                    "v2",
+                ]
+            )
+
+        # Assert
+        self.assertEqual(code, 0)
+        report = json.loads(mock_print.call_args.args[0])
+        self.assertEqual((report["disagreements"], report["fixed"]), (1, 1))
+        self.assertEqual(report["accuracy"], 1.0)
+
+    def test_token_is_required(self) -> None:
+        # Act & Assert
+        with patch.dict(os.environ, {}, clear=True), patch("sys.stderr"):
+            with self.assertRaises(SystemExit):
+                main(["message"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import threading
+import unittest
+from unittest.mock import Mock
+
+# Import module under test
+from wit.pywit.source.wit.coalescing import KeywordBatcher, merge_keywords
+from wit.pywit.source.wit.wit import WitError
+
+
+def entity(keywords):
+    return {
+        "name": "city",
+        "roles": [{"id": "1", "name": "city"}],
+        "lookups": ["keywords"],
+        "keywords": keywords,
+    }
+
+
+class KeywordBatcherTestCase(unittest.TestCase):
+    def test_merge_keywords_skips_known_synonyms(self) -> None:
+        # Act
+        merged = merge_keywords(
+            [{"keyword": "Paris", "synonyms": ["Paris"]}],
+            {"Paris": ["Paris", "Paname"], "Lyon": ["Lyon"]},
+        )
+
+        # Assert
+        self.assertEqual(
+            merged,
+            [
+                {"keyword": "Paris", "synonyms": ["Paris", "Paname"]},
+                {"keyword": "Lyon", "synonyms": ["Lyon"]},
+            ],
+        )
+
+    def test_thousands_of_synonyms_become_one_update(self) -> None:
+        # Arrange
+        client = Mock()
+        client.entity_info.return_value = entity(
+            [{"keyword": "Paris", "synonyms": ["Paris"]}]
+        )
+        batcher = KeywordBatcher(client, max_pending=10000, max_delay=None)
+
+        # Act
+        with batcher:
+            batcher.add_keyword_value("city", {"keyword": "Lyon", "synonyms": ["Lyon"]})
+            for i in range(5000):
+                batcher.create_synonym("city", "Paris", "p%d" % i)
+
+        # Assert
+        client.update_entity.assert_called_once()
+        call = client.update_entity.call_args
+        self.assertEqual(call.args, ("city", "city", ["city"]))
+        self.assertEqual(call.kwargs["lookups"], ["keywords"])
+        keywords = call.kwargs["keywords"]
+        self.assertEqual(len(keywords[0]["synonyms"]), 5001)
+        self.assertEqual(keywords[1], {"keyword": "Lyon", "synonyms": ["Lyon"]})
+        self.assertEqual((batcher.calls, batcher.requests), (5001, 2))
+
+    def test_flushes_when_max_pending_is_reached(self) -> None:
+        # Arrange
+        client = Mock()
+        client.entity_info.return_value = entity([])
+        batcher = KeywordBatcher(client, max_pending=2, max_delay=None)
+
+        # Act
+        batcher.create_synonym("city", "Paris", "a")
+        before = client.update_entity.call_count
+        batcher.create_synonym("city", "Paris", "b")
+
+        # Assert
+        self.assertEqual(before, 0)
+        self.assertEqual(client.update_entity.call_count, 1)
+        self.assertEqual(batcher.pending(), 0)
+
+    def test_flushes_after_max_delay(self) -> None:
+        # Arrange
+        client = Mock()
+        client.entity_info.return_value = entity([])
+        updated = threading.Event()
+        client.update_entity.side_effect = lambda *a, **k: updated.set()
+        batcher = KeywordBatcher(client, max_delay=0.01)
+
+        # Act
+        batcher.create_synonym("city", "Paris", "a")
+
+        # Assert
+        self.assertTrue(updated.wait(5))
+
+    def test_failed_timed_flushes_are_retried(self) -> None:
+        # Arrange
+        client = Mock()
+        client.entity_info.return_value = entity([])
+        updated = threading.Event()
+
+        def update(*args, **kwargs):
+            if client.update_entity.call_count == 1:
+                raise WitError("unavailable", 503)
+            updated.set()
+
+        client.update_entity.side_effect = update
+        batcher = KeywordBatcher(client, max_delay=0.01, logger=Mock())
+
+        # Act
+        batcher.create_synonym("city", "Paris", "a")
+
+        # Assert
+        self.assertTrue(updated.wait(5))
+        self.assertEqual(client.update_entity.call_count, 2)
+        self.assertEqual(batcher.pending(), 0)
+
+    def test_failed_updates_stay_buffered(self) -> None:
+        # Arrange
+        client = Mock()
+        client.entity_info.return_value = entity([])
+        client.update_entity.side_effect = [WitError("unavailable", 503), {}]
+        batcher = KeywordBatcher(client, max_delay=None)
+        batcher.create_synonym("city", "Paris", "a")
+
+        # Act
+        with self.assertRaises(WitError):
+            batcher.flush()
+        pending = batcher.pending()
+        responses = batcher.flush()
+
+        # Assert
+        self.assertEqual(pending, 1)
+        self.assertEqual(responses, {"city": {}})
+        self.assertEqual(
+            client.update_entity.call_args.kwargs["keywords"],
+            [{"keyword": "Paris", "synonyms": ["a"]}],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
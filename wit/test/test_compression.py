@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import gzip
+import io
+import json
+import os
+import unittest
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.compression import compress_body
+from wit.pywit.source.wit.wit import req, Wit
+
+
+class CompressBodyTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data = [{"text": "book a flight to Paris", "intent": "book"}] * 100
+
+    def test_large_json_body_is_gzipped(self) -> None:
+        # Act
+        kwargs, sizes = compress_body({"json": self.data, "headers": {}})
+
+        # Assert
+        self.assertNotIn("json", kwargs)
+        self.assertEqual(json.loads(gzip.decompress(kwargs["data"])), self.data)
+        self.assertEqual(kwargs["headers"]["Content-Encoding"], "gzip")
+        self.assertEqual(kwargs["headers"]["Content-Type"], "application/json")
+        self.assertEqual(sizes[1], len(kwargs["data"]))
+        self.assertLess(sizes[1], sizes[0])
+
+    def test_small_body_is_left_untouched(self) -> None:
+        # Arrange
+        kwargs = {"json": self.data[:1], "headers": {}}
+
+        # Act & Assert
+        self.assertEqual(compress_body(kwargs), (kwargs, None))
+
+    def test_incompressible_file_is_read_once_and_sent_as_is(self) -> None:
+        # Arrange
+        payload = os.urandom(4096)
+
+        # Act
+        kwargs, sizes = compress_body({"data": io.BytesIO(payload), "headers": {}})
+
+        # Assert
+        self.assertIsNone(sizes)
+        self.assertEqual(kwargs["data"], payload)
+
+
+class WitCompressionTestCase(unittest.TestCase):
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_train_body_is_compressed_and_reported(self, mock_req: Mock) -> None:
+        # Arrange
+        events = []
+        mock_req.return_value = {"sent": True}
+        client = Wit(
+            access_token="token",
+            logger=Mock(),
+            compress_requests=True,
+            instrumentation=lambda event, data: events.append((event, data)),
+        )
+        data = [{"text": "hello there", "intent": "greet"}] * 200
+
+        # Act
+        client.train(data)
+        client.message("hello there")
+
+        # Assert
+        train_kwargs = mock_req.call_args_list[0].kwargs
+        self.assertEqual(train_kwargs["headers"]["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(train_kwargs["data"])), data)
+        self.assertNotIn("data", mock_req.call_args_list[1].kwargs)
+        self.assertEqual(events[0][0], "request_bytes")
+        self.assertEqual(events[0][1]["endpoint"], "/utterances")
+
+    @patch("wit.pywit.source.wit.wit.requests.request")
+    def test_req_reports_response_bytes_and_accepts_compression(
+        self, mock_request: Mock
+    ) -> None:
+        # Arrange
+        rsp = Mock(status_code=200, content=b'{"ok": true}')
+        rsp.headers = {"content-encoding": "gzip", "content-length": "30"}
+        rsp.json.return_value = {"ok": True}
+        mock_request.return_value = rsp
+        on_response = Mock()
+
+        # Act
+        req(Mock(), "token", "GET", "/utterances", {}, on_response=on_response)
+
+        # Assert
+        on_response.assert_called_once_with(rsp)
+        self.assertIn(
+            "gzip", mock_request.call_args.kwargs["headers"]["accept-encoding"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit import wit as witmod
+from wit.pywit.source.wit.concurrency import AdaptiveLimiter
+from wit.pywit.source.wit.wit import WitError
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class AdaptiveLimiterTestCase(unittest.TestCase):
+    def call(self, limiter, clock, seconds, overloaded=False) -> None:
+        start = limiter.acquire()
+        clock.now += seconds
+        limiter.release(start, overloaded)
+
+    def test_limit_grows_by_about_one_per_round_of_healthy_requests(self) -> None:
+        # Arrange
+        clock = FakeClock()
+        limiter = AdaptiveLimiter(initial=4, clock=clock)
+
+        # Act
+        for _ in range(4):
+            self.call(limiter, clock, 0.1)
+
+        # Assert
+        self.assertEqual(limiter.limit, 4)
+        self.call(limiter, clock, 0.1)
+        self.assertEqual(limiter.limit, 5)
+        self.assertEqual(limiter.stats()["increases"], 1)
+
+    def test_overload_halves_the_limit_once_per_round_trip(self) -> None:
+        # Arrange
+        clock = FakeClock()
+        limiter = AdaptiveLimiter(initial=16, clock=clock)
+        changes = []
+        limiter.add_listener(lambda old, new: changes.append((old, new)))
+        clock.now = 1.0
+
+        # Act: two requests in flight fail with 429
+        first = limiter.acquire()
+        second = limiter.acquire()
+        clock.now += 0.1
+        limiter.release(first, True)
+        limiter.release(second, True)
+        self.call(limiter, clock, 0.1, overloaded=True)
+
+        # Assert
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(changes, [(16, 8), (8, 4)])
+
+    def test_latency_inflation_counts_as_overload(self) -> None:
+        # Arrange
+        clock = FakeClock()
+        limiter = AdaptiveLimiter(
+            initial=8, max_limit=8, min_samples=3, latency_tolerance=2.0, clock=clock
+        )
+        for _ in range(3):
+            self.call(limiter, clock, 0.1)
+
+        # Act
+        self.call(limiter, clock, 0.15)
+        healthy = limiter.limit
+        self.call(limiter, clock, 0.5)
+
+        # Assert
+        self.assertEqual(healthy, 8)
+        self.assertEqual(limiter.limit, 4)
+        self.assertAlmostEqual(limiter.baseline(), 0.1)
+
+    def test_acquire_blocks_at_the_limit(self) -> None:
+        # Arrange
+        limiter = AdaptiveLimiter(initial=1)
+        start = limiter.acquire()
+        acquired = threading.Event()
+
+        def run():
+            with limiter.slot():
+                acquired.set()
+
+        thread = threading.Thread(target=run)
+
+        # Act
+        thread.start()
+        blocked = not acquired.wait(0.05)
+        limiter.release(start)
+        thread.join(5)
+
+        # Assert
+        self.assertTrue(blocked)
+        self.assertTrue(acquired.is_set())
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_interrupted_requests_release_their_slot(self) -> None:
+        # Arrange
+        limiter = AdaptiveLimiter(initial=1)
+
+        # Act
+        with self.assertRaises(KeyboardInterrupt):
+            with limiter.slot():
+                raise KeyboardInterrupt()
+
+        # Assert
+        self.assertEqual(limiter.in_flight, 0)
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_client_reports_limit_changes(self, mock_req: Mock) -> None:
+        # Arrange
+        mock_req.side_effect = WitError("slow down", 429)
+        instrumentation = Mock()
+        limiter = AdaptiveLimiter(initial=8)
+        client = witmod.Wit(
+            "token",
+            logger=Mock(),
+            instrumentation=instrumentation,
+            concurrency_limiter=limiter,
+        )
+
+        # Act
+        with self.assertRaises(WitError):
+            client.train([])
+
+        # Assert
+        self.assertEqual(limiter.limit, 4)
+        instrumentation.assert_called_with("concurrency_limit", {"old": 8, "new": 4})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import unittest
+from unittest.mock import Mock
+
+# Import module under test
+from wit.pywit.source.wit.ensure import AppState
+from wit.pywit.source.wit.graph import AppGraph
+from wit.pywit.source.wit.wit import WitError
+
+
+def snapshot():
+    graph = AppGraph()
+    graph.add("intents", {"id": "1", "name": "greet"})
+    graph.add(
+        "entities",
+        {
+            "id": "2",
+            "name": "city",
+            "roles": [{"id": "3", "name": "city"}],
+            "lookups": ["keywords"],
+            "keywords": [{"keyword": "Paris", "synonyms": ["Paris"]}],
+        },
+    )
+    graph.add("traits", {"id": "4", "name": "mood", "values": [{"value": "happy"}]})
+    return graph
+
+
+class AppStateTestCase(unittest.TestCase):
+    def test_redeploy_without_changes_makes_no_write_calls(self) -> None:
+        # Arrange
+        client = Mock()
+        state = AppState(client, graph=snapshot())
+
+        # Act
+        state.ensure_intent("greet")
+        state.ensure_entity("city")
+        state.ensure_trait("mood", ["happy"])
+        state.ensure_keyword("city", "Paris")
+
+        # Assert
+        self.assertEqual(client.mock_calls, [])
+        self.assertEqual((state.writes, state.skipped), (0, 4))
+
+    def test_only_missing_items_are_created(self) -> None:
+        # Arrange
+        client = Mock()
+        client.create_intent.return_value = {"id": "5", "name": "bye"}
+        state = AppState(client, graph=snapshot())
+
+        # Act
+        state.ensure_intent("bye")
+        state.ensure_intent("bye")
+        state.ensure_entity("city", roles=["city", "destination"])
+        state.ensure_trait("mood", ["happy", "sad"])
+        state.ensure_keyword("city", "Paris", ["Paris", "Paname"])
+        state.ensure_keyword("city", "Lyon")
+        state.ensure_keyword("city", "Lyon")
+
+        # Assert
+        client.create_intent.assert_called_once_with("bye")
+        client.update_entity.assert_called_once_with(
+            "city",
+            "city",
+            ["city", "destination"],
+            lookups=["keywords"],
+            keywords=[{"keyword": "Paris", "synonyms": ["Paris"]}],
+        )
+        client.create_trait_value.assert_called_once_with("mood", "sad")
+        client.create_synonym.assert_called_once_with("city", "Paris", "Paname")
+        client.add_keyword_value.assert_called_once_with(
+            "city", {"keyword": "Lyon", "synonyms": ["Lyon"]}
+        )
+        self.assertEqual(state.writes, 5)
+
+    def test_snapshot_is_fetched_once(self) -> None:
+        # Arrange
+        client = Mock()
+        client.intent_list.return_value = [{"name": "greet"}]
+        client.intent_info.return_value = {"id": "1", "name": "greet"}
+        client.entity_list.return_value = []
+        client.trait_list.return_value = []
+        state = AppState(client)
+
+        # Act
+        state.ensure_intent("greet")
+        state.ensure_intent("greet")
+
+        # Assert
+        client.intent_list.assert_called_once()
+        client.create_intent.assert_not_called()
+
+    def test_stale_snapshot_falls_back_to_the_existing_item(self) -> None:
+        # Arrange
+        client = Mock()
+        client.create_intent.side_effect = WitError("already exists", 400)
+        client.intent_info.return_value = {"id": "9", "name": "bye"}
+        state = AppState(client, graph=snapshot())
+
+        # Act
+        intent = state.ensure_intent("bye")
+        again = state.ensure_intent("bye")
+
+        # Assert
+        self.assertEqual(intent["id"], "9")
+        self.assertIs(again, intent)
+        client.intent_info.assert_called_once_with("bye")
+
+    def test_an_incomplete_snapshot_is_fetched_again(self) -> None:
+        # Arrange
+        client = Mock()
+        client.intent_list.return_value = []
+        client.entity_list.side_effect = [
+            WitError("unavailable", 503),
+            [{"name": "city"}],
+        ]
+        client.entity_info.return_value = {
+            "id": "2",
+            "name": "city",
+            "roles": [{"id": "3", "name": "city"}],
+        }
+        client.trait_list.return_value = []
+        state = AppState(client)
+
+        # Act
+        with self.assertRaises(WitError) as raised:
+            state.ensure_entity("city")
+        state.ensure_entity("city")
+
+        # Assert
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(client.entity_list.call_count, 2)
+        client.create_entity.assert_not_called()
+        self.assertEqual((state.writes, state.skipped), (0, 1))
+
+    def test_keywords_need_an_existing_entity(self) -> None:
+        # Arrange
+        state = AppState(Mock(), graph=snapshot())
+
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            state.ensure_keyword("country", "France")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.evaluation import (
+    compare,
+    evaluate,
+    message_key,
+    np,
+    ResponseCache,
+    Target,
+)
+from wit.pywit.source.wit.breaker import CircuitBreaker
+from wit.pywit.source.wit.wit import Wit
+
+DATASET = [
+    {
+        "text": "weather in Paris",
+        "intent": "get_weather",
+        "entities": [
+            {"entity": "wit$location:location", "start": 11, "end": 16, "body": "Paris"}
+        ],
+        "traits": [],
+    },
+    {"text": "hello", "intent": "greet", "entities": [], "traits": []},
+    {"text": "hi there", "intent": "greet", "entities": [], "traits": []},
+    {"text": "what is up", "entities": [], "traits": []},
+]
+
+RESPONSES = {
+    "weather in Paris": {
+        "intents": [{"name": "get_weather", "confidence": 0.95}],
+        "entities": {
+            "wit$location:location": [
+                {
+                    "name": "wit$location",
+                    "role": "location",
+                    "start": 11,
+                    "end": 16,
+                    "body": "Paris",
+                }
+            ]
+        },
+    },
+    "hello": {"intents": [{"name": "greet", "confidence": 0.9}], "entities": {}},
+    "hi there": {"intents": [{"name": "get_weather", "confidence": 0.55}]},
+    "what is up": {"intents": []},
+}
+
+
+def client():
+    mock = Mock()
+    mock.message.side_effect = lambda text, context, tag=None: RESPONSES[text]
+    return mock
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class EvaluationTestCase(unittest.TestCase):
+    def test_intent_metrics_and_confusion(self) -> None:
+        # Act
+        report = evaluate(client(), DATASET, chunk_size=3)
+
+        # Assert
+        self.assertEqual(report["count"], 4)
+        self.assertAlmostEqual(report["accuracy"], 0.75)
+        greet = report["intents"]["greet"]
+        self.assertEqual(greet["precision"], 1.0)
+        self.assertEqual(greet["recall"], 0.5)
+        self.assertAlmostEqual(report["intents"]["get_weather"]["precision"], 0.5)
+        labels = report["confusion"]["labels"]
+        matrix = report["confusion"]["matrix"]
+        self.assertEqual(matrix[labels.index("greet")][labels.index("get_weather")], 1)
+        self.assertEqual(report["intents"]["(none)"]["recall"], 1.0)
+
+    def test_entity_spans_and_calibration(self) -> None:
+        # Act
+        report = evaluate(client(), DATASET)
+
+        # Assert
+        entities = report["entities"]
+        self.assertEqual((entities["precision"], entities["recall"]), (1.0, 1.0))
+        self.assertEqual(entities["exact_match"], 1.0)
+        self.assertEqual(entities["by_entity"]["wit$location"]["support"], 1)
+        bins = report["calibration"]["bins"]
+        self.assertEqual(bins[9]["count"], 2)
+        self.assertEqual(bins[5], {"confidence": 0.55, "accuracy": 0.0, "count": 1})
+        self.assertEqual(bins[0]["accuracy"], 1.0)
+        self.assertAlmostEqual(
+            report["calibration"]["ece"], (0.05 + 0.1 + 0.55 + 1.0) / 4
+        )
+
+    def test_responses_are_cached_per_version(self) -> None:
+        # Arrange
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "eval.db")
+        first = client()
+        second = client()
+
+        # Act
+        evaluate(first, DATASET, tag="v1", cache=ResponseCache(path))
+        cache = ResponseCache(path)
+        report = evaluate(second, DATASET, tag="v1", cache=cache)
+        evaluate(second, DATASET[:1], tag="v2", cache=cache)
+
+        # Assert
+        self.assertEqual(first.message.call_count, 4)
+        self.assertEqual(first.message.call_args.kwargs["tag"], "v1")
+        self.assertEqual(report["cached"], 4)
+        self.assertEqual(second.message.call_count, 1)
+        self.assertEqual(report["accuracy"], 0.75)
+
+    def test_failed_requests_are_counted_not_scored(self) -> None:
+        # Arrange
+        failing = client()
+        failing.message.side_effect = Exception("unavailable")
+
+        # Act
+        report = evaluate(failing, (json.dumps(u) for u in DATASET))
+
+        # Assert
+        self.assertEqual((report["count"], report["errors"]), (0, 4))
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_fallback_answers_are_not_cached(self, mock_req: Mock) -> None:
+        # Arrange
+        breaker = CircuitBreaker(window_size=2, min_calls=2)
+        breaker.record("/message", False, 0.1)
+        breaker.record("/message", False, 0.1)
+        fallback = Mock(return_value={"intents": [{"name": "greet"}]})
+        client = Wit("token", logger=Mock(), circuit_breaker=breaker, fallback=fallback)
+        cache = ResponseCache()
+
+        # Act
+        tagged = evaluate(client, DATASET, tag="v1", cache=cache)
+        current = evaluate(client, DATASET, version="current", cache=cache)
+
+        # Assert
+        self.assertEqual((tagged["count"], tagged["errors"]), (0, 4))
+        self.assertEqual(current["count"], 4)
+        fallback.assert_called()
+        mock_req.assert_not_called()
+        keys = [message_key(u["text"]) for u in DATASET]
+        self.assertEqual(cache.get_many("v1", keys), {})
+        self.assertEqual(cache.get_many("current", keys), {})
+
+    def test_compare_reports_disagreements_and_deltas(self) -> None:
+        # Arrange
+        mock = Mock()
+        # v2 gets "hi there" right but loses "hello"
+        candidate = dict(
+            RESPONSES,
+            **{
+                "hello": {"intents": [{"name": "get_weather", "confidence": 0.6}]},
+                "hi there": {"intents": [{"name": "greet", "confidence": 0.8}]},
+            },
+        )
+        mock.message.side_effect = lambda text, context, tag=None: (
+            candidate if tag == "v2" else RESPONSES
+        )[text]
+
+        # Act
+        report = compare(mock, DATASET, "v1", "v2", chunk_size=3)
+
+        # Assert
+        self.assertEqual(
+            (report["disagreements"], report["fixed"], report["regressed"]), (2, 1, 1)
+        )
+        self.assertEqual(report["accuracy"], 0.0)
+        self.assertEqual(report["baseline"]["accuracy"], 0.75)
+        self.assertEqual(report["intents"]["greet"]["recall"], 0.0)
+        self.assertEqual(report["intents"]["greet"]["support"], 2)
+        self.assertEqual(report["examples"][0]["text"], "hello")
+        self.assertEqual(report["examples"][0]["candidate"], "get_weather")
+        self.assertEqual(report["examples"][1]["baseline_confidence"], 0.55)
+        self.assertIn("p50", report["latency"])
+
+    def test_compare_reuses_the_cached_baseline(self) -> None:
+        # Arrange
+        cache = ResponseCache()
+        evaluate(client(), DATASET, tag="v1", cache=cache)
+        baseline = client()
+        other = client()
+
+        # Act
+        report = compare(
+            baseline,
+            DATASET,
+            "v1",
+            Target("v1", client=other, version="other-app"),
+            cache=cache,
+            max_examples=0,
+        )
+
+        # Assert
+        baseline.message.assert_not_called()
+        self.assertEqual(other.message.call_count, 4)
+        self.assertEqual(report["baseline"]["cached"], 4)
+        self.assertEqual(report["baseline"]["latency"]["requests"], 4)
+        self.assertEqual((report["disagreements"], report["examples"]), (0, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import unittest
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.graph import AppGraph, build_app_graph
+from wit.pywit.source.wit.wit import Wit, WitError
+
+
+class BuildAppGraphTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = Mock()
+        self.client.intent_list.return_value = [{"id": "1", "name": "greet"}]
+        self.client.entity_list.return_value = [
+            {"id": "2", "name": "category"},
+            {"id": "3", "name": "color"},
+        ]
+        self.client.trait_list.return_value = []
+        self.client.intent_info.side_effect = lambda name, **kw: {
+            "id": "1",
+            "name": name,
+            "entities": [],
+        }
+        self.client.entity_info.side_effect = lambda name, **kw: {
+            "id": "2" if name == "category" else "3",
+            "name": name,
+            "keywords": [],
+        }
+
+    def test_build_app_graph_indexes_details_by_name_and_id(self) -> None:
+        # Act
+        graph = build_app_graph(self.client, concurrency=4)
+
+        # Assert
+        self.assertTrue(graph.ok)
+        self.assertEqual(sorted(graph.entities), ["category", "color"])
+        self.assertEqual(graph.get("intents", "greet")["id"], "1")
+        self.assertEqual(graph.by_id["3"]["name"], "color")
+        self.assertEqual(graph.stats["requests"], 6)
+        self.assertEqual(graph.stats["failures"], 0)
+
+    def test_build_app_graph_reports_partial_failures(self) -> None:
+        # Arrange
+        def entity_info(name, **kwargs):
+            if name == "color":
+                raise WitError("Wit responded with status: 500 (Server Error)")
+            return {"id": "2", "name": name}
+
+        self.client.entity_info.side_effect = entity_info
+        self.client.trait_list.side_effect = WitError("boom")
+
+        # Act
+        graph = build_app_graph(self.client, concurrency=2)
+
+        # Assert
+        self.assertFalse(graph.ok)
+        self.assertIn("category", graph.entities)
+        self.assertNotIn("color", graph.entities)
+        failed = {(f.kind, f.name) for f in graph.errors}
+        self.assertEqual(failed, {("entities", "color"), ("traits", None)})
+        self.assertEqual(graph.stats["failures"], 2)
+
+    def test_build_app_graph_with_invalid_concurrency_raises(self) -> None:
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            build_app_graph(self.client, concurrency=0)
+
+    def test_app_graph_get_returns_default_for_unknown_name(self) -> None:
+        # Act
+        graph = AppGraph()
+
+        # Assert
+        self.assertIsNone(graph.get("traits", "missing"))
+        self.assertTrue(graph.ok)
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_wit_fetch_app_graph_calls_list_and_info_endpoints(
+        self, mock_req: Mock
+    ) -> None:
+        # Arrange
+        responses = {
+            "/intents": [{"id": "1", "name": "greet"}],
+            "/entities": [],
+            "/traits": [],
+            "/intents/greet": {"id": "1", "name": "greet"},
+        }
+        mock_req.side_effect = lambda logger, token, meth, path, params, **kw: (
+            responses[path]
+        )
+        client = Wit(access_token="token", logger=Mock())
+
+        # Act
+        graph = client.fetch_app_graph(concurrency=3)
+
+        # Assert
+        self.assertEqual(graph.intents, {"greet": {"id": "1", "name": "greet"}})
+        self.assertEqual(mock_req.call_count, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.hedging import Hedger
+from wit.pywit.source.wit.wit import is_hedgeable, Wit
+
+
+class HedgerTestCase(unittest.TestCase):
+    def test_fast_call_is_not_hedged(self) -> None:
+        # Arrange
+        hedger = Hedger(delay=1.0, budget=1.0)
+        fn = Mock(return_value="ok")
+
+        # Act
+        result = hedger.call(fn)
+
+        # Assert
+        self.assertEqual(result, "ok")
+        fn.assert_called_once()
+        self.assertEqual(hedger.stats()["hedges"], 0)
+
+    def test_slow_call_is_hedged_and_fastest_response_wins(self) -> None:
+        # Arrange
+        hedger = Hedger(delay=0.01, budget=1.0)
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(2)
+                return "slow"
+            return "fast"
+
+        # Act
+        result = hedger.call(fn)
+        release.set()
+
+        # Assert
+        self.assertEqual(result, "fast")
+        self.assertEqual(hedger.stats(), {"calls": 1, "hedges": 1, "hedge_wins": 1})
+
+    def test_budget_caps_hedged_calls(self) -> None:
+        # Arrange
+        hedger = Hedger(delay=0.0, budget=0.5)
+        fn = Mock(side_effect=lambda: time.sleep(0.01) or "ok")
+
+        # Act
+        for _ in range(4):
+            hedger.call(fn)
+
+        # Assert
+        self.assertEqual(hedger.stats()["hedges"], 2)
+
+    def test_hedge_delay_uses_observed_percentile(self) -> None:
+        # Arrange
+        hedger = Hedger(percentile=0.5, min_samples=4)
+        for latency in (0.1, 0.2, 0.3, 0.4):
+            hedger._latencies.append(latency)
+
+        # Act & Assert
+        self.assertEqual(hedger.hedge_delay(), 0.3)
+        self.assertIsNone(Hedger(min_samples=4).hedge_delay())
+
+    def test_failed_primary_falls_back_to_hedge(self) -> None:
+        # Arrange
+        hedger = Hedger(delay=0.01, budget=1.0)
+        calls = []
+
+        def fn():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.05)
+                raise ValueError("primary failed")
+            time.sleep(0.1)
+            return "hedge"
+
+        # Act & Assert
+        self.assertEqual(hedger.call(fn), "hedge")
+
+
+class WitHedgingTestCase(unittest.TestCase):
+    def test_is_hedgeable_selects_idempotent_reads(self) -> None:
+        # Act & Assert
+        self.assertTrue(is_hedgeable("GET", "/message"))
+        self.assertTrue(is_hedgeable("GET", "/language"))
+        self.assertTrue(is_hedgeable("GET", "/entities/color"))
+        self.assertFalse(is_hedgeable("GET", "/entities"))
+        self.assertFalse(is_hedgeable("POST", "/utterances"))
+        self.assertFalse(is_hedgeable("DELETE", "/intents/greet"))
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_message_goes_through_hedger(self, mock_req: Mock) -> None:
+        # Arrange
+        mock_req.return_value = {"text": "hi"}
+        hedger = Mock()
+        hedger.call.side_effect = lambda fn: fn()
+        client = Wit(access_token="token", logger=Mock(), hedging=hedger)
+
+        # Act
+        client.message("hi")
+        client.train([])
+
+        # Assert
+        hedger.call.assert_called_once()
+        self.assertEqual(mock_req.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import io
+import json
+import unittest
+import zipfile
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.local_index import normalize_text, UtteranceIndex
+from wit.pywit.source.wit.wit import Wit
+
+
+class UtteranceIndexTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.utterance = {
+            "text": "Order two pizzas",
+            "intent": {"id": "1", "name": "order"},
+            "entities": [
+                {
+                    "id": "2",
+                    "name": "wit$number",
+                    "role": "count",
+                    "start": 6,
+                    "end": 9,
+                    "body": "two",
+                    "entities": [],
+                }
+            ],
+            "traits": [{"id": "3", "name": "wit$sentiment", "value": "neutral"}],
+        }
+
+    def test_normalize_text_folds_case_and_whitespace(self) -> None:
+        # Act & Assert
+        self.assertEqual(normalize_text("  Order\tTWO  pizzas "), "order two pizzas")
+
+    def test_lookup_returns_local_response_for_known_utterance(self) -> None:
+        # Arrange
+        index = UtteranceIndex()
+        index.add([self.utterance])
+
+        # Act
+        resp = index.lookup("order TWO pizzas")
+
+        # Assert
+        self.assertTrue(resp["local"])
+        self.assertEqual(resp["intents"], [{"name": "order", "confidence": 1.0}])
+        entity = resp["entities"]["wit$number:count"][0]
+        self.assertEqual((entity["start"], entity["end"]), (6, 9))
+        self.assertEqual(entity["body"], "TWO")
+        self.assertEqual(resp["traits"]["wit$sentiment"][0]["value"], "neutral")
+        self.assertEqual((index.hits, index.misses), (1, 0))
+
+    def test_lookup_returns_none_for_unknown_text(self) -> None:
+        # Arrange
+        index = UtteranceIndex()
+        index.add([self.utterance])
+
+        # Act & Assert
+        self.assertIsNone(index.lookup("order three pizzas"))
+        self.assertIsNone(index.lookup(""))
+        self.assertEqual(index.misses, 2)
+
+    def test_add_shares_identical_labels_and_remove_drops_entries(self) -> None:
+        # Arrange
+        index = UtteranceIndex()
+
+        # Act
+        index.add(
+            [
+                {"text": "hi", "intent": "greet", "entities": [], "traits": []},
+                {"text": "hello", "intent": "greet", "entities": [], "traits": []},
+            ]
+        )
+        index.remove(["HI"])
+
+        # Assert
+        self.assertEqual(len(index), 1)
+        self.assertNotIn("hi", index)
+        self.assertIn("hello", index)
+        self.assertEqual(len(index._labels), 1)
+
+    def test_refresh_fetches_only_new_pages(self) -> None:
+        # Arrange
+        client = Mock()
+        client.get_utterances.side_effect = [
+            [self.utterance, dict(self.utterance, text="a")],
+            [dict(self.utterance, text="b")],
+            [],
+        ]
+        index = UtteranceIndex()
+
+        # Act
+        first = index.refresh(client, page_size=2)
+        second = index.refresh(client, page_size=2)
+
+        # Assert
+        self.assertEqual((first, second), (3, 0))
+        self.assertEqual(
+            [c.kwargs["offset"] for c in client.get_utterances.call_args_list],
+            [0, 2, 3],
+        )
+
+    def test_add_export_reads_utterance_files(self) -> None:
+        # Arrange
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as archive:
+            archive.writestr(
+                "app/utterances/utterances-1.json",
+                json.dumps(
+                    {
+                        "utterances": [
+                            {
+                                "text": "bye",
+                                "intent": "goodbye",
+                                "entities": [],
+                                "traits": [],
+                            }
+                        ]
+                    }
+                ),
+            )
+        buf.seek(0)
+        index = UtteranceIndex()
+
+        # Act
+        index.add_export(buf)
+
+        # Assert
+        self.assertEqual(index.lookup("Bye")["intents"][0]["name"], "goodbye")
+
+
+class WitLocalIndexTestCase(unittest.TestCase):
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_message_answers_from_local_index_without_request(
+        self, mock_req: Mock
+    ) -> None:
+        # Arrange
+        index = UtteranceIndex()
+        index.add([{"text": "hi", "intent": "greet"}])
+        client = Wit(access_token="token", logger=Mock(), local_index=index)
+        mock_req.return_value = {"text": "other"}
+
+        # Act
+        local = client.message("Hi")
+        remote = client.message("other")
+
+        # Assert
+        self.assertTrue(local["local"])
+        self.assertEqual(remote, {"text": "other"})
+        mock_req.assert_called_once()
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_train_and_delete_utterances_update_local_index(
+        self, mock_req: Mock
+    ) -> None:
+        # Arrange
+        index = UtteranceIndex()
+        client = Wit(access_token="token", logger=Mock(), local_index=index)
+        mock_req.return_value = {"sent": True}
+
+        # Act
+        client.train([{"text": "hi", "intent": "greet"}])
+        trained = "hi" in index
+        client.delete_utterances(["hi"])
+
+        # Assert
+        self.assertTrue(trained)
+        self.assertNotIn("hi", index)
+
+
+if __name__ == "__main__":
+    unittest.main()
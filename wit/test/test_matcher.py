@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import unittest
+
+# Import module under test
+from wit.pywit.source.wit.graph import AppGraph
+from wit.pywit.source.wit.matcher import KeywordMatcher
+
+
+class KeywordMatcherTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.category = {
+            "id": "1",
+            "name": "category",
+            "keywords": [
+                {
+                    "keyword": "shoes",
+                    "synonyms": ["shoes", "sneakers", "running shoes"],
+                },
+                {"keyword": "hats", "synonyms": ["hats", "caps"]},
+            ],
+        }
+
+    def test_find_all_maps_synonyms_to_canonical_values(self) -> None:
+        # Arrange
+        matcher = KeywordMatcher.from_entities([self.category])
+
+        # Act
+        matches = matcher.find_all("Do you sell Sneakers or caps?")
+
+        # Assert
+        self.assertEqual(
+            [(m.entity, m.value, m.body, m.start, m.end) for m in matches],
+            [
+                ("category", "shoes", "Sneakers", 12, 20),
+                ("category", "hats", "caps", 24, 28),
+            ],
+        )
+
+    def test_find_all_reports_overlapping_matches(self) -> None:
+        # Arrange
+        matcher = KeywordMatcher.from_entities([self.category])
+
+        # Act
+        matches = matcher.find_all("new running shoes")
+
+        # Assert
+        self.assertEqual(sorted(m.body for m in matches), ["running shoes", "shoes"])
+        self.assertEqual(
+            [m.body for m in matcher.find_longest("new running shoes")],
+            ["running shoes"],
+        )
+
+    def test_find_all_respects_word_boundaries(self) -> None:
+        # Arrange
+        matcher = KeywordMatcher.from_entities([self.category])
+        partial = KeywordMatcher.from_entities([self.category], whole_words=False)
+
+        # Act & Assert
+        self.assertEqual(matcher.find_all("capsule"), [])
+        self.assertEqual([m.value for m in partial.find_all("capsule")], ["hats"])
+
+    def test_fold_options_control_case_and_diacritics(self) -> None:
+        # Arrange
+        entity = {"name": "city", "keywords": [{"keyword": "Zürich"}]}
+        strict = KeywordMatcher.from_entities([entity], fold_case=False)
+        folded = KeywordMatcher.from_entities([entity], fold_diacritics=True)
+
+        # Act & Assert
+        self.assertFalse(strict.contains("flights to zürich"))
+        self.assertTrue(strict.contains("flights to Zürich"))
+        match = folded.find_all("flights to ZURICH please")[0]
+        self.assertEqual((match.body, match.start, match.end), ("ZURICH", 11, 17))
+
+    def test_message_returns_response_shaped_result(self) -> None:
+        # Arrange
+        graph = AppGraph()
+        graph.add("entities", self.category)
+        matcher = KeywordMatcher.from_app_graph(graph)
+
+        # Act
+        resp = matcher.message("caps please")
+
+        # Assert
+        self.assertEqual(resp["intents"], [])
+        entity = resp["entities"]["category:category"][0]
+        self.assertEqual(entity["value"], "hats")
+        self.assertEqual((entity["start"], entity["end"]), (0, 4))
+        self.assertTrue(matcher.contains("caps please", entity="category"))
+        self.assertFalse(matcher.contains("caps please", entity="color"))
+
+
+if __name__ == "__main__":
+    unittest.main()
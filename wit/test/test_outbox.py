@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+# Import module under test
+from wit.pywit.source.wit.outbox import DONE, FAILED, Outbox, PENDING
+from wit.pywit.source.wit.wit import CircuitOpenError, WitError
+
+
+class OutboxTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, "outbox.db")
+
+    def outbox(self, client, **kwargs) -> Outbox:
+        outbox = Outbox(client, self.path, logger=Mock(), **kwargs)
+        self.addCleanup(outbox.close)
+        return outbox
+
+    def test_consecutive_train_calls_are_merged(self) -> None:
+        # Arrange
+        client = Mock()
+        outbox = self.outbox(client, batch_size=3)
+
+        # Act
+        outbox.train([{"text": "a"}, {"text": "b"}])
+        outbox.train([{"text": "c"}])
+        outbox.train([{"text": "d"}])
+        outbox.create_intent("greet")
+        outbox.drain()
+
+        # Assert
+        self.assertEqual(
+            [c.args[0] for c in client.train.call_args_list],
+            [[{"text": "a"}, {"text": "b"}, {"text": "c"}], [{"text": "d"}]],
+        )
+        client.create_intent.assert_called_once_with("greet")
+        self.assertEqual(outbox.pending(), 0)
+
+    def test_pending_calls_survive_a_restart(self) -> None:
+        # Arrange
+        first = Outbox(Mock(), self.path)
+        op_id = first.create_synonym("city", "Paris", "Paname")
+        first.close()
+        client = Mock()
+
+        # Act
+        outbox = self.outbox(client)
+        self.assertTrue(outbox.flush())
+
+        # Assert
+        client.create_synonym.assert_called_once_with("city", "Paris", "Paname")
+        self.assertEqual(outbox.status(op_id)["status"], DONE)
+
+    def test_an_operation_id_is_applied_once(self) -> None:
+        # Arrange
+        client = Mock()
+        outbox = self.outbox(client)
+
+        # Act
+        outbox.create_intent("greet", op_id="op-1")
+        outbox.drain()
+        outbox.create_intent("greet", op_id="op-1")
+        outbox.drain()
+
+        # Assert
+        client.create_intent.assert_called_once_with("greet")
+
+    def test_overload_is_retried_in_order_and_client_errors_fail(self) -> None:
+        # Arrange
+        client = Mock()
+        client.create_intent.side_effect = [WitError("slow down", 429), None]
+        client.delete_intent.side_effect = WitError("no such intent", 400)
+        outbox = self.outbox(client)
+        created = outbox.create_intent("greet")
+        deleted = outbox.delete_intent("bye")
+        trained = outbox.train([{"text": "hi"}])
+
+        # Act
+        first = outbox.drain()
+        retried = outbox.status(created)
+        second = outbox.drain()
+
+        # Assert
+        self.assertEqual(first, 0)
+        self.assertEqual(retried["status"], PENDING)
+        self.assertEqual(retried["attempts"], 1)
+        client.train.assert_called_once()
+        self.assertEqual(second, 3)
+        self.assertEqual(outbox.status(created)["status"], DONE)
+        self.assertEqual(outbox.status(deleted)["status"], FAILED)
+        self.assertEqual(outbox.status(deleted)["error"], "no such intent")
+        self.assertEqual(outbox.status(trained)["status"], DONE)
+
+    def test_an_open_circuit_is_retried(self) -> None:
+        # Arrange
+        client = Mock()
+        client.train.side_effect = [
+            CircuitOpenError("Circuit open for /utterances"),
+            None,
+        ]
+        outbox = self.outbox(client)
+        trained = outbox.train([{"text": "hi"}])
+
+        # Act
+        first = outbox.drain()
+        retried = outbox.status(trained)
+        second = outbox.drain()
+
+        # Assert
+        self.assertEqual((first, second), (0, 1))
+        self.assertEqual(retried["status"], PENDING)
+        self.assertEqual(outbox.status(trained)["status"], DONE)
+
+    def test_background_drain(self) -> None:
+        # Arrange
+        client = Mock()
+        outbox = self.outbox(client)
+
+        # Act
+        outbox.start()
+        outbox.train([{"text": "hi"}])
+        flushed = outbox.flush(timeout=5)
+
+        # Assert
+        self.assertTrue(flushed)
+        client.train.assert_called_once_with([{"text": "hi"}])
+
+    def test_only_write_methods_are_accepted(self) -> None:
+        # Arrange
+        outbox = self.outbox(Mock())
+
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            outbox.submit("message", "hi")
+        with self.assertRaises(AttributeError):
+            outbox.message("hi")
+
+
+if __name__ == "__main__":
+    unittest.main()
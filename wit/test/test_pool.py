@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import unittest
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.breaker import CircuitBreaker
+from wit.pywit.source.wit.concurrency import AdaptiveLimiter
+from wit.pywit.source.wit.pool import tenant_id, WitPool
+
+
+def response(status_code=200):
+    rsp = Mock(status_code=status_code)
+    rsp.json.return_value = {"text": "hi", "intents": []}
+    return rsp
+
+
+class WitPoolTestCase(unittest.TestCase):
+    def test_clients_share_the_transport_and_keep_their_own_token(self) -> None:
+        # Arrange
+        transport = Mock()
+        transport.request.return_value = response()
+        pool = WitPool(transport=transport, logger=Mock())
+
+        # Act
+        a = pool.get("token-a")
+        b = pool["token-b"]
+        a.message("hi")
+        b.message("hi")
+
+        # Assert
+        self.assertIs(pool.get("token-a"), a)
+        self.assertIs(a.transport.transport, transport)
+        self.assertIs(b.transport.transport, transport)
+        auths = [
+            c.kwargs["headers"]["authorization"]
+            for c in transport.request.call_args_list
+        ]
+        self.assertEqual(auths, ["Bearer token-a", "Bearer token-b"])
+
+    def test_stats_count_requests_and_errors_per_tenant(self) -> None:
+        # Arrange
+        transport = Mock()
+        transport.request.side_effect = [response(), response(500)]
+        pool = WitPool(transport=transport, logger=Mock())
+        client = pool.get("token-a")
+
+        # Act
+        client.message("hi")
+        with self.assertRaises(Exception):
+            client.message("hi")
+        stats = pool.stats()
+
+        # Assert
+        self.assertNotIn("token-a", stats)
+        entry = stats[tenant_id("token-a")]
+        self.assertEqual(entry["requests"], 2)
+        self.assertEqual(entry["errors"], 1)
+
+    def test_least_recently_used_tenants_are_evicted(self) -> None:
+        # Arrange
+        pool = WitPool(transport=Mock(), max_tenants=2, logger=Mock())
+
+        # Act
+        pool.get("a")
+        pool.get("b")
+        pool.get("a")
+        pool.get("c")
+
+        # Assert
+        self.assertIn("a", pool)
+        self.assertNotIn("b", pool)
+        self.assertEqual(len(pool), 2)
+        self.assertEqual(pool.evictions, 1)
+
+    def test_idle_tenants_are_evicted(self) -> None:
+        # Arrange
+        pool = WitPool(transport=Mock(), idle_timeout=60, logger=Mock())
+        clock = "wit.pywit.source.wit.pool.time.monotonic"
+
+        # Act
+        with patch(clock, return_value=1000.0):
+            pool.get("a")
+        with patch(clock, return_value=1100.0):
+            pool.get("b")
+
+        # Assert
+        self.assertNotIn("a", pool)
+        self.assertIn("b", pool)
+
+    def test_a_client_in_use_is_not_idle(self) -> None:
+        # Arrange
+        transport = Mock()
+        transport.request.return_value = response()
+        pool = WitPool(transport=transport, idle_timeout=60, logger=Mock())
+        clock = "wit.pywit.source.wit.pool.time.monotonic"
+        with patch(clock, return_value=1000.0):
+            client = pool.get("a")
+
+        # Act
+        with patch(clock, return_value=1050.0):
+            client.message("hi")
+        with patch(clock, return_value=1100.0):
+            pool.get("b")
+
+        # Assert
+        self.assertIn("a", pool)
+
+    def test_a_rebuilt_client_keeps_the_token_rate_limit(self) -> None:
+        # Arrange
+        transport = Mock()
+        transport.request.return_value = response()
+        pool = WitPool(
+            transport=transport, max_tenants=1, rate=5, burst=1, logger=Mock()
+        )
+        first = pool.get("a")
+        first.message("hi")
+
+        # Act
+        pool.get("b")
+        second = pool.get("a")
+
+        # Assert
+        self.assertIsNot(second, first)
+        self.assertIs(second.rate_limiter, first.rate_limiter)
+        self.assertFalse(second.rate_limiter.try_acquire())
+        self.assertEqual(pool.stats()[tenant_id("a")]["requests"], 1)
+
+    def test_each_token_gets_its_own_rate_limiter(self) -> None:
+        # Arrange
+        transport = Mock()
+        transport.request.return_value = response()
+        pool = WitPool(transport=transport, rate=5, burst=1, logger=Mock())
+
+        # Act
+        a = pool.get("a")
+        b = pool.get("b")
+
+        # Assert
+        self.assertIsNot(a.rate_limiter, b.rate_limiter)
+        self.assertTrue(a.rate_limiter.try_acquire())
+        self.assertFalse(a.rate_limiter.try_acquire())
+        self.assertTrue(b.rate_limiter.try_acquire())
+
+    def test_per_tenant_client_arguments_are_rejected(self) -> None:
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            WitPool(transport=Mock(), rate_limiter=Mock())
+        with self.assertRaises(ValueError):
+            WitPool(transport=Mock(), local_index=Mock())
+
+    def test_close_only_closes_an_owned_transport(self) -> None:
+        # Arrange
+        transport = Mock()
+
+        # Act
+        with WitPool(transport=transport) as pool:
+            pool.get("a")
+
+        # Assert
+        transport.close.assert_not_called()
+        self.assertEqual(len(pool), 0)
+
+    def test_evicted_clients_stop_listening_to_shared_components(self) -> None:
+        # Arrange
+        events = []
+        breaker = CircuitBreaker(window_size=2, min_calls=2)
+        limiter = AdaptiveLimiter(initial=4)
+        pool = WitPool(
+            transport=Mock(),
+            max_tenants=2,
+            circuit_breaker=breaker,
+            concurrency_limiter=limiter,
+            instrumentation=lambda event, data: events.append(event),
+        )
+
+        # Act
+        for i in range(100):
+            pool.get("token-%d" % i)
+        breaker.record("/message", False, 0.1)
+        breaker.record("/message", False, 0.1)
+        limiter.release(limiter.acquire(), True)
+        live = list(events)
+        pool.close()
+        limiter.release(limiter.acquire(), True)
+
+        # Assert
+        self.assertEqual(live.count("circuit_state"), 2)
+        self.assertEqual(live.count("concurrency_limit"), 2)
+        self.assertEqual(events, live)
+
+
+if __name__ == "__main__":
+    unittest.main()
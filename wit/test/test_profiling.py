@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit import wit as witmod
+from wit.pywit.source.wit.local_index import UtteranceIndex
+from wit.pywit.source.wit.profiling import server_time, TurnProfiler
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        body = b'{"text": "hi", "intents": [], "entities": {}, "traits": {}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Server-Timing", "nlu;dur=12.5, db;dur=2.5")
+        self.end_headers()
+        self.wfile.flush()
+        time.sleep(getattr(self.server, "body_delay", 0.0))
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class ProfilingTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host = patch.object(
+            witmod, "WIT_API_HOST", "http://127.0.0.1:%d" % self.server.server_port
+        )
+        host.start()
+        self.addCleanup(host.stop)
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_server_time_sums_server_timing_durations(self) -> None:
+        # Act & Assert
+        self.assertAlmostEqual(
+            server_time({"server-timing": "a;dur=1, b;dur=2"}), 0.003
+        )
+        self.assertIsNone(server_time({}))
+
+    def test_turns_report_phases_and_reuse_the_connection(self) -> None:
+        # Arrange
+        profiler = TurnProfiler()
+        client = witmod.Wit("token", logger=Mock(), transport=profiler)
+
+        # Act
+        turns = []
+        for _ in range(2):
+            start = profiler.start_turn()
+            client.message("hi")
+            turns.append(profiler.end_turn(start))
+        profiler.close()
+
+        # Assert
+        self.assertIn("connect", turns[0])
+        self.assertNotIn("connect", turns[1])
+        self.assertAlmostEqual(turns[1]["server_reported"], 0.015)
+        for phase in ("server", "download", "parse"):
+            self.assertIn(phase, turns[1])
+        self.assertIn("warm connection", profiler.format_turn(turns[1]))
+        self.assertIn("(n=2)", profiler.format_turn(turns[1]))
+
+    def test_download_is_timed_apart_from_the_server(self) -> None:
+        # Arrange
+        self.server.body_delay = 0.2
+        profiler = TurnProfiler()
+        client = witmod.Wit("token", logger=Mock(), transport=profiler)
+
+        # Act
+        start = profiler.start_turn()
+        client.message("hi")
+        phases = profiler.end_turn(start)
+        profiler.close()
+
+        # Assert
+        self.assertGreaterEqual(phases["download"], 0.15)
+        self.assertLess(phases["server"], 0.15)
+
+    @patch("wit.pywit.source.wit.wit.prompt")
+    def test_interactive_profile_prints_a_breakdown_per_turn(
+        self, mock_prompt: Mock
+    ) -> None:
+        # Arrange
+        mock_prompt.side_effect = ["hi", "known phrase", EOFError]
+        index = UtteranceIndex()
+        index.add([{"text": "known phrase", "intent": "greet", "entities": []}])
+        client = witmod.Wit("token", logger=Mock(), local_index=index)
+
+        # Act
+        with patch("builtins.print") as mock_print:
+            client.interactive(profile=True)
+
+        # Assert
+        lines = [c.args[0] for c in mock_print.call_args_list]
+        self.assertIn("server", lines[1])
+        self.assertIn("cache miss", lines[1])
+        self.assertTrue(lines[3].startswith("cache hit"))
+        self.assertIsNone(client.transport)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import unittest
+
+# Import module under test
+from wit.pywit.source.wit.ratelimit import RateLimiter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    def test_acquire_allows_a_burst_then_paces_calls(self) -> None:
+        # Arrange
+        clock = FakeClock()
+        limiter = RateLimiter(10, burst=5, clock=clock, sleep=clock.sleep)
+
+        # Act
+        for _ in range(25):
+            limiter.acquire()
+
+        # Assert: 5 immediately, then 20 at 10 per second
+        self.assertAlmostEqual(clock.now, 2.0)
+        self.assertAlmostEqual(limiter.waited, 2.0)
+
+    def test_try_acquire_does_not_wait(self) -> None:
+        # Arrange
+        clock = FakeClock()
+        limiter = RateLimiter(2, burst=1, clock=clock)
+
+        # Act & Assert
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+        clock.now += 0.5
+        self.assertTrue(limiter.try_acquire())
+
+    def test_rate_must_be_positive(self) -> None:
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            RateLimiter(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
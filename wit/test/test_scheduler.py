@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit import wit as witmod
+from wit.pywit.source.wit.ratelimit import RateLimiter
+from wit.pywit.source.wit.scheduler import (
+    BACKGROUND,
+    BULK,
+    default_priority,
+    INTERACTIVE,
+    RequestScheduler,
+)
+
+
+class RequestSchedulerTestCase(unittest.TestCase):
+    def run_queued(self, scheduler, names, holder=BACKGROUND):
+        # queues `names` behind a held slot, then records the admission order
+        order = []
+        lock = threading.Lock()
+
+        def run(name):
+            with scheduler.slot(name):
+                with lock:
+                    order.append(name)
+
+        scheduler.acquire(holder)
+        threads = []
+        for i, name in enumerate(names):
+            thread = threading.Thread(target=run, args=(name,))
+            thread.start()
+            threads.append(thread)
+            while sum(s["queued"] for s in scheduler.stats().values()) <= i:
+                time.sleep(0.001)
+        scheduler.release()
+        for thread in threads:
+            thread.join(5)
+        return order
+
+    def test_interactive_requests_overtake_queued_bulk_requests(self) -> None:
+        # Arrange
+        scheduler = RequestScheduler(slots=1)
+
+        # Act
+        order = self.run_queued(scheduler, [BULK, BULK, BULK, INTERACTIVE])
+
+        # Assert
+        self.assertEqual(order, [INTERACTIVE, BULK, BULK, BULK])
+
+    def test_classes_share_slots_by_weight(self) -> None:
+        # Arrange
+        scheduler = RequestScheduler(slots=1, weights={"a": 3, "b": 1})
+
+        # Act
+        order = self.run_queued(scheduler, ["b"] * 4 + ["a"] * 6, holder="a")
+
+        # Assert
+        self.assertEqual(order[:4].count("a"), 3)
+        self.assertEqual(order[-2:], ["b", "b"])
+        stats = scheduler.stats()
+        self.assertEqual(stats["a"]["requests"], 7)  # with the holder
+        self.assertEqual(stats["b"]["queued"], 0)
+
+    def test_custom_weights_keep_the_default_classes(self) -> None:
+        # Arrange
+        scheduler = RequestScheduler(weights={BULK: 2, "reports": 1})
+
+        # Act
+        with scheduler.slot(scheduler.priority_of("GET", "/message")):
+            pass
+
+        # Assert
+        self.assertEqual(scheduler.weights[INTERACTIVE], 16)
+        self.assertEqual(scheduler.weights[BULK], 2)
+        self.assertEqual(scheduler.stats()[INTERACTIVE]["requests"], 1)
+
+    def test_admission_waits_for_the_rate_limiter(self) -> None:
+        # Arrange
+        limiter = RateLimiter(50, burst=1)
+        scheduler = RequestScheduler(slots=4, rate_limiter=limiter)
+
+        # Act
+        start = time.monotonic()
+        for _ in range(3):
+            with scheduler.slot(INTERACTIVE):
+                pass
+        elapsed = time.monotonic() - start
+
+        # Assert
+        self.assertGreaterEqual(elapsed, 0.035)
+
+    def test_priority_applies_to_the_current_thread(self) -> None:
+        # Arrange
+        scheduler = RequestScheduler()
+
+        # Act & Assert
+        self.assertEqual(default_priority("GET", "/message"), INTERACTIVE)
+        self.assertEqual(scheduler.priority_of("POST", "/utterances"), BACKGROUND)
+        with scheduler.priority(BULK):
+            self.assertEqual(scheduler.priority_of("GET", "/message"), BULK)
+        self.assertEqual(scheduler.priority_of("GET", "/message"), INTERACTIVE)
+        with self.assertRaises(ValueError):
+            with scheduler.priority("urgent"):
+                pass
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_client_requests_go_through_the_scheduler(self, mock_req: Mock) -> None:
+        # Arrange
+        mock_req.return_value = {"text": "hi"}
+        scheduler = RequestScheduler()
+        client = witmod.Wit("token", logger=Mock(), scheduler=scheduler)
+
+        # Act
+        client.message("hi")
+        with scheduler.priority(BULK):
+            client.train([])
+
+        # Assert
+        stats = scheduler.stats()
+        self.assertEqual(stats[INTERACTIVE]["requests"], 1)
+        self.assertEqual(stats[BULK]["requests"], 1)
+        self.assertEqual(scheduler.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.singleflight import AsyncSingleFlight, SingleFlight
+from wit.pywit.source.wit.wit import Wit
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    def test_concurrent_calls_with_same_key_share_one_call(self) -> None:
+        # Arrange
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        fn = Mock(side_effect=lambda: started.set() or release.wait(2) and {"n": 1})
+
+        # Act
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            leader = executor.submit(flight.do, "start", fn)
+            started.wait(2)
+            followers = [executor.submit(flight.do, "start", fn) for _ in range(3)]
+            while flight.stats()["coalesced"] < 3:
+                pass
+            release.set()
+            results = [f.result() for f in [leader] + followers]
+
+        # Assert
+        fn.assert_called_once()
+        self.assertEqual(results, [{"n": 1}] * 4)
+        self.assertIsNot(results[1], results[2])
+        self.assertEqual(flight.stats(), {"calls": 4, "coalesced": 3, "in_flight": 0})
+
+    def test_errors_are_shared_and_keys_are_released(self) -> None:
+        # Arrange
+        flight = SingleFlight()
+
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            flight.do("k", Mock(side_effect=ValueError("boom")))
+        self.assertEqual(flight.do("k", lambda: 2), 2)
+        self.assertEqual(flight.stats()["coalesced"], 0)
+
+
+class AsyncSingleFlightTestCase(unittest.TestCase):
+    def test_concurrent_coroutines_share_one_call(self) -> None:
+        # Arrange
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"text": "start"}
+
+        async def run():
+            return await asyncio.gather(*[flight.do("start", fetch) for _ in range(5)])
+
+        # Act
+        results = asyncio.run(run())
+
+        # Assert
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"text": "start"}] * 5)
+        self.assertEqual(flight.stats(), {"calls": 5, "coalesced": 4, "in_flight": 0})
+
+
+class WitSingleFlightTestCase(unittest.TestCase):
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_message_and_detect_language_are_coalesced_by_params(
+        self, mock_req: Mock
+    ) -> None:
+        # Arrange
+        mock_req.return_value = {"text": "start"}
+        flight = Mock()
+        flight.do.side_effect = lambda key, fn: fn()
+        client = Wit(access_token="token", logger=Mock(), single_flight=flight)
+
+        # Act
+        client.message("start", n=2)
+        client.detect_language("start")
+        client.intent_list()
+
+        # Assert
+        keys = [c.args[0] for c in flight.do.call_args_list]
+        self.assertEqual(keys[0][0], "/message")
+        self.assertEqual(keys[0][1], (("n", 2), ("q", "start")))
+        self.assertEqual(keys[1][0], "/language")
+        self.assertEqual(mock_req.call_count, 3)
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_calls_from_different_apps_are_not_coalesced(self, mock_req: Mock) -> None:
+        # Arrange
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def respond(logger, token, meth, path, params, **kwargs):
+            started.set()
+            release.wait(2)
+            return {"app": token}
+
+        mock_req.side_effect = respond
+        first = Wit(access_token="tokA", logger=Mock(), single_flight=flight)
+        second = Wit(access_token="tokB", logger=Mock(), single_flight=flight)
+
+        # Act
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            a = executor.submit(first.message, "start")
+            started.wait(2)
+            b = executor.submit(second.message, "start")
+            while flight.stats()["calls"] < 2:
+                pass
+            release.set()
+            results = [a.result(), b.result()]
+
+        # Assert
+        self.assertEqual(results, [{"app": "tokA"}, {"app": "tokB"}])
+        self.assertEqual(mock_req.call_count, 2)
+        self.assertEqual(flight.stats()["coalesced"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import io
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.speech_cache import (
+    audio_digest,
+    cache_key,
+    DiskSpeechCache,
+    HashingStream,
+    SpeechCache,
+)
+from wit.pywit.source.wit.upload import BufferReader
+from wit.pywit.source.wit.wit import Wit
+
+AUDIO = b"RIFF" + bytes(range(256)) * 64
+
+
+class SpeechCacheTestCase(unittest.TestCase):
+    def test_digest_is_the_same_for_every_kind_of_input(self) -> None:
+        # Arrange
+        f = io.BytesIO(AUDIO)
+        f.read(4)
+        f.seek(0)
+        stream = HashingStream(iter([AUDIO[:100], AUDIO[100:]]))
+
+        # Act
+        list(stream)
+
+        # Assert
+        expected = audio_digest(AUDIO)
+        self.assertEqual(audio_digest(bytearray(AUDIO)), expected)
+        self.assertEqual(audio_digest(BufferReader(AUDIO)), expected)
+        self.assertEqual(audio_digest(f), expected)
+        self.assertEqual(f.tell(), 0)
+        self.assertEqual(stream.digest(), expected)
+        self.assertIsNone(audio_digest(iter([AUDIO])))
+
+    def test_key_depends_on_content_type_version_and_verbose(self) -> None:
+        # Arrange
+        digest = audio_digest(AUDIO)
+
+        # Act
+        keys = {
+            cache_key(digest, "audio/wav", "20200513"),
+            cache_key(digest, "audio/raw", "20200513"),
+            cache_key(digest, "audio/wav", "20240304"),
+            cache_key(digest, "audio/wav", "20200513", verbose=True),
+            cache_key(digest, "audio/wav", "20200513", access_token="tokB"),
+        }
+
+        # Assert
+        self.assertEqual(len(keys), 5)
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_apps_sharing_a_cache_get_their_own_responses(self, mock_req: Mock) -> None:
+        # Arrange
+        mock_req.side_effect = lambda logger, token, *args, **kwargs: {"app": token}
+        cache = SpeechCache()
+        first = Wit(access_token="tokA", logger=Mock(), speech_cache=cache)
+        second = Wit(access_token="tokB", logger=Mock(), speech_cache=cache)
+        headers = {"Content-Type": "audio/wav"}
+
+        # Act
+        first.speech(AUDIO, headers)
+        resp = second.speech(AUDIO, headers)
+
+        # Assert
+        self.assertEqual(resp, {"app": "tokB"})
+        self.assertEqual(mock_req.call_count, 2)
+
+    def test_memory_cache_evicts_least_recently_used(self) -> None:
+        # Arrange
+        cache = SpeechCache(max_entries=2)
+        cache.put("a", {"text": "a"})
+        cache.put("b", {"text": "b"})
+        cache.get("a")
+
+        # Act
+        cache.put("c", {"text": "c"})
+
+        # Assert
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"text": "a"})
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_disk_cache_survives_new_instances(self) -> None:
+        # Arrange
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        DiskSpeechCache(directory).put("k", {"text": "hi"})
+
+        # Act & Assert
+        self.assertEqual(DiskSpeechCache(directory).get("k"), {"text": "hi"})
+        self.assertIsNone(DiskSpeechCache(directory).get("other"))
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_speech_answers_repeated_audio_from_cache(self, mock_req: Mock) -> None:
+        # Arrange
+        mock_req.return_value = {"text": "hello"}
+        client = Wit(access_token="token", logger=Mock(), speech_cache=SpeechCache())
+        headers = {"Content-Type": "audio/wav"}
+
+        # Act
+        first = client.speech(AUDIO, headers)
+        second = client.speech(io.BytesIO(AUDIO), headers)
+        other_type = client.speech(AUDIO, {"Content-Type": "audio/raw"})
+
+        # Assert
+        self.assertEqual(first, {"text": "hello"})
+        self.assertEqual(second, first)
+        self.assertEqual(other_type, first)
+        self.assertEqual(mock_req.call_count, 2)
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_streams_are_hashed_while_uploading(self, mock_req: Mock) -> None:
+        # Arrange
+        def consume(*args, **kwargs):
+            b"".join(kwargs["data"])
+            return {"text": "streamed"}
+
+        mock_req.side_effect = consume
+        client = Wit(access_token="token", logger=Mock(), speech_cache=SpeechCache())
+        headers = {"Content-Type": "audio/wav"}
+
+        # Act
+        client.speech(iter([AUDIO[:10], AUDIO[10:]]), headers)
+        resp = client.speech(AUDIO, headers)
+
+        # Assert
+        self.assertEqual(resp, {"text": "streamed"})
+        self.assertEqual(mock_req.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import asyncio
+import io
+import unittest
+from unittest.mock import Mock
+
+import requests
+
+# Import module under test
+from wit.pywit.source.wit.singleflight import AsyncSingleFlight
+from wit.pywit.source.wit.transport import body_content, Http2Transport, httpx
+from wit.pywit.source.wit.wit import Wit, WitError
+
+if httpx is not None:
+    from wit.pywit.source.wit.async_client import AsyncWit
+
+
+def _handler(request):
+    if request.url.path == "/fail":
+        return httpx.Response(503, json={})
+    if request.url.path == "/down":
+        raise httpx.ConnectError("connection refused")
+    return httpx.Response(
+        200,
+        json={
+            "path": request.url.path,
+            "q": request.url.params.get("q"),
+            "auth": request.headers["authorization"],
+            "body": len(request.content),
+        },
+    )
+
+
+class BodyContentTestCase(unittest.TestCase):
+    def test_body_content_streams_file_objects_in_chunks(self) -> None:
+        # Arrange
+        audio = io.BytesIO(b"x" * 100000)
+
+        # Act
+        chunks = list(body_content(audio))
+
+        # Assert
+        self.assertEqual([len(c) for c in chunks], [65536, 34464])
+        self.assertEqual(body_content(b"raw"), b"raw")
+        self.assertIsNone(body_content(None))
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class Http2TransportTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.transport = Http2Transport()
+        self.transport._client = httpx.Client(transport=httpx.MockTransport(_handler))
+
+    def tearDown(self) -> None:
+        self.transport.close()
+
+    def test_wit_requests_go_through_transport(self) -> None:
+        # Arrange
+        client = Wit(access_token="token", logger=Mock(), transport=self.transport)
+
+        # Act
+        resp = client.message("hello")
+        speech = client.speech(io.BytesIO(b"abc"), {"Content-Type": "audio/wav"})
+
+        # Assert
+        self.assertEqual(resp["path"], "/message")
+        self.assertEqual(resp["q"], "hello")
+        self.assertEqual(resp["auth"], "Bearer token")
+        self.assertEqual(speech["body"], 3)
+        self.assertEqual(sum(self.transport.responses_by_version.values()), 2)
+
+    def test_http_errors_raise_wit_error_with_status(self) -> None:
+        # Act & Assert
+        with self.assertRaises(WitError) as context:
+            Wit("token", logger=Mock(), transport=self.transport)._request(
+                "GET", "/fail", {}
+            )
+        self.assertEqual(context.exception.status_code, 503)
+
+    def test_network_errors_are_raised_as_requests_errors(self) -> None:
+        # Act & Assert
+        with self.assertRaises(requests.ConnectionError):
+            self.transport.request("GET", "https://api.wit.ai/down")
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class AsyncWitTestCase(unittest.TestCase):
+    def test_concurrent_messages_share_client_and_coalesce(self) -> None:
+        # Arrange
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.params.get("q"))
+            return _handler(request)
+
+        async def run():
+            client = AsyncWit("token", single_flight=AsyncSingleFlight())
+            client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with client:
+                return await asyncio.gather(
+                    client.message("start"),
+                    client.message("start"),
+                    client.message("stop"),
+                    client.entity_info("color"),
+                )
+
+        # Act
+        results = asyncio.run(run())
+
+        # Assert
+        self.assertEqual(
+            [r["path"] for r in results][2:], ["/message", "/entities/color"]
+        )
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(sorted(c for c in calls if c), ["start", "stop"])
+
+
+if __name__ == "__main__":
+    unittest.main()
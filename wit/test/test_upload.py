@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import io
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import Mock, patch
+
+import requests
+
+# Import module under test
+from wit.pywit.source.wit.audio import np
+from wit.pywit.source.wit.upload import BufferReader, MappedFile, open_body
+from wit.pywit.source.wit.wit import Wit
+
+
+class EchoLengthHandler(BaseHTTPRequestHandler):
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(body[:16] + str(len(body)).encode())
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class UploadTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        fd, self.path = tempfile.mkstemp()
+        self.payload = os.urandom(300 * 1024)
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.payload)
+
+    def tearDown(self) -> None:
+        os.unlink(self.path)
+
+    def test_buffer_reader_returns_slices_of_the_buffer(self) -> None:
+        # Arrange
+        data = bytearray(b"abcdefgh")
+        reader = BufferReader(data)
+
+        # Act
+        first = reader.read(3)
+        data[0:1] = b"z"
+
+        # Assert: no copy was made
+        self.assertIsInstance(first, memoryview)
+        self.assertEqual(bytes(first), b"zbc")
+        self.assertEqual(len(reader), 5)
+        self.assertEqual(bytes(reader.read()), b"defgh")
+        self.assertEqual(len(reader.read(10)), 0)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_buffer_reader_reads_numpy_arrays_as_bytes(self) -> None:
+        # Arrange
+        samples = np.arange(8, dtype="<i2")
+
+        # Act & Assert
+        self.assertEqual(len(BufferReader(samples)), 16)
+        self.assertEqual(
+            bytes(BufferReader(samples[::2]).read()), samples[::2].tobytes()
+        )
+
+    def test_mapped_file_reads_the_whole_file(self) -> None:
+        # Act
+        with MappedFile(self.path) as reader:
+            body = b"".join(bytes(chunk) for chunk in reader)
+
+        # Assert
+        self.assertEqual(body, self.payload)
+
+    def test_open_body_passes_file_objects_and_iterables_through(self) -> None:
+        # Arrange
+        f = io.BytesIO(b"abc")
+        chunks = iter([b"a"])
+
+        # Act & Assert
+        self.assertIs(open_body(f), f)
+        self.assertIs(open_body(chunks), chunks)
+        self.assertIsInstance(open_body(self.path), MappedFile)
+        self.assertIsInstance(open_body(b"abc"), BufferReader)
+
+    def test_requests_streams_readers_with_content_length(self) -> None:
+        # Arrange
+        server = HTTPServer(("127.0.0.1", 0), EchoLengthHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = "http://127.0.0.1:%d/" % server.server_port
+
+        # Act
+        try:
+            with MappedFile(self.path) as reader:
+                rsp = requests.post(url, data=reader)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # Assert
+        self.assertEqual(rsp.content, self.payload[:16] + b"307200")
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_speech_maps_paths_and_closes_them(self, mock_req: Mock) -> None:
+        # Arrange
+        mock_req.return_value = {"text": "hello"}
+        client = Wit(access_token="token", logger=Mock())
+
+        # Act
+        client.speech(self.path, {"Content-Type": "audio/wav"})
+
+        # Assert
+        body = mock_req.call_args.kwargs["data"]
+        self.assertIsInstance(body, MappedFile)
+        self.assertTrue(body._map.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# pyre-strict
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+
+import unittest
+from unittest.mock import Mock, patch
+
+# Import module under test
+from wit.pywit.source.wit.audio import encode_pcm16, np, raw_content_type
+from wit.pywit.source.wit.vad import VoiceActivityDetector
+from wit.pywit.source.wit.wit import Wit
+
+RATE = 16000
+
+
+def utterance(lead=1.0, speech=0.5, tail=1.0, noise=0.001):
+    """Silence with faint noise around a 200 Hz tone."""
+    rng = np.random.RandomState(0)
+    total = int(RATE * (lead + speech + tail))
+    samples = (noise * rng.standard_normal(total)).astype(np.float32)
+    start = int(RATE * lead)
+    t = np.arange(int(RATE * speech)) / float(RATE)
+    samples[start : start + len(t)] += 0.3 * np.sin(2 * np.pi * 200 * t)
+    return samples
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class VoiceActivityDetectorTestCase(unittest.TestCase):
+    def test_trim_removes_leading_and_trailing_silence(self) -> None:
+        # Arrange
+        vad = VoiceActivityDetector(padding_ms=100)
+        samples = utterance()
+
+        # Act
+        trimmed = vad.trim(samples, RATE)
+
+        # Assert
+        self.assertAlmostEqual(len(trimmed) / float(RATE), 0.7, delta=0.05)
+        self.assertEqual(vad.bytes_removed, (len(samples) - len(trimmed)) * 2)
+
+    def test_regions_finds_each_utterance(self) -> None:
+        # Arrange
+        vad = VoiceActivityDetector(padding_ms=0)
+        samples = np.concatenate([utterance(tail=0.5), utterance(lead=0.5)])
+
+        # Act
+        regions = vad.regions(samples, RATE)
+
+        # Assert
+        self.assertEqual(len(regions), 2)
+        self.assertAlmostEqual(regions[0][0] / float(RATE), 1.0, delta=0.02)
+        self.assertAlmostEqual(regions[1][1] / float(RATE), 3.0, delta=0.02)
+
+    def test_high_zero_crossing_frames_count_as_speech(self) -> None:
+        # Arrange: quiet noise is below the energy threshold but fricative-like
+        rng = np.random.RandomState(1)
+        hiss = (0.007 * rng.standard_normal(RATE)).astype(np.float32)
+
+        # Act & Assert
+        self.assertTrue(VoiceActivityDetector().frame_activity(hiss, RATE).all())
+        self.assertFalse(
+            VoiceActivityDetector(zcr_threshold=1.0).frame_activity(hiss, RATE).any()
+        )
+
+    def test_split_merges_close_regions_and_cuts_long_ones(self) -> None:
+        # Arrange: two short utterances, a long pause, then 5s of speech
+        vad = VoiceActivityDetector(padding_ms=0)
+        samples = np.concatenate(
+            [
+                utterance(lead=0.5, speech=0.5, tail=0.3),
+                utterance(lead=0.0, speech=0.5, tail=3.0),
+                utterance(lead=0.0, speech=5.0, tail=0.5),
+            ]
+        )
+
+        # Act
+        segments = vad.split(samples, RATE, max_seconds=2.0)
+
+        # Assert
+        seconds = [(s / float(RATE), e / float(RATE)) for s, e in segments]
+        self.assertAlmostEqual(seconds[0][0], 0.5, delta=0.02)
+        self.assertAlmostEqual(seconds[0][1], 1.8, delta=0.02)
+        for start, end in segments:
+            self.assertLessEqual(end - start, 2 * RATE)
+        # the 5s region is cut into contiguous pieces
+        self.assertAlmostEqual(seconds[1][0], 4.8, delta=0.02)
+        self.assertEqual([e for _, e in segments[1:-1]], [s for s, _ in segments[2:]])
+        self.assertAlmostEqual(seconds[-1][1], 9.8, delta=0.02)
+
+    def test_stream_matches_whole_file_trimming(self) -> None:
+        # Arrange
+        samples = utterance()
+        pcm = encode_pcm16(samples)
+        chunks = [pcm[i : i + 1000] for i in range(0, len(pcm), 1000)]
+        vad = VoiceActivityDetector(padding_ms=100)
+
+        # Act
+        streamed = b"".join(vad.stream(iter(chunks), RATE))
+
+        # Assert
+        self.assertAlmostEqual(len(streamed) / 2.0 / RATE, 0.7, delta=0.05)
+        self.assertEqual(vad.bytes_removed, len(pcm) - len(streamed))
+
+    def test_stream_drops_leading_silence_as_it_goes(self) -> None:
+        # Arrange
+        silence = encode_pcm16(utterance(lead=10.0, speech=0.0, tail=0.0))
+        vad = VoiceActivityDetector(padding_ms=100)
+        removed = []
+
+        def chunks():
+            for i in range(0, len(silence), 1000):
+                removed.append(vad.bytes_removed)
+                yield silence[i : i + 1000]
+
+        # Act
+        streamed = b"".join(vad.stream(chunks(), RATE))
+
+        # Assert
+        self.assertEqual(streamed, b"")
+        # only the chunk in progress and 5 padding frames of 640 bytes are held
+        self.assertGreaterEqual(removed[-1], len(silence) - 2000 - 5 * 640)
+        self.assertEqual(vad.bytes_removed, len(silence))
+
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_speech_trims_streamed_chunks(self, mock_req: Mock) -> None:
+        # Arrange
+        mock_req.return_value = {"text": "hello"}
+        pcm = encode_pcm16(utterance())
+        events = []
+        client = Wit(
+            access_token="token",
+            logger=Mock(),
+            instrumentation=lambda event, data: events.append((event, data)),
+        )
+
+        # Act
+        client.speech(iter([pcm]), {"Content-Type": raw_content_type(RATE)}, vad=True)
+        body = b"".join(mock_req.call_args.kwargs["data"])
+
+        # Assert
+        self.assertLess(len(body), len(pcm) / 2)
+        self.assertEqual(
+            events[-1],
+            (
+                "speech_trimmed",
+                {"removed_bytes": len(pcm) - len(body), "output_bytes": len(body)},
+            ),
+        )
+
+    def test_speech_rejects_streams_it_cannot_trim(self) -> None:
+        # Arrange
+        client = Wit(access_token="token", logger=Mock())
+
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            client.speech(iter([b""]), {"Content-Type": "audio/mpeg3"}, vad=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -73,6 +73,7 @@ class ReqFunctionTestCase(unittest.TestCase):
 
         self.assertIn("404", str(context.exception))
         self.assertIn("Not Found", str(context.exception))
+        self.assertEqual(context.exception.status_code, 404)
 
     @patch("wit.pywit.source.wit.wit.requests.request")
     def test_req_with_api_error_raises_wit_error(self, mock_request: Mock) -> None:
@@ -244,6 +245,21 @@ class WitTestCase(unittest.TestCase):
             self.mock_logger, self.access_token, "GET", "/message", expected_params
         )
 
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_message_with_tag_queries_that_app_version(self, mock_req: Mock) -> None:
+        # Arrange
+        message_text = "What's the weather?"
+        mock_req.return_value = {"text": message_text, "intents": []}
+
+        # Act
+        self.wit_client.message(message_text, tag="v2")
+
+        # Assert
+        expected_params = {"q": message_text, "tag": "v2"}
+        mock_req.assert_called_once_with(
+            self.mock_logger, self.access_token, "GET", "/message", expected_params
+        )
+
     @patch("wit.pywit.source.wit.wit.req")
     def test_message_with_empty_text_excludes_q_parameter(self, mock_req: Mock) -> None:
         # Arrange
@@ -1056,6 +1072,26 @@ class WitTestCase(unittest.TestCase):
             headers={},
         )
 
+    @patch("wit.pywit.source.wit.wit.req")
+    def test_update_entity_with_keywords(self, mock_req: Mock) -> None:
+        # Arrange
+        keywords = [{"keyword": "paris", "synonyms": ["paris", "paname"]}]
+        mock_req.return_value = {"name": "city"}
+
+        # Act
+        self.wit_client.update_entity("city", "city", [], keywords=keywords)
+
+        # Assert
+        mock_req.assert_called_once_with(
+            self.mock_logger,
+            self.access_token,
+            "PUT",
+            "/entities/city",
+            {},
+            json={"name": "city", "roles": [], "keywords": keywords},
+            headers={},
+        )
+
     @patch("wit.pywit.source.wit.wit.req")
     def test_add_keyword_value(self, mock_req: Mock) -> None:
         # Arrange
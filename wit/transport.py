@@ -0,0 +1,192 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = httpx is not None
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+CHUNK_SIZE = 64 * 1024
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def body_content(data):
+    """
+    Adapts a `requests` style `data` argument to an httpx `content` body.
+    File objects are streamed in chunks instead of line by line.
+    """
+    if data is None or isinstance(data, (bytes, str)):
+        return data
+    if hasattr(data, "read"):
+        return iter(lambda: data.read(CHUNK_SIZE), b"")
+    return data
+
+
+# pyre-fixme[2]: Parameter must be annotated.
+def http_client_kwargs(http2, max_connections, timeout, prior_knowledge) -> dict:
+    """
+    httpx client arguments shared by Http2Transport and AsyncWit.
+    """
+    return {
+        "http1": not (http2 and prior_knowledge),
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        "timeout": timeout,
+    }
+
+
+class HttpxResponse:
+    """
+    Exposes an httpx response through the parts of the `requests` response
+    API used by `parse_response`.
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, rsp) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.raw = rsp
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.status_code = rsp.status_code
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.reason = rsp.reason_phrase
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.headers = rsp.headers
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.http_version = rsp.http_version
+
+    # pyre-fixme[3]: Return type must be annotated.
+    @property
+    def content(self):
+        return self.raw.content
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def json(self):
+        return self.raw.json()
+
+
+class Http2Transport:
+    """
+    Transport multiplexing concurrent requests over a few HTTP/2 connections,
+    for use as `Wit(access_token, transport=Http2Transport())`.
+
+    Falls back to HTTP/1.1 when the server does not negotiate HTTP/2 or h2
+    is not installed, and to a pooled `requests.Session` when httpx is not
+    installed (`pip install wit[http2]`). At most `max_connections`
+    connections are opened, each carrying up to `max_concurrent_streams`
+    requests.
+    """
+
+    def __init__(
+        self,
+        # pyre-fixme[2]: Parameter must be annotated.
+        max_connections=4,
+        # pyre-fixme[2]: Parameter must be annotated.
+        max_concurrent_streams=100,
+        # pyre-fixme[2]: Parameter must be annotated.
+        timeout=30.0,
+        # pyre-fixme[2]: Parameter must be annotated.
+        http2=True,
+        # pyre-fixme[2]: Parameter must be annotated.
+        prior_knowledge=False,
+    ) -> None:
+        """
+        :param prior_knowledge: speak HTTP/2 right away on cleartext `http://`
+            URLs (h2c), e.g. for a local stub or proxy
+        """
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.http2 = bool(http2 and HTTP2_AVAILABLE)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.timeout = timeout
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._streams = threading.BoundedSemaphore(
+            max_connections * max_concurrent_streams
+        )
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.responses_by_version = Counter()
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._lock = threading.Lock()
+        if httpx is None:
+            # pyre-fixme[4]: Attribute must be annotated.
+            self._client = None
+            # pyre-fixme[4]: Attribute must be annotated.
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=max_connections)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+        else:
+            self._session = None
+            self._client = httpx.Client(
+                **http_client_kwargs(
+                    self.http2, max_connections, timeout, prior_knowledge
+                )
+            )
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def request(self, meth, url, headers=None, params=None, json=None, data=None):
+        with self._streams:
+            if self._client is None:
+                rsp = self._session.request(
+                    meth,
+                    url,
+                    headers=headers,
+                    params=params,
+                    json=json,
+                    data=data,
+                    timeout=self.timeout,
+                )
+                version = "HTTP/1.1"
+            else:
+                try:
+                    rsp = HttpxResponse(
+                        self._client.request(
+                            meth,
+                            url,
+                            headers=headers,
+                            params=params,
+                            json=json,
+                            content=body_content(data),
+                        )
+                    )
+                except httpx.TimeoutException as e:
+                    raise requests.Timeout(str(e))
+                except httpx.TransportError as e:
+                    raise requests.ConnectionError(str(e))
+                version = rsp.http_version
+        with self._lock:
+            self.responses_by_version[version] += 1
+        return rsp
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+        else:
+            self._session.close()
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def __enter__(self):
+        return self
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,123 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import mmap
+import os
+
+CHUNK_SIZE = 64 * 1024
+# mapped pages already sent are released from the process every RELEASE_BYTES
+RELEASE_BYTES = 8 * 1024 * 1024
+
+
+class BufferReader:
+    """
+    Read-only file object over any buffer (bytes, bytearray, memoryview,
+    NumPy arrays...). `read` returns memoryview slices of the buffer, so the
+    HTTP client streams it to the socket without copying it.
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, buf) -> None:
+        view = memoryview(buf)
+        if not view.c_contiguous:
+            # only non-contiguous views (e.g. strided arrays) need a copy
+            view = memoryview(view.tobytes())
+        # pyre-fixme[4]: Attribute must be annotated.
+        self._view = view.cast("B") if view.format != "B" else view
+        self._pos = 0
+
+    def __len__(self) -> int:
+        return len(self._view) - self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else self._pos + size
+        chunk = self._view[self._pos : end]
+        self._pos += len(chunk)
+        self._consumed(self._pos)
+        return chunk
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def __iter__(self):
+        return iter(lambda: self.read(CHUNK_SIZE), b"")
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _consumed(self, pos) -> None:
+        pass
+
+    def close(self) -> None:
+        self._view.release()
+
+    # pyre-fixme[3]: Return type must be annotated.
+    def __enter__(self):
+        return self
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class MappedFile(BufferReader):
+    """
+    BufferReader over a memory-mapped file. Pages that were sent are dropped
+    from the process as the upload progresses, so resident memory stays
+    small even for very large files.
+    """
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, path) -> None:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # empty files cannot be mapped
+            # pyre-fixme[4]: Attribute must be annotated.
+            self._map = (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+            )
+        if self._map is not None and hasattr(self._map, "madvise"):
+            self._map.madvise(mmap.MADV_SEQUENTIAL)
+        super(MappedFile, self).__init__(self._map if self._map is not None else b"")
+        self._released = 0
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _consumed(self, pos) -> None:
+        if self._map is None or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        end = pos - pos % mmap.PAGESIZE
+        if end - self._released >= RELEASE_BYTES:
+            self._map.madvise(mmap.MADV_DONTNEED, self._released, end - self._released)
+            self._released = end
+
+    def close(self) -> None:
+        super(MappedFile, self).close()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # a slice is still referenced; the map goes away with it
+                pass
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def open_body(data):
+    """
+    Wraps a request body for a zero-copy upload: paths are memory-mapped and
+    buffers are read in slices. File objects and iterables of chunks are
+    returned unchanged.
+    """
+    if isinstance(data, (str, os.PathLike)):
+        return MappedFile(data)
+    if hasattr(data, "read"):
+        return data
+    try:
+        return BufferReader(data)
+    except TypeError:
+        # not a buffer, e.g. a generator of chunks
+        return data
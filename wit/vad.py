@@ -0,0 +1,210 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+
+# pyre-strict
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import deque
+
+from .audio import np
+
+
+class VoiceActivityDetector:
+    """
+    Energy and zero-crossing voice activity detection on mono float samples.
+
+    A frame is speech when its level is above `energy_db` (dBFS), or within
+    `unvoiced_margin_db` of it with a zero-crossing rate above `zcr_threshold`
+    (unvoiced consonants such as "s" or "f"). Speech regions are extended by
+    `padding_ms` on both sides so that word edges are not clipped.
+    """
+
+    def __init__(
+        self,
+        # pyre-fixme[2]: Parameter must be annotated.
+        energy_db=-40.0,
+        # pyre-fixme[2]: Parameter must be annotated.
+        zcr_threshold=0.25,
+        # pyre-fixme[2]: Parameter must be annotated.
+        unvoiced_margin_db=10.0,
+        # pyre-fixme[2]: Parameter must be annotated.
+        frame_ms=20,
+        # pyre-fixme[2]: Parameter must be annotated.
+        padding_ms=200,
+    ) -> None:
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.energy_db = energy_db
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.zcr_threshold = zcr_threshold
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.unvoiced_margin_db = unvoiced_margin_db
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.frame_ms = frame_ms
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.padding_ms = padding_ms
+        # total bytes dropped by `trim` and `stream`
+        self.bytes_removed = 0
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def frame_size(self, rate) -> int:
+        return max(1, int(rate * self.frame_ms / 1000))
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def frame_activity(self, samples, rate, pad=True):
+        """
+        Returns a boolean array with one entry per frame; a trailing partial
+        frame is included.
+        """
+        size = self.frame_size(rate)
+        count = -(-len(samples) // size)
+        if count == 0:
+            return np.zeros(0, dtype=bool)
+        frames = np.zeros(count * size, dtype=np.float32)
+        frames[: len(samples)] = samples
+        frames = frames.reshape(count, size)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        level = 20 * np.log10(np.maximum(rms, 1e-10))
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(size)
+        active = (level > self.energy_db) | (
+            (level > self.energy_db - self.unvoiced_margin_db)
+            & (zcr > self.zcr_threshold)
+        )
+        if pad:
+            active = self._pad(active)
+        return active
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _pad(self, active):
+        frames = int(round(self.padding_ms / float(self.frame_ms)))
+        if frames <= 0 or not active.any():
+            return active
+        window = np.ones(2 * frames + 1)
+        return np.convolve(active.astype(np.float32), window, mode="same") > 0
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def regions(self, samples, rate):
+        """
+        Speech regions as a list of (start, end) sample offsets.
+        """
+        active = self.frame_activity(samples, rate)
+        if not active.any():
+            return []
+        edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        size = self.frame_size(rate)
+        return [
+            (int(s) * size, min(len(samples), int(e) * size))
+            for s, e in zip(starts, ends)
+        ]
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def split(self, samples, rate, max_seconds=20.0, max_gap_seconds=1.0):
+        """
+        Splits audio at pauses into segments of at most `max_seconds`.
+        Neighbouring speech regions are merged while the result fits and the
+        pause between them is at most `max_gap_seconds`; longer regions are
+        cut at their quietest frame.
+
+        :return: a list of (start, end) sample offsets
+        """
+        limit = int(max_seconds * rate)
+        if limit < 2 * self.frame_size(rate):
+            raise ValueError("max_seconds must span at least two frames")
+        pieces = []
+        for start, end in self.regions(samples, rate):
+            while end - start > limit:
+                cut = self._quietest(samples, rate, start + limit // 2, start + limit)
+                pieces.append((start, cut))
+                start = cut
+            pieces.append((start, end))
+        segments = []
+        for start, end in pieces:
+            if (
+                segments
+                and end - segments[-1][0] <= limit
+                and start - segments[-1][1] <= max_gap_seconds * rate
+            ):
+                segments[-1] = (segments[-1][0], end)
+            else:
+                segments.append((start, end))
+        return segments
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _quietest(self, samples, rate, start, end) -> int:
+        # start of the lowest-energy frame in [start, end)
+        size = self.frame_size(rate)
+        count = max(1, (end - start) // size)
+        frames = samples[start : start + count * size].reshape(count, size)
+        energy = np.einsum("ij,ij->i", frames, frames)
+        return start + int(np.argmin(energy)) * size
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def bounds(self, samples, rate):
+        """
+        (start, end) sample offsets of the audio without its leading and
+        trailing silence; (0, 0) when there is no speech at all.
+        """
+        active = np.flatnonzero(self.frame_activity(samples, rate))
+        if len(active) == 0:
+            return 0, 0
+        size = self.frame_size(rate)
+        return int(active[0]) * size, min(len(samples), (int(active[-1]) + 1) * size)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def trim(self, samples, rate, bytes_per_sample=2):
+        """
+        Removes leading and trailing silence from mono float samples.
+        """
+        start, end = self.bounds(samples, rate)
+        self.bytes_removed += (len(samples) - (end - start)) * bytes_per_sample
+        return samples[start:end]
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def stream(self, chunks, rate):
+        """
+        Trims leading and trailing silence from a stream of 16-bit
+        little-endian mono PCM chunks, e.g. for a chunked /speech upload.
+        Silence inside the audio is passed through once speech resumes.
+        """
+        size = self.frame_size(rate) * 2
+        pad_frames = int(round(self.padding_ms / float(self.frame_ms)))
+        pending = b""
+        # silent frames held back until we know whether speech follows;
+        # before the first speech, only the padding is kept
+        held = deque(maxlen=pad_frames)
+        started = False
+        for chunk in chunks:
+            pending += bytes(chunk)
+            usable = len(pending) - len(pending) % size
+            if not usable:
+                continue
+            block, pending = pending[:usable], pending[usable:]
+            samples = np.frombuffer(block, dtype="<i2").astype(np.float32) / 32768.0
+            active = self.frame_activity(samples, rate, pad=False)
+            for i, is_speech in enumerate(active):
+                frame = block[i * size : (i + 1) * size]
+                if not is_speech:
+                    if not started and len(held) == pad_frames:
+                        # the oldest frame (or this one, without padding) goes
+                        self.bytes_removed += len(held[0] if held else frame)
+                    held.append(frame)
+                    continue
+                started = True
+                if held:
+                    yield b"".join(held)
+                    held = []
+                yield frame
+        tail = held[:pad_frames] if started else []
+        self.bytes_removed += sum(map(len, held)) + len(pending)
+        self.bytes_removed -= sum(map(len, tail))
+        if tail:
+            yield b"".join(tail)
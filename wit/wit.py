@@ -4,14 +4,20 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import contextlib
 import json
 import logging
 import os
+import time
 from urllib.parse import quote
 
 import requests
-from prompt_toolkit import prompt
-from prompt_toolkit.history import InMemoryHistory
+from .batch import iter_speech_batch, transcribe_long
+from .compression import ACCEPT_ENCODING, COMPRESSIBLE, compress_body, DEFAULT_THRESHOLD
+from .graph import build_app_graph
+from .profiling import TurnProfiler
+from .speech_cache import audio_digest, cache_key, HashingStream
+from .upload import open_body
 
 # pyre-fixme[5]: Global expression must be annotated.
 WIT_API_HOST = os.getenv("WIT_URL", "https://api.wit.ai")
@@ -21,28 +27,145 @@ INTERACTIVE_PROMPT = "> "
 LEARN_MORE = "Learn more at https://wit.ai/docs/quickstart"
 
 
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def prompt(*args, **kwargs):
+    # prompt_toolkit is only needed by `interactive`, and slow to import
+    try:
+        from prompt_toolkit import prompt as toolkit_prompt
+    except ImportError:
+        raise ImportError(
+            "interactive() requires prompt_toolkit: pip install wit[interactive]"
+        )
+    return toolkit_prompt(*args, **kwargs)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+def prompt_history():
+    from prompt_toolkit.history import InMemoryHistory
+
+    return InMemoryHistory()
+
+
 class WitError(Exception):
+    # pyre-fixme[2]: Parameter must be annotated.
+    def __init__(self, message, status_code=None) -> None:
+        super(WitError, self).__init__(message)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.status_code = status_code
+
+
+class CircuitOpenError(WitError):
     pass
 
 
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def single_flight_key(access_token, path, params, headers):
+    """
+    Identifies a read call for coalescing. The token and host keep calls to
+    different apps apart when clients share a SingleFlight.
+    """
+    return (
+        path,
+        tuple(sorted(params.items())),
+        tuple(sorted((headers or {}).items())),
+        WIT_API_VERSION,
+        WIT_API_HOST,
+        access_token,
+    )
+
+
+# pyre-fixme[2]: Parameter must be annotated.
+def is_unhealthy_error(error) -> bool:
+    """
+    Whether an error points at an unhealthy service (network failure, 429 or
+    5xx) rather than at a bad request.
+    """
+    if isinstance(error, WitError):
+        code = error.status_code
+        return code is not None and (code == 429 or code >= 500)
+    return isinstance(error, requests.RequestException)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def endpoint_of(path):
+    """
+    Groups request paths by their first segment, e.g. "/entities/color" and
+    "/entities" both map to "/entities".
+    """
+    return "/" + path.split("/")[1]
+
+
+# pyre-fixme[2]: Parameter must be annotated.
+def is_hedgeable(meth, path) -> bool:
+    """
+    Idempotent reads that may be hedged: /message, /language and the
+    intent, entity and trait info endpoints.
+    """
+    if meth != "GET":
+        return False
+    if path in ("/message", "/language"):
+        return True
+    parts = path.split("/")
+    return len(parts) == 3 and parts[1] in ("intents", "entities", "traits")
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def message_params(msg, context=None, n=None, verbose=None, tag=None):
+    params = {}
+    if n is not None:
+        params["n"] = n
+    if tag is not None:
+        params["tag"] = tag
+    if msg:
+        params["q"] = msg
+    if context:
+        params["context"] = json.dumps(context)
+    if verbose:
+        params["verbose"] = verbose
+    return params
+
+
 # pyre-fixme[3]: Return type must be annotated.
 # pyre-fixme[2]: Parameter must be annotated.
 def req(logger, access_token, meth, path, params, **kwargs):
     full_url = WIT_API_HOST + path
     logger.debug("%s %s %s", meth, full_url, params)
+    headers = request_headers(access_token, kwargs.pop("headers", {}))
+    transport = kwargs.pop("transport", None) or requests
+    on_response = kwargs.pop("on_response", None)
+    rsp = transport.request(meth, full_url, headers=headers, params=params, **kwargs)
+    if on_response is not None:
+        on_response(rsp)
+    return parse_response(logger, meth, full_url, rsp)
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def request_headers(access_token, extra):
     headers = {
         "authorization": "Bearer " + access_token,
         "accept": "application/vnd.wit." + WIT_API_VERSION + "+json",
+        "accept-encoding": ACCEPT_ENCODING,
     }
-    headers.update(kwargs.pop("headers", {}))
-    rsp = requests.request(meth, full_url, headers=headers, params=params, **kwargs)
+    headers.update(extra)
+    return headers
+
+
+# pyre-fixme[3]: Return type must be annotated.
+# pyre-fixme[2]: Parameter must be annotated.
+def parse_response(logger, meth, full_url, rsp):
     if rsp.status_code > 200:
         raise WitError(
             "Wit responded with status: "
             + str(rsp.status_code)
             + " ("
             + rsp.reason
-            + ")"
+            + ")",
+            status_code=rsp.status_code,
         )
     json = rsp.json()
     if "error" in json:
@@ -64,79 +187,497 @@ class Wit:
     # pyre-fixme[4]: Attribute must be annotated.
     _sessions = {}
 
-    # pyre-fixme[2]: Parameter must be annotated.
-    def __init__(self, access_token, logger=None) -> None:
+    def __init__(
+        self,
+        # pyre-fixme[2]: Parameter must be annotated.
+        access_token,
+        # pyre-fixme[2]: Parameter must be annotated.
+        logger=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        local_index=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        circuit_breaker=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        fallback=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        instrumentation=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        hedging=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        single_flight=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        transport=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        compress_requests=False,
+        # pyre-fixme[2]: Parameter must be annotated.
+        compression_threshold=DEFAULT_THRESHOLD,
+        # pyre-fixme[2]: Parameter must be annotated.
+        speech_cache=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        rate_limiter=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        scheduler=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        concurrency_limiter=None,
+    ) -> None:
+        """
+        :param access_token: the access token of your Wit app
+        :param logger: optional custom logger
+        :param local_index: optional UtteranceIndex answering `message` calls
+            for known training utterances without a request
+        :param circuit_breaker: optional CircuitBreaker; calls to an endpoint
+            whose circuit is open fail fast with CircuitOpenError
+        :param fallback: optional `fallback(msg, context)` used by `message`
+            instead of raising CircuitOpenError
+        :param instrumentation: optional `instrumentation(event, data)` called
+            with client events, such as circuit state changes
+        :param hedging: optional Hedger used for `message`, `detect_language`
+            and the `*_info` calls
+        :param single_flight: optional SingleFlight sharing one request
+            between identical concurrent `message` or `detect_language` calls
+        :param transport: optional object with a `requests`-style `request`
+            method, such as a `requests.Session` or an Http2Transport
+        :param compress_requests: gzip-encode the bodies of `train`,
+            `delete_utterances`, `update_entity` and `import_app`
+        :param compression_threshold: bodies smaller than this many bytes
+            are sent as is
+        :param speech_cache: optional SpeechCache or DiskSpeechCache
+            answering `speech` calls for byte-identical audio
+        :param rate_limiter: optional RateLimiter every request waits for
+        :param scheduler: optional RequestScheduler admitting requests by
+            priority class, e.g. ahead of a bulk job sharing it
+        :param concurrency_limiter: optional AdaptiveLimiter bounding the
+            requests in flight by observed latency and overload errors
+        """
         self.access_token = access_token
         # pyre-fixme[4]: Attribute must be annotated.
         self.logger = logger or logging.getLogger(__name__)
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.local_index = local_index
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.circuit_breaker = circuit_breaker
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.fallback = fallback
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.instrumentation = instrumentation
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.hedging = hedging
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.single_flight = single_flight
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.transport = transport
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.compress_requests = compress_requests
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.compression_threshold = compression_threshold
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.speech_cache = speech_cache
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.rate_limiter = rate_limiter
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.scheduler = scheduler
+        # pyre-fixme[4]: Attribute must be annotated.
+        self.concurrency_limiter = concurrency_limiter
+        if circuit_breaker is not None:
+            circuit_breaker.add_listener(self._on_circuit_change)
+        if concurrency_limiter is not None:
+            concurrency_limiter.add_listener(self._on_limit_change)
+
+    def detach(self) -> None:
+        """
+        Stops listening to a shared circuit breaker or concurrency limiter,
+        so a discarded client can be garbage collected.
+        """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.remove_listener(self._on_circuit_change)
+        if self.concurrency_limiter is not None:
+            self.concurrency_limiter.remove_listener(self._on_limit_change)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _emit(self, event, **data) -> None:
+        self.logger.debug("%s %s", event, data)
+        if self.instrumentation is not None:
+            self.instrumentation(event, data)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _on_circuit_change(self, endpoint, old, new) -> None:
+        self._emit("circuit_state", endpoint=endpoint, old=old, new=new)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _on_limit_change(self, old, new) -> None:
+        self._emit("concurrency_limit", old=old, new=new)
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _on_response(self, endpoint, rsp) -> None:
+        length = rsp.headers.get("content-length")
+        self._emit(
+            "response_bytes",
+            endpoint=endpoint,
+            encoding=rsp.headers.get("content-encoding"),
+            body_bytes=len(rsp.content),
+            wire_bytes=int(length) if length is not None else None,
+        )
 
     # pyre-fixme[3]: Return type must be annotated.
     # pyre-fixme[2]: Parameter must be annotated.
-    def message(self, msg, context=None, n=None, verbose=None):
-        params = {}
-        if n is not None:
-            params["n"] = n
-        if msg:
-            params["q"] = msg
-        if context:
-            params["context"] = json.dumps(context)
-        if verbose:
-            params["verbose"] = verbose
-        resp = req(self.logger, self.access_token, "GET", "/message", params)
+    def _request(self, meth, path, params, **kwargs):
+        breaker = self.circuit_breaker
+        if breaker is None:
+            return self._send(meth, path, params, **kwargs)
+        endpoint = endpoint_of(path)
+        if not breaker.allow(endpoint):
+            raise CircuitOpenError("Circuit open for " + endpoint)
+        start = time.time()
+        try:
+            resp = self._send(meth, path, params, **kwargs)
+        except Exception as e:
+            breaker.record(endpoint, not is_unhealthy_error(e), time.time() - start)
+            raise
+        breaker.record(endpoint, True, time.time() - start)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
     # pyre-fixme[2]: Parameter must be annotated.
-    def speech(self, audio_file, headers=None, verbose=None):
+    def _send(self, meth, path, params, **kwargs):
+        if (
+            self.single_flight is not None
+            and meth == "GET"
+            and path in ("/message", "/language")
+        ):
+            key = single_flight_key(
+                self.access_token, path, params, kwargs.get("headers")
+            )
+            return self.single_flight.do(
+                key, lambda: self._send_once(meth, path, params, **kwargs)
+            )
+        return self._send_once(meth, path, params, **kwargs)
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _send_once(self, meth, path, params, **kwargs):
+        if self.transport is not None:
+            kwargs["transport"] = self.transport
+        endpoint = endpoint_of(path)
+        if self.compress_requests and (meth, endpoint) in COMPRESSIBLE:
+            kwargs, sizes = compress_body(kwargs, self.compression_threshold)
+            if sizes is not None:
+                self._emit(
+                    "request_bytes",
+                    endpoint=endpoint,
+                    encoding="gzip",
+                    body_bytes=sizes[0],
+                    wire_bytes=sizes[1],
+                )
+        if self.instrumentation is not None:
+            kwargs["on_response"] = lambda rsp: self._on_response(endpoint, rsp)
+        if self.scheduler is not None:
+            # read here, as hedged attempts run on other threads
+            priority = self.scheduler.priority_of(meth, path)
+
+        # pyre-fixme[3]: Return type must be annotated.
+        def send():
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            with contextlib.ExitStack() as slots:
+                if self.scheduler is not None:
+                    slots.enter_context(self.scheduler.slot(priority))
+                if self.concurrency_limiter is not None:
+                    slots.enter_context(self.concurrency_limiter.slot())
+                return req(self.logger, self.access_token, meth, path, params, **kwargs)
+
+        if self.hedging is not None and is_hedgeable(meth, path):
+            return self.hedging.call(send)
+        return send()
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def message(self, msg, context=None, n=None, verbose=None, tag=None):
+        """
+        :param tag: app version to query instead of the current model; such
+            calls are always answered by the API, without the local index or
+            the fallback
+        """
+        # the local index mirrors the current training data only
+        if self.local_index is not None and tag is None:
+            resp = self.local_index.lookup(msg)
+            if resp is not None:
+                self.logger.debug("local index hit for %s", msg)
+                return resp
+        params = message_params(msg, context, n, verbose, tag)
+        try:
+            resp = self._request("GET", "/message", params)
+        except CircuitOpenError:
+            # the fallback knows nothing of app versions
+            if self.fallback is None or tag is not None:
+                raise
+            self._emit("fallback", endpoint="/message")
+            resp = self.fallback(msg, context)
+        return resp
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def speech(
+        self, audio_file, headers=None, verbose=None, preprocess=False, vad=None
+    ):
         """Sends an audio file to the /speech API.
         Uses the streaming feature of requests (see `req`), so opening the file
         in binary mode is strongly recommended (see
         http://docs.python-requests.org/en/master/user/advanced/#streaming-uploads).
         Add Content-Type header as specified here: https://wit.ai/docs/http/20200513#post--speech-link
 
-        :param audio_file: an open handler to an audio file
+        :param audio_file: an open handler to an audio file, a path to one
+            (memory-mapped), or a buffer such as bytes, bytearray, memoryview
+            or a NumPy array; paths and buffers are streamed without copies
         :param headers: an optional dictionary with request headers
         :param verbose: for legacy versions, get extra information
+        :param preprocess: downmix WAV or raw PCM audio to mono 16-bit PCM
+            of at most 16 kHz before the upload, and set the matching
+            Content-Type (requires numpy)
+        :param vad: a `VoiceActivityDetector` (or True for the default one)
+            trimming leading and trailing silence from WAV or raw PCM audio;
+            iterables of raw PCM chunks are trimmed as they stream
+            (requires numpy)
         :return:
         """
         params = {}
         headers = headers or {}
         if verbose:
             params["verbose"] = True
-        resp = req(
-            self.logger,
-            self.access_token,
-            "POST",
-            "/speech",
-            params,
-            data=audio_file,
+        if preprocess or vad is not None:
+            # numpy is only loaded by the audio features
+            from . import audio
+            from .vad import VoiceActivityDetector
+        if vad is True:
+            vad = VoiceActivityDetector()
+        body = open_body(audio_file)
+        try:
+            data = body
+            if vad is not None and audio.is_stream(body):
+                if preprocess:
+                    raise ValueError("preprocess needs the whole audio, not a stream")
+                data = self._trim_stream(body, headers, vad)
+            elif preprocess or vad is not None:
+                data, headers = self._preprocess_audio(body, headers, preprocess, vad)
+            if self.speech_cache is not None:
+                return self._cached_speech(data, params, headers)
+            resp = self._request(
+                "POST",
+                "/speech",
+                params,
+                data=data,
+                headers=headers,
+            )
+        finally:
+            if body is not audio_file:
+                body.close()
+        return resp
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _cached_speech(self, data, params, headers):
+        content_type = None
+        for key, value in headers.items():
+            if key.lower() == "content-type":
+                content_type = value
+        cache = self.speech_cache
+        digest = audio_digest(data)
+        if digest is not None:
+            key = cache_key(
+                digest,
+                content_type,
+                WIT_API_VERSION,
+                params.get("verbose"),
+                self.access_token,
+            )
+            resp = cache.get(key)
+            self._emit("speech_cache", hit=resp is not None)
+            if resp is not None:
+                return resp
+        else:
+            # streams are hashed while they upload, for the next identical call
+            data = HashingStream(data)
+        resp = self._request("POST", "/speech", params, data=data, headers=headers)
+        if digest is None:
+            digest = data.digest()
+            if digest is None:
+                return resp
+            key = cache_key(
+                digest,
+                content_type,
+                WIT_API_VERSION,
+                params.get("verbose"),
+                self.access_token,
+            )
+        cache.put(key, resp)
+        return resp
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def speech_batch(
+        self, paths_or_iterable, concurrency=4, output=None, headers=None, verbose=None
+    ):
+        """
+        Sends many audio files to the /speech API concurrently. The
+        Content-Type of each file is detected from its header (or extension).
+
+        :param paths_or_iterable: a path, or an iterable of paths; directories
+            are walked
+        :param concurrency: maximum number of uploads in flight
+        :param output: optional JSONL manifest path; records are appended as
+            files complete, and files already transcribed in it are skipped
+        :return: the list of records for the files sent in this run, see
+            `iter_speech_batch`
+        """
+        return list(
+            iter_speech_batch(
+                self,
+                paths_or_iterable,
+                concurrency=concurrency,
+                output=output,
+                headers=headers,
+                verbose=verbose,
+            )
+        )
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def speech_long(
+        self,
+        audio_file,
+        headers=None,
+        max_segment_seconds=20.0,
+        concurrency=4,
+        vad=None,
+        verbose=None,
+    ):
+        """
+        Transcribes a recording longer than a single utterance: WAV or raw PCM
+        audio is split at pauses into segments of at most
+        `max_segment_seconds`, which are sent to the /speech API concurrently
+        (requires numpy).
+
+        :param audio_file: an open file, path or buffer, as for `speech`
+        :param headers: the Content-Type is needed for raw PCM
+        :param concurrency: maximum number of segments in flight
+        :param vad: the `VoiceActivityDetector` finding pauses
+        :return: `{"text", "duration", "segments"}` where each segment has
+            its `start` and `end` offsets in seconds and the `response`, or
+            `error` and `status_code` when its call failed
+        """
+        return transcribe_long(
+            self,
+            audio_file,
             headers=headers,
+            max_segment_seconds=max_segment_seconds,
+            concurrency=concurrency,
+            vad=vad,
+            verbose=verbose,
         )
-        return resp
 
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _preprocess_audio(self, audio_file, headers, preprocess, vad):
+        from . import audio
+
+        data = audio_file.read() if hasattr(audio_file, "read") else audio_file
+        headers = dict(headers)
+        content_type = None
+        for key in list(headers):
+            if key.lower() == "content-type":
+                content_type = headers.pop(key)
+        removed = vad.bytes_removed if vad is not None else 0
+        body, content_type = audio.preprocess(
+            data, content_type, audio.TARGET_RATE if preprocess else None, vad
+        )
+        if content_type is not None:
+            headers["Content-Type"] = content_type
+        if preprocess:
+            self._emit(
+                "speech_preprocessed",
+                input_bytes=len(data),
+                output_bytes=len(body),
+                content_type=content_type,
+            )
+        if vad is not None:
+            self._emit(
+                "speech_trimmed",
+                removed_bytes=vad.bytes_removed - removed,
+                output_bytes=len(body),
+            )
+        return body, headers
+
+    # pyre-fixme[3]: Return type must be annotated.
     # pyre-fixme[2]: Parameter must be annotated.
-    def interactive(self, handle_message=None, context=None) -> None:
+    def _trim_stream(self, chunks, headers, vad):
+        from . import audio
+
+        content_type = None
+        for key, value in headers.items():
+            if key.lower() == "content-type":
+                content_type = value
+        # validate before the upload starts consuming the generator
+        return self._counted_stream(
+            vad, vad.stream(chunks, audio.stream_rate(content_type))
+        )
+
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def _counted_stream(self, vad, chunks):
+        removed = vad.bytes_removed
+        sent = 0
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+        self._emit(
+            "speech_trimmed",
+            removed_bytes=vad.bytes_removed - removed,
+            output_bytes=sent,
+        )
+
+    # pyre-fixme[2]: Parameter must be annotated.
+    def interactive(self, handle_message=None, context=None, profile=False) -> None:
         """Runs interactive command line chat between user and bot. Runs
         indefinitely until EOF is entered to the prompt.
 
         handle_message -- optional function to customize your response.
         context -- optional initial context. Set to {} if omitted
+        profile -- print the timing breakdown of each turn: connect, TLS,
+            server, download and parse times, cache hits and percentiles
         """
         if context is None:
             context = {}
 
-        history = InMemoryHistory()
-        while True:
-            try:
-                message = prompt(
-                    INTERACTIVE_PROMPT, history=history, mouse_support=True
-                ).rstrip()
-            except (KeyboardInterrupt, EOFError):
-                return
-            if handle_message is None:
-                print(self.message(message, context))
-            else:
-                print(handle_message(self.message(message, context)))
+        profiler = None
+        transport = self.transport
+        if profile:
+            profiler = TurnProfiler(transport)
+            # connect while the first prompt is typed; later turns reuse it
+            profiler.warm_up(WIT_API_HOST)
+            self.transport = profiler
+        history = prompt_history()
+        try:
+            while True:
+                try:
+                    message = prompt(
+                        INTERACTIVE_PROMPT, history=history, mouse_support=True
+                    ).rstrip()
+                except (KeyboardInterrupt, EOFError):
+                    return
+                if profiler is not None:
+                    start = profiler.start_turn()
+                resp = self.message(message, context)
+                if profiler is not None:
+                    phases = profiler.end_turn(start)
+                if handle_message is None:
+                    print(resp)
+                else:
+                    print(handle_message(resp))
+                if profiler is not None:
+                    print(profiler.format_turn(phases))
+        finally:
+            if profiler is not None:
+                self.transport = transport
+                profiler.close()
 
     # pyre-fixme[3]: Return type must be annotated.
     # pyre-fixme[2]: Parameter must be annotated.
@@ -148,9 +689,7 @@ class Wit:
         headers = headers or {}
         if verbose:
             params["verbose"] = True
-        resp = req(
-            self.logger, self.access_token, "GET", "/intents", params, headers=headers
-        )
+        resp = self._request("GET", "/intents", params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -167,9 +706,7 @@ class Wit:
             params["verbose"] = True
         if n is not None:
             params["n"] = n
-        resp = req(
-            self.logger, self.access_token, "GET", "/language", params, headers=headers
-        )
+        resp = self._request("GET", "/language", params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -185,9 +722,7 @@ class Wit:
         if verbose:
             params["verbose"] = True
         endpoint = "/intents/" + quote(intent_name, safe="")
-        resp = req(
-            self.logger, self.access_token, "GET", endpoint, params, headers=headers
-        )
+        resp = self._request("GET", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -200,9 +735,7 @@ class Wit:
         headers = headers or {}
         if verbose:
             params["verbose"] = True
-        resp = req(
-            self.logger, self.access_token, "GET", "/entities", params, headers=headers
-        )
+        resp = self._request("GET", "/entities", params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -218,9 +751,7 @@ class Wit:
         if verbose:
             params["verbose"] = True
         endpoint = "/entities/" + quote(entity_name, safe="")
-        resp = req(
-            self.logger, self.access_token, "GET", endpoint, params, headers=headers
-        )
+        resp = self._request("GET", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -233,9 +764,7 @@ class Wit:
         headers = headers or {}
         if verbose:
             params["verbose"] = True
-        resp = req(
-            self.logger, self.access_token, "GET", "/traits", params, headers=headers
-        )
+        resp = self._request("GET", "/traits", params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -251,11 +780,23 @@ class Wit:
         if verbose:
             params["verbose"] = True
         endpoint = "/traits/" + quote(trait_name, safe="")
-        resp = req(
-            self.logger, self.access_token, "GET", endpoint, params, headers=headers
-        )
+        resp = self._request("GET", endpoint, params, headers=headers)
         return resp
 
+    # pyre-fixme[3]: Return type must be annotated.
+    # pyre-fixme[2]: Parameter must be annotated.
+    def fetch_app_graph(self, concurrency=8, headers=None, verbose=None):
+        """
+        Fetches all intents, entities and traits with their full details.
+        List and detail calls run concurrently, bounded by `concurrency`.
+
+        :param concurrency: maximum number of requests in flight
+        :return: an AppGraph; failed calls are listed in its `errors`
+        """
+        return build_app_graph(
+            self, concurrency=concurrency, headers=headers, verbose=verbose
+        )
+
     # pyre-fixme[3]: Return type must be annotated.
     # pyre-fixme[2]: Parameter must be annotated.
     def delete_intent(self, intent_name, headers=None, verbose=None):
@@ -269,9 +810,7 @@ class Wit:
         if verbose:
             params["verbose"] = True
         endpoint = "/intents/" + quote(intent_name, safe="")
-        resp = req(
-            self.logger, self.access_token, "DELETE", endpoint, params, headers=headers
-        )
+        resp = self._request("DELETE", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -287,9 +826,7 @@ class Wit:
         if verbose:
             params["verbose"] = True
         endpoint = "/entities/" + quote(entity_name, safe="")
-        resp = req(
-            self.logger, self.access_token, "DELETE", endpoint, params, headers=headers
-        )
+        resp = self._request("DELETE", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -308,9 +845,7 @@ class Wit:
         endpoint = (
             "/entities/" + quote(entity_name, safe="") + ":" + quote(role_name, safe="")
         )
-        resp = req(
-            self.logger, self.access_token, "DELETE", endpoint, params, headers=headers
-        )
+        resp = self._request("DELETE", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -332,9 +867,7 @@ class Wit:
             + "/keywords/"
             + quote(keyword_name, safe="")
         )
-        resp = req(
-            self.logger, self.access_token, "DELETE", endpoint, params, headers=headers
-        )
+        resp = self._request("DELETE", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -369,9 +902,7 @@ class Wit:
             + "/synonyms/"
             + quote(synonym_name, safe="")
         )
-        resp = req(
-            self.logger, self.access_token, "DELETE", endpoint, params, headers=headers
-        )
+        resp = self._request("DELETE", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -387,9 +918,7 @@ class Wit:
         if verbose:
             params["verbose"] = True
         endpoint = "/traits/" + quote(trait_name, safe="")
-        resp = req(
-            self.logger, self.access_token, "DELETE", endpoint, params, headers=headers
-        )
+        resp = self._request("DELETE", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -411,9 +940,7 @@ class Wit:
             + "/values/"
             + quote(value_name, safe="")
         )
-        resp = req(
-            self.logger, self.access_token, "DELETE", endpoint, params, headers=headers
-        )
+        resp = self._request("DELETE", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -447,9 +974,7 @@ class Wit:
             params["intents"] = intents
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "GET",
             "/utterances",
             params,
@@ -472,15 +997,15 @@ class Wit:
             data.append({"text": utterance})
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "DELETE",
             "/utterances",
             params,
             json=data,
             headers=headers,
         )
+        if self.local_index is not None:
+            self.local_index.remove(utterances)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -500,9 +1025,7 @@ class Wit:
             params["offset"] = offset
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger, self.access_token, "GET", "/apps", params, headers=headers
-        )
+        resp = self._request("GET", "/apps", params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -518,9 +1041,7 @@ class Wit:
         if verbose:
             params["verbose"] = True
         endpoint = "/apps/" + quote(app_id, safe="")
-        resp = req(
-            self.logger, self.access_token, "GET", endpoint, params, headers=headers
-        )
+        resp = self._request("GET", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -536,9 +1057,7 @@ class Wit:
         if verbose:
             params["verbose"] = True
         endpoint = "/apps/" + quote(app_id, safe="")
-        resp = req(
-            self.logger, self.access_token, "DELETE", endpoint, params, headers=headers
-        )
+        resp = self._request("DELETE", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -554,9 +1073,7 @@ class Wit:
         if verbose:
             params["verbose"] = True
         endpoint = "/apps/" + quote(app_id, safe="") + "/tags"
-        resp = req(
-            self.logger, self.access_token, "GET", endpoint, params, headers=headers
-        )
+        resp = self._request("GET", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -573,9 +1090,7 @@ class Wit:
         if verbose:
             params["verbose"] = True
         endpoint = "/apps/" + quote(app_id, safe="") + "/tags/" + quote(tag_id, safe="")
-        resp = req(
-            self.logger, self.access_token, "GET", endpoint, params, headers=headers
-        )
+        resp = self._request("GET", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -593,9 +1108,7 @@ class Wit:
         endpoint = "/apps/" + app_id + "/tags/"
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "POST",
             endpoint,
             params,
@@ -620,9 +1133,7 @@ class Wit:
         )
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger, self.access_token, "DELETE", endpoint, params, headers=headers
-        )
+        resp = self._request("DELETE", endpoint, params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -635,9 +1146,7 @@ class Wit:
         headers = headers or {}
         if verbose:
             params["verbose"] = True
-        resp = req(
-            self.logger, self.access_token, "GET", "/export", params, headers=headers
-        )
+        resp = self._request("GET", "/export", params, headers=headers)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -657,9 +1166,7 @@ class Wit:
             params["private"] = private
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "POST",
             "/import",
             params,
@@ -682,9 +1189,7 @@ class Wit:
         endpoint = "/intents"
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "POST",
             endpoint,
             params,
@@ -722,9 +1227,7 @@ class Wit:
             data["lookups"] = lookups
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "POST",
             endpoint,
             params,
@@ -748,6 +1251,8 @@ class Wit:
         headers=None,
         # pyre-fixme[2]: Parameter must be annotated.
         verbose=None,
+        # pyre-fixme[2]: Parameter must be annotated.
+        keywords=None,
     ):
         """
         Updates the attributes of an entity.
@@ -755,6 +1260,8 @@ class Wit:
                 :param entity_name: name of entity to be updated
                 :param roles: updated list of roles
                 :param lookups:  updated list of lookup strategies
+                :param keywords: the full updated list of keywords, as
+                    `{"keyword": ..., "synonyms": [...]}` objects
         """
         params = {}
         headers = headers or {}
@@ -762,11 +1269,11 @@ class Wit:
         endpoint = "/entities/" + quote(current_entity_name, safe="")
         if lookups:
             data["lookups"] = lookups
+        if keywords is not None:
+            data["keywords"] = keywords
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "PUT",
             endpoint,
             params,
@@ -788,9 +1295,7 @@ class Wit:
         endpoint = "/entities/" + quote(entity_name, safe="") + "/keywords"
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "POST",
             endpoint,
             params,
@@ -832,9 +1337,7 @@ class Wit:
         data = {"synonym": synonym}
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "POST",
             endpoint,
             params,
@@ -858,9 +1361,7 @@ class Wit:
         endpoint = "/traits"
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "POST",
             endpoint,
             params,
@@ -884,9 +1385,7 @@ class Wit:
         endpoint = "/traits/" + quote(trait_name, safe="") + "/values"
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "POST",
             endpoint,
             params,
@@ -908,15 +1407,15 @@ class Wit:
         endpoint = "/utterances"
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "POST",
             endpoint,
             params,
             json=data,
             headers=headers,
         )
+        if self.local_index is not None:
+            self.local_index.add(data)
         return resp
 
     # pyre-fixme[3]: Return type must be annotated.
@@ -951,9 +1450,7 @@ class Wit:
             params["timezone"] = timezone
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "POST",
             endpoint,
             params,
@@ -1002,9 +1499,7 @@ class Wit:
             data["timezone"] = timezone
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "PUT",
             endpoint,
             params,
@@ -1054,9 +1549,7 @@ class Wit:
             data["move_to"] = move_to
         if verbose:
             params["verbose"] = verbose
-        resp = req(
-            self.logger,
-            self.access_token,
+        resp = self._request(
             "PUT",
             endpoint,
             params,